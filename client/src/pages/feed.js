@@ -4,6 +4,9 @@ import "remixicon/fonts/remixicon.css";
 import Swal from "sweetalert2";
 import { useSession } from "../context/SessionContext";
 
+// ProfileBatchView.MAX_IDS: the batch endpoint answers 400 above this
+const PROFILE_BATCH_MAX_IDS = 100;
+
 export default function Feed() {
   const { user, token, logout } = useSession();
   const navigate = useNavigate();
@@ -135,32 +138,57 @@ export default function Feed() {
     return "";
   }, []);
 
-  // ===== fetch profile username by uploaderId
-  const fetchProfileName = useCallback(
-    async (userId) => {
-      const uid = String(userId || "").trim();
-      if (!uid || !apiBase) return;
+  // ===== fetch profile usernames for many uploaderIds, PROFILE_BATCH_MAX_IDS per call
+  const fetchProfileNames = useCallback(
+    async (userIds) => {
+      if (!apiBase) return;
 
-      if (profileNameById[uid]) return;
-      if (profileInFlightRef.current.has(uid)) return;
+      const uids = Array.from(new Set((userIds || []).map((id) => String(id || "").trim()))).filter(
+        (uid) => uid && !profileNameById[uid] && !profileInFlightRef.current.has(uid)
+      );
+      if (!uids.length) return;
 
-      profileInFlightRef.current.add(uid);
-      try {
-        const res = await fetch(`${apiBase}/api/profiles/id?id=${encodeURIComponent(uid)}`, {
-          headers: { ...authHeaders },
-        });
+      const groups = [];
+      for (let i = 0; i < uids.length; i += PROFILE_BATCH_MAX_IDS) {
+        groups.push(uids.slice(i, i + PROFILE_BATCH_MAX_IDS));
+      }
 
-        if (res.status === 401 || res.status === 403) return handle401();
-        if (!res.ok) throw new Error(`profile ${uid} ${res.status}`);
+      uids.forEach((uid) => profileInFlightRef.current.add(uid));
+      try {
+        let unauthorized = false;
+        const results = await Promise.all(
+          groups.map(async (group) => {
+            try {
+              const res = await fetch(`${apiBase}/api/profiles/batch/?ids=${encodeURIComponent(group.join(","))}`, {
+                headers: { ...authHeaders },
+              });
+
+              if (res.status === 401 || res.status === 403) {
+                unauthorized = true;
+                return {};
+              }
+              if (!res.ok) throw new Error(`profiles ${group.join(",")} ${res.status}`);
+
+              const json = await res.json();
+              return json?.profiles && typeof json.profiles === "object" ? json.profiles : {};
+            } catch (e) {
+              console.error("fetchProfileNames error:", e);
+              return {};
+            }
+          })
+        );
+        if (unauthorized) return handle401();
 
-        const json = await res.json();
-        const uname = json?.data?.user?.username ? String(json.data.user.username) : "";
+        const names = {};
+        results.forEach((profiles) => {
+          Object.entries(profiles).forEach(([uid, p]) => {
+            if (p?.username) names[uid] = String(p.username);
+          });
+        });
 
-        if (uname) setProfileNameById((prev) => ({ ...prev, [uid]: uname }));
-      } catch (e) {
-        console.error("fetchProfileName error:", e);
+        if (Object.keys(names).length) setProfileNameById((prev) => ({ ...prev, ...names }));
       } finally {
-        profileInFlightRef.current.delete(uid);
+        uids.forEach((uid) => profileInFlightRef.current.delete(uid));
       }
     },
     [apiBase, authHeaders, handle401, profileNameById]
@@ -298,7 +326,7 @@ export default function Feed() {
 
         // batch fetch username uploader
         const uniqUploaderIds = Array.from(new Set(mapped.map((v) => v.uploaderId).filter(Boolean)));
-        uniqUploaderIds.forEach((uid) => fetchProfileName(uid));
+        fetchProfileNames(uniqUploaderIds);
       } catch (e) {
         console.error(e);
       }
@@ -313,14 +341,14 @@ export default function Feed() {
     tahunParam,
     normalizeYearValue,
     getUploaderId,
-    fetchProfileName,
+    fetchProfileNames,
   ]);
 
   // fetch profile untuk item baru
   useEffect(() => {
     const ids = Array.from(new Set(videos.map((v) => v.uploaderId).filter(Boolean)));
-    ids.forEach((uid) => fetchProfileName(uid));
-  }, [videos, fetchProfileName]);
+    fetchProfileNames(ids);
+  }, [videos, fetchProfileNames]);
 
   // ===== Snap tracking (tetap sama)
   useEffect(() => {
@@ -523,7 +551,7 @@ export default function Feed() {
         setNextCursor(data.nextCursor ?? null);
 
         const uniqUploaderIds = Array.from(new Set(newItems.map((v) => v.uploaderId).filter(Boolean)));
-        uniqUploaderIds.forEach((uid) => fetchProfileName(uid));
+        fetchProfileNames(uniqUploaderIds);
 
         // init likes for new items
         setLikeCountByPost((prev) => {
@@ -549,7 +577,7 @@ export default function Feed() {
     tahunParam,
     normalizeYearValue,
     getUploaderId,
-    fetchProfileName,
+    fetchProfileNames,
     handle401,
   ]);
 
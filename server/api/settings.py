@@ -42,11 +42,12 @@ INSTALLED_APPS = [
     'rest_framework',
 
     'rest_framework.authtoken',
-    'profiles',
+    'profiles.apps.ProfilesConfig',
     'timecapsule',
     'generator',
     'imagegen.apps.ImagegenConfig',
     'post.apps.PostConfig',
+    'mediastore.apps.MediastoreConfig',
     'metadata.apps.MetadataConfig',
     "corsheaders",
 
@@ -62,7 +63,7 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.TokenAuthentication",
+        "profiles.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
@@ -165,6 +166,120 @@ MEDIA_ROOT = BASE_DIR / 'media'
 PUBLIC_URL = '/public/'
 PUBLIC_ROOT = BASE_DIR / 'public'
 
+# Notifications - unread like/comment notifications on the same post touched
+# within this many seconds are collapsed into one "N people liked" entry
+NOTIFICATION_AGGREGATION_SECONDS = 60 * 60
+
+# Likes - optional write-behind buffering for bursty like traffic. Toggles are
+# kept in memory plus an append-only spill file and written in batches
+POST_LIKE_WRITE_BEHIND = False
+POST_LIKE_FLUSH_INTERVAL = 2.0  # seconds
+POST_LIKE_SPILL_DIR = BASE_DIR / 'like_buffer'
+
+# Post views - counted in memory, deduplicated per viewer with a small LRU and
+# flushed to Post.views / PostDailyStats every POST_VIEW_FLUSH_INTERVAL seconds
+POST_VIEW_FLUSH_INTERVAL = 10.0  # seconds
+POST_VIEW_DEDUPE_SIZE = 10000
+
+# Profiles - lifetime of cached public profile data (seconds), kept in the
+# PROFILE_CACHE_ALIAS cache, which must be shared between processes
+PROFILE_CACHE_TIMEOUT = 60
+PROFILE_CACHE_ALIAS = 'shared'
+
+# Caches - 'default' is per process. Anything that is invalidated on writes
+# (revoked tokens, deactivated users, edited profiles) must live in a cache every worker sees:
+# 'shared' is file based, which covers workers on one host; point it at Redis
+# (django.core.cache.backends.redis.RedisCache) when running on several hosts
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'shared_cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Auth - lifetime of cached token -> user lookups (seconds), kept in the
+# AUTH_TOKEN_CACHE_ALIAS cache, which must be shared between processes
+AUTH_TOKEN_CACHE_TIMEOUT = 300
+AUTH_TOKEN_CACHE_ALIAS = 'shared'
+
+# Home timeline - new posts are copied into each follower's timeline unless the
+# uploader has at least this many followers; those posts are merged in at read
+# time instead. Following someone (or an uploader dropping back below the
+# threshold, for all their followers) backfills their latest TIMELINE_BACKFILL_POSTS
+TIMELINE_FANOUT_MAX_FOLLOWERS = 5000
+TIMELINE_BACKFILL_POSTS = 50
+
+# Autocomplete - the in-process tag/topic/username index is patched by signals
+# and rebuilt in the background once older than this many seconds, to pick up
+# writes from other processes and from bulk operations
+AUTOCOMPLETE_REBUILD_INTERVAL = 600
+
+# Resumable uploads - partial files live in UPLOAD_SESSION_DIR (not publicly
+# served) until finalized; unfinished sessions expire after UPLOAD_SESSION_TTL
+UPLOAD_SESSION_DIR = BASE_DIR / 'upload_sessions'
+UPLOAD_SESSION_TTL = 24 * 60 * 60  # seconds
+UPLOAD_CHUNK_MAX_SIZE = 16 * 1024 * 1024  # bytes per PATCH
+UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024  # bytes per file
+# prune_upload_sessions also deletes <tree>/.incoming/*.part files untouched
+# for this long, left by uploads whose request or process died mid-write
+UPLOAD_INCOMING_MAX_AGE = 6 * 60 * 60  # seconds
+
+# Media processing - metadata/year extraction and derivatives run after the
+# post is created, on a thread pool in the web process, or only in
+# `manage.py process_media --loop` workers when POST_PROCESSING_IN_PROCESS is off
+POST_PROCESSING_IN_PROCESS = True
+POST_PROCESSING_WORKERS = 2
+POST_PROCESSING_STALE_SECONDS = 15 * 60  # reclaim runs that died mid-way
+
+# Thumbnails - written by the processing pipeline to PUBLIC_ROOT/thumbs as WebP
+# and JPEG at each width; thumb_url points at the default width. Video poster
+# frames need ffmpeg on PATH (videos are left without a thumbnail otherwise)
+POST_THUMBNAIL_WIDTHS = (320, 640)
+POST_THUMBNAIL_DEFAULT_WIDTH = 640
+FFMPEG_BINARY = 'ffmpeg'
+
+# HLS transcoding - processing only queues video posts; `manage.py
+# transcode_videos --loop` workers (never web processes) write renditions to
+# PUBLIC_ROOT/hls. Renditions taller than the source are skipped
+HLS_TRANSCODING = True
+HLS_RENDITIONS = (
+    # (name, height, video kbit/s, audio kbit/s)
+    ('360p', 360, 800, 96),
+    ('720p', 720, 2800, 128),
+    ('1080p', 1080, 5000, 160),
+)
+HLS_TRANSCODE_TIMEOUT = 60 * 60  # seconds per rendition
+
+# On-demand resizing (/media-resize/<path>?w=&fmt=) - only these widths are
+# rendered, so the cache can't be filled with arbitrary sizes; least recently
+# used variants are evicted once the cache exceeds MEDIA_RESIZE_CACHE_MAX_BYTES
+MEDIA_RESIZE_WIDTHS = (160, 320, 480, 640, 960, 1280, 1920)
+MEDIA_RESIZE_CACHE_DIR = BASE_DIR / 'resize_cache'
+MEDIA_RESIZE_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+MEDIA_RESIZE_MAX_AGE = 24 * 60 * 60  # Cache-Control max-age, seconds
+
+# Batch uploads (api/post/create/batch/) - files per request; Django's own
+# DATA_UPLOAD_MAX_NUMBER_FILES (default 100) caps the multipart body first
+BATCH_UPLOAD_MAX_FILES = 50
+
+# Media serving (mediastore.serving, for MEDIA_URL, PUBLIC_URL and resized
+# images) - Python checks ETag/If-Modified-Since and hands the transfer to the
+# web server: 'nginx' sends X-Accel-Redirect to MEDIA_SENDFILE_ROOTS' internal
+# locations, 'xsendfile' sends X-Sendfile (Apache/lighttpd); None streams the
+# file from Python, with Range support
+MEDIA_SENDFILE_BACKEND = None
+MEDIA_SENDFILE_ROOTS = {
+    # filesystem root: nginx `internal` location serving it
+    PUBLIC_ROOT: '/_protected/public/',
+    MEDIA_ROOT: '/_protected/media/',
+    MEDIA_RESIZE_CACHE_DIR: '/_protected/resize/',
+}
+MEDIA_SERVE_MAX_AGE = 60 * 60  # Cache-Control max-age for files not named by hash
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -1,7 +1,9 @@
 from django.contrib import admin
-from django.urls import path, include
+import re
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from mediastore.serving import serve_media
+from mediastore.views import ResizedImageView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -12,8 +14,15 @@ urlpatterns = [
     path("api/imagegen/", include("imagegen.urls")),
     path("api/post/", include("post.urls")),
     path("api/metadata/", include("metadata.urls")),
+    path("api/media/", include("mediastore.urls")),
+
+    # Resized variants of public images, cached on disk
+    path("media-resize/<path:path>", ResizedImageView.as_view(), name="media-resize"),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.PUBLIC_URL, document_root=settings.PUBLIC_ROOT)
+# Uploaded and public media, in every environment (see mediastore.serving;
+# set MEDIA_SENDFILE_BACKEND in production so the web server sends the bytes)
+urlpatterns += [
+    re_path(rf"^{re.escape(settings.MEDIA_URL.lstrip('/'))}(?P<path>.*)$", serve_media, {"document_root": settings.MEDIA_ROOT}),
+    re_path(rf"^{re.escape(settings.PUBLIC_URL.lstrip('/'))}(?P<path>.*)$", serve_media, {"document_root": settings.PUBLIC_ROOT}),
+]
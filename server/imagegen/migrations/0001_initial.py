@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('post', '0013_post_media_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeneratedImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('folder_id', models.CharField(db_index=True, max_length=32)),
+                ('filename', models.CharField(max_length=255)),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='generated_image', to='post.post')),
+            ],
+        ),
+    ]
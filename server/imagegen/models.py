@@ -0,0 +1,17 @@
+from django.db import models
+from post.models import Post
+
+
+class GeneratedImage(models.Model):
+    """
+    Which generation request (folder) a generated image post came from
+
+    Generated images are stored by content hash, so the folder no longer
+    shows up in the post URL; SelectGeneratedImageView looks it up here.
+    """
+    folder_id = models.CharField(max_length=32, db_index=True)
+    filename = models.CharField(max_length=255)
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, related_name='generated_image')
+
+    def __str__(self):
+        return f"{self.folder_id}/{self.filename}"
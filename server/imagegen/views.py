@@ -7,8 +7,14 @@ import uuid
 from django.conf import settings
 from .serializers import GenerateImageSerializer
 from . import grok_service
-from post.models import Post, Tahun
+from post.models import Post
+from post.post_service import create_post
+from post.stats_service import record_posts_deleted
+from post.tag_service import atomic_with_cached_ids
 from django.contrib.auth.models import User
+from django.db.models import Count, Q
+from mediastore.blobs import ingest_file
+from .models import GeneratedImage
 
 
 
@@ -26,15 +32,20 @@ class GenerateImageView(APIView):
         "description": "Generated image"
     }
     
+    Images are stored by content hash under /public/generated/; pass
+    folder_id and a filename to SelectGeneratedImageView to keep one.
+
     Response:
     {
         "success": true,
         "prompt": "A futuristic city at sunset",
+        "folder_id": "abc12345",
         "images": [
             {
                 "filename": "image_1.png",
+                "folder_id": "abc12345",
                 "base64": "iVBORw0KGgoAAAANS...",
-                "url": "/public/generated/image/...",
+                "url": "/public/generated/<aa>/<bb>/<sha256>.png",
                 "post_id": 24
             }
         ],
@@ -112,51 +123,53 @@ class GenerateImageView(APIView):
                 
                 image_files.sort()
                 
-                # Get or create tahun object if year provided
-                tahun_obj = None
-                if year:
-                    tahun_obj, _ = Tahun.objects.get_or_create(tahun=year)
-                
-                # Get uploader user if uploader_id provided
-                uploader = None
-                if uploader_id:
-                    try:
-                        uploader = User.objects.get(id=uploader_id)
-                    except User.DoesNotExist:
-                        pass
+                # Posts are only made with a year or a known uploader
+                uploader_known = bool(uploader_id) and User.objects.filter(id=uploader_id).exists()
                 
                 for img_file in image_files:
                     filepath = os.path.join(output_dir, img_file)
                     
-                    # Build public URL (relative to PUBLIC_ROOT)
-                    public_url = f"/public/generated/image/{request_id}/{img_file}"
+                    # Include base64 if requested (read before the file is moved)
+                    img_base64 = None
+                    if return_base64:
+                        with open(filepath, 'rb') as f:
+                            img_data = f.read()
+                            img_base64 = base64.b64encode(img_data).decode('utf-8')
+                    
+                    # Move into the content-addressed store; repeats reuse the file
+                    media_blob, _ = ingest_file(filepath, 'generated')
+                    public_url = media_blob.url
                     
                     img_response = {
                         "filename": img_file,
-                        "filepath": os.path.abspath(filepath),
+                        "folder_id": request_id,
+                        "filepath": media_blob.path,
                         "url": public_url
                     }
-                    
-                    # Include base64 if requested (default: true)
-                    if return_base64:
-                        with open(filepath, 'rb') as f:
-                            img_data = f.read()
-                            img_response['base64'] = base64.b64encode(img_data).decode('utf-8')
+                    if img_base64 is not None:
+                        img_response['base64'] = img_base64
                     
                     # Create post in database if year or uploader provided
-                    if tahun_obj or uploader:
-                        post = Post.objects.create(
-                            url=public_url,
-                            media_type='photo',
-                            description=description or prompt,
-                            thumb_url='',
-                            tahun=tahun_obj,
-                            uploader=uploader
-                        )
+                    if year or uploader_known:
+                        with atomic_with_cached_ids():
+                            post = create_post(
+                                url=public_url,
+                                media_type='photo',
+                                description=description or prompt,
+                                tahun=year,
+                                uploader_id=uploader_id,
+                                media_blob=media_blob
+                            )
+                            GeneratedImage.objects.create(folder_id=request_id, filename=img_file, post=post)
                         img_response['post_id'] = post.id
                         print(f"📝 Post created: ID {post.id} for {img_file}")
                     
                     response_images.append(img_response)
+                
+                try:
+                    os.rmdir(output_dir)
+                except OSError:
+                    pass  # Other files (debug screenshots) left behind
             
             print(f"\n✅ API Success: {len(response_images)} images generated\n")
             
@@ -165,8 +178,8 @@ class GenerateImageView(APIView):
                 "prompt": prompt,
                 "images": response_images,
                 "count": len(response_images),
-                "output_dir": os.path.abspath(output_dir),
-                "public_url": f"/public/generated/image/{request_id}/"
+                "folder_id": request_id,
+                "output_dir": os.path.abspath(output_dir)
             })
             
         except Exception as e:
@@ -197,7 +210,8 @@ class SelectGeneratedImageView(APIView):
     POST endpoint for selecting one image from generated set and deleting others
     
     Keeps only the selected image in the database and removes others.
-    Image files are NOT deleted from filesystem.
+    Image files are NOT deleted from filesystem; unreferenced ones are
+    pruned later, and picking an image whose file is gone returns 410.
     
     Request body:
     {
@@ -210,7 +224,7 @@ class SelectGeneratedImageView(APIView):
         "success": true,
         "kept_image": {
             "filename": "image_1.png",
-            "url": "/public/generated/image/abc12345/image_1.png",
+            "url": "/public/generated/<aa>/<bb>/<sha256>.png",
             "post_id": 24
         },
         "deleted_count": 3,
@@ -233,17 +247,20 @@ class SelectGeneratedImageView(APIView):
             
             print(f"\n🎯 Selecting image: {pick} from folder {folder_id}")
             
-            # Build the URL pattern for the selected image
-            selected_url = f"/public/generated/image/{folder_id}/{pick}"
-            
-            # Find all posts from this folder
+            # Find all posts from this folder: recorded in GeneratedImage since
+            # images are stored by hash, by URL prefix for older generations
             folder_url_prefix = f"/public/generated/image/{folder_id}/"
-            all_posts = Post.objects.filter(url__startswith=folder_url_prefix)
+            all_posts = Post.objects.filter(
+                Q(generated_image__folder_id=folder_id) | Q(url__startswith=folder_url_prefix)
+            )
             
             print(f"📊 Found {all_posts.count()} total images in folder")
             
             # Find the post we want to keep
-            kept_post = all_posts.filter(url=selected_url).first()
+            kept_post = all_posts.filter(
+                Q(generated_image__folder_id=folder_id, generated_image__filename=pick)
+                | Q(url=f"{folder_url_prefix}{pick}")
+            ).first()
             
             if not kept_post:
                 return Response({
@@ -251,6 +268,15 @@ class SelectGeneratedImageView(APIView):
                     "error": f"Image not found: {pick} in folder {folder_id}"
                 }, status=status.HTTP_404_NOT_FOUND)
             
+            # Unreferenced generated blobs are pruned after a week
+            # (prune_media_blobs), so the picked image may be gone
+            kept_path = os.path.join(settings.PUBLIC_ROOT, kept_post.url[len(settings.PUBLIC_URL):])
+            if not kept_post.url.startswith(settings.PUBLIC_URL) or not os.path.exists(kept_path):
+                return Response({
+                    "success": False,
+                    "error": f"Image {pick} in folder {folder_id} is no longer available"
+                }, status=status.HTTP_410_GONE)
+
             print(f"✓ Found kept post: ID {kept_post.id}")
             
             # Get all posts to delete (everything except the kept one)
@@ -261,7 +287,14 @@ class SelectGeneratedImageView(APIView):
             print(f"🗑️  Deleting {deleted_count} posts: {deleted_post_ids}")
             
             # Delete the other posts (but keep files in filesystem)
+            uploader_counts = list(
+                posts_to_delete.filter(uploader__isnull=False)
+                .values('uploader_id')
+                .annotate(n=Count('id'))
+            )
             posts_to_delete.delete()
+            for row in uploader_counts:
+                record_posts_deleted(row['uploader_id'], row['n'])
             
             print(f"✓ Deleted {deleted_count} posts from database")
             
@@ -269,7 +302,7 @@ class SelectGeneratedImageView(APIView):
                 "success": True,
                 "kept_image": {
                     "filename": pick,
-                    "url": selected_url,
+                    "url": kept_post.url,
                     "post_id": kept_post.id
                 },
                 "deleted_count": deleted_count,
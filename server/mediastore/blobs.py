@@ -0,0 +1,251 @@
+import hashlib
+import os
+import re
+import shutil
+import time
+import uuid
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from mediastore.models import MediaBlob
+
+# Top-level PUBLIC_ROOT directories that hold blobs
+TREES = ('upload', 'scrape', 'generated')
+
+CHUNK_SIZE = 1024 * 1024
+
+# The only media accepted into the store; mediastore.serving shows these
+# inline, so anything else (HTML, SVG, ...) must never be stored
+PHOTO_EXTENSIONS = ('jpg', 'jpeg', 'png', 'gif', 'webp', 'bmp', 'tiff', 'heic')
+VIDEO_EXTENSIONS = ('mp4', 'avi', 'mov', 'mkv', 'webm', 'flv', 'wmv', 'm4v', '3gp')
+
+
+class UnsupportedMediaType(ValueError):
+    pass
+
+
+def _clean_ext(ext):
+    """'.MP4' / 'mp4' -> '.mp4'; anything odd is dropped"""
+    ext = (ext or '').lower().lstrip('.')
+    return f".{ext}" if re.fullmatch(r'[a-z0-9]{1,5}', ext) else ''
+
+
+def _media_ext(ext):
+    """_clean_ext for a file being stored; raises UnsupportedMediaType for non-media"""
+    ext = _clean_ext(ext)
+    if ext[1:] not in PHOTO_EXTENSIONS + VIDEO_EXTENSIONS:
+        raise UnsupportedMediaType(f"Unsupported file type: {ext or 'no extension'}")
+    return ext
+
+
+def sharded_name(tree, key, suffix=''):
+    """
+    <tree>/<aa>/<bb>/<key><suffix>, relative to PUBLIC_ROOT
+
+    Two levels of 256 subdirectories keep every directory small however
+    many files a tree holds. aa/bb are the first hex digits of key when it
+    is a SHA-256, else of the SHA-256 of key (e.g. "post12").
+    """
+    digest = key if re.fullmatch(r'[0-9a-f]{64}', key) else hashlib.sha256(key.encode()).hexdigest()
+    return f"{tree}/{digest[:2]}/{digest[2:4]}/{key}{suffix}"
+
+
+def blob_name(tree, sha256, ext):
+    """Path of a blob relative to PUBLIC_ROOT: <tree>/<aa>/<bb>/<sha256><ext>"""
+    return sharded_name(tree, sha256, ext)
+
+
+def is_sharded(name):
+    """Whether a blob name already uses the blob_name layout"""
+    return bool(re.fullmatch(r'[a-z]+/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}(\.[a-z0-9]+)?', name))
+
+
+def _incoming_dir(tree):
+    # Same filesystem as the final location, so committing is a rename
+    path = os.path.join(settings.PUBLIC_ROOT, tree, '.incoming')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def prune_incoming(max_age):
+    """
+    Delete .part files left in the trees' .incoming dirs by a process that
+    died mid-write
+
+    Args:
+        max_age: Seconds a file must be untouched for; longer than any
+            upload or ingest takes. Measured from the inode change time,
+            which writes and stage_file's hard link both update
+
+    Returns:
+        int number of files removed
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    for tree in TREES:
+        incoming = os.path.join(settings.PUBLIC_ROOT, tree, '.incoming')
+        if not os.path.isdir(incoming):
+            continue
+        for entry in os.scandir(incoming):
+            try:
+                if entry.name.endswith('.part') and entry.stat().st_ctime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass  # Stored or removed meanwhile
+    return removed
+
+
+def _commit(tmp_path, sha256, size, tree, ext):
+    """Move a fully written and hashed file into place, or drop it as a duplicate"""
+    blob = MediaBlob.objects.filter(sha256=sha256).first()
+    if blob and os.path.exists(blob.path):
+        os.remove(tmp_path)
+        return blob, False
+
+    # Blobs stored before sharding keep their name until shard_media moves them
+    name = blob.name if blob else blob_name(tree, sha256, ext)
+    final_path = os.path.join(settings.PUBLIC_ROOT, name)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    # A rename on the same filesystem; a copy for upload sessions kept elsewhere
+    shutil.move(tmp_path, final_path)
+
+    if blob:
+        # Row outlived its file (manual cleanup); the upload restores it
+        return blob, False
+
+    try:
+        # Savepoint, so the failed INSERT doesn't break a caller's transaction
+        with transaction.atomic():
+            return MediaBlob.objects.create(sha256=sha256, name=name, size=size), True
+    except IntegrityError:
+        # A concurrent ingest of the same content won
+        blob = MediaBlob.objects.get(sha256=sha256)
+        if blob.name != name:
+            os.remove(final_path)
+        return blob, False
+
+
+def ingest_chunks(chunks, tree, ext=''):
+    """
+    Store streamed media by content hash, hashing while writing
+
+    Args:
+        chunks: Iterable of bytes (e.g. UploadedFile.chunks())
+        tree: One of TREES; where a new blob is placed
+        ext: Original file extension, kept on new blobs for content types
+
+    Returns:
+        tuple (MediaBlob, created) - created is False for duplicates,
+        whose bytes are discarded in favour of the existing blob
+
+    Raises:
+        UnsupportedMediaType: If ext is not a photo or video extension
+    """
+    ext = _media_ext(ext)
+    tmp_path = os.path.join(_incoming_dir(tree), f"{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in chunks:
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        return _commit(tmp_path, digest.hexdigest(), size, tree, ext)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ChecksumMismatch(ValueError):
+    pass
+
+
+def hash_file(path):
+    """(sha256 hex digest, size) of a file, read in CHUNK_SIZE pieces"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def ingest_file(path, tree, ext=None, expected_sha256=None):
+    """
+    Store a file already on disk (downloads, generated images, finished
+    upload sessions) by content hash
+
+    The file is moved into the blob store, or deleted if an identical blob
+    exists.
+
+    Args:
+        expected_sha256: If given, the file is left in place and
+            ChecksumMismatch raised when its hash differs
+
+    Returns:
+        tuple (MediaBlob, created)
+
+    Raises:
+        UnsupportedMediaType: If the extension is not a photo or video one
+            (the file is left in place)
+    """
+    if ext is None:
+        ext = os.path.splitext(path)[1]
+    ext = _media_ext(ext)
+    sha256, size = hash_file(path)
+    if expected_sha256 and sha256 != expected_sha256.lower():
+        raise ChecksumMismatch(f"SHA-256 mismatch: expected {expected_sha256.lower()}, got {sha256}")
+
+    return _commit(path, sha256, size, tree, ext)
+
+
+def stage_file(path, tree):
+    """
+    Second name for a file in <tree>/.incoming, for ingesting it while
+    the original stays put (a hard link, or a copy across filesystems)
+
+    Returns:
+        str path of the staged file; ingest it or remove it
+    """
+    staged = os.path.join(_incoming_dir(tree), f"{uuid.uuid4().hex}.part")
+    try:
+        os.link(path, staged)
+    except OSError:
+        shutil.copyfile(path, staged)
+    return staged
+
+
+def ingest_hashed_file(path, sha256, size, tree, ext=''):
+    """
+    Store a file whose hash was computed while it was written (see
+    mediastore.upload_handlers), without reading it again
+
+    Returns:
+        tuple (MediaBlob, created)
+
+    Raises:
+        UnsupportedMediaType: If ext is not a photo or video extension
+    """
+    return _commit(path, sha256, size, tree, _media_ext(ext))
+
+
+def find_blob(sha256):
+    """Existing blob for a content hash, or None"""
+    sha256 = (sha256 or '').lower()
+    if not re.fullmatch(r'[0-9a-f]{64}', sha256):
+        return None
+    blob = MediaBlob.objects.filter(sha256=sha256).first()
+    return blob if blob and os.path.exists(blob.path) else None
+
+
+def acquire(blob_id):
+    """Count one more reference (a post) to a blob"""
+    MediaBlob.objects.filter(sha256=blob_id).update(ref_count=F('ref_count') + 1)
+
+
+def release(blob_id):
+    """Drop a reference; the file stays until prune_media_blobs removes it"""
+    MediaBlob.objects.filter(sha256=blob_id, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
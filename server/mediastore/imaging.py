@@ -0,0 +1,62 @@
+from PIL import Image, ImageOps, features
+
+# (extension, Pillow format) - WebP first, JPEG for clients without WebP.
+# Shared by post thumbnails, profile picture/banner variants and the
+# media-resize endpoint, so they all make the same files
+IMAGE_FORMATS = (('webp', 'WEBP'), ('jpg', 'JPEG'))
+
+IMAGE_QUALITY = 82
+
+
+def image_formats():
+    """IMAGE_FORMATS this Pillow build can write"""
+    if features.check('webp'):
+        return IMAGE_FORMATS
+    return tuple(fmt for fmt in IMAGE_FORMATS if fmt[0] != 'webp')
+
+
+def load_image(fp, box):
+    """
+    Open an image for downscaling, upright and in RGB or RGBA
+
+    Lets the JPEG decoder downscale while decoding (draft) to no less than
+    box, so phone photos stay cheap, and applies the EXIF rotation. The
+    image is fully read, so fp may be closed afterwards.
+
+    Args:
+        fp: Path or binary file object
+        box: (width, height) the largest output needs
+    """
+    with Image.open(fp) as source:
+        source.draft('RGB', box)
+        img = ImageOps.exif_transpose(source)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if img.has_transparency_data else 'RGB')
+        img.load()
+    return img
+
+
+def shrink(img, size):
+    """
+    Copy of img scaled down to fit size, keeping the aspect ratio
+
+    Never enlarges. thumbnail() uses reduce() before resampling, which is
+    much faster than a plain LANCZOS resize of a big image.
+    """
+    img = img.copy()
+    img.thumbnail(size, Image.LANCZOS, reducing_gap=2.0)
+    return img
+
+
+def save_image(img, fp, pil_format):
+    """
+    Save in one of IMAGE_FORMATS at IMAGE_QUALITY
+
+    WebP keeps transparency; JPEG can't, so transparent pixels are
+    composited onto white instead of turning black.
+    """
+    if img.mode == 'RGBA' and pil_format != 'WEBP':
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        img = background
+    img.save(fp, pil_format, quality=IMAGE_QUALITY, optimize=True)
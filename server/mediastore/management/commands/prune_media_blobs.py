@@ -0,0 +1,68 @@
+import os
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from mediastore.models import MediaBlob
+from post.models import Post
+from post.thumbnails import remove_thumbnails
+from post.transcoding import remove_renditions
+
+
+class Command(BaseCommand):
+    help = 'Delete media blobs no post references any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=7,
+            help='Only delete blobs created at least this many days ago (default 7); '
+                 'generated images are served before any post references them'
+        )
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help='Recompute ref_count from Post references first'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List what would be deleted without deleting'
+        )
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            refs = (
+                Post.objects.filter(media_blob=OuterRef('pk'))
+                .order_by()
+                .values('media_blob')
+                .annotate(c=Count('id'))
+                .values('c')
+            )
+            MediaBlob.objects.update(ref_count=Coalesce(Subquery(refs), Value(0)))
+            self.stdout.write('✓ Reference counts recomputed')
+
+        cutoff = timezone.now() - timedelta(days=options['older_than'])
+        unreferenced = MediaBlob.objects.filter(ref_count=0, created_at__lt=cutoff)
+
+        deleted = 0
+        freed = 0
+        for blob in unreferenced.iterator():
+            if options['dry_run']:
+                self.stdout.write(f'Would delete {blob.name} ({blob.size} bytes)')
+                continue
+
+            # Re-check under the filter so a blob referenced meanwhile survives
+            if not MediaBlob.objects.filter(sha256=blob.sha256, ref_count=0).delete()[0]:
+                continue
+            if os.path.exists(blob.path):
+                os.remove(blob.path)
+            remove_thumbnails(blob.sha256)
+            remove_renditions(blob.sha256)
+            deleted += 1
+            freed += blob.size
+
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'✓ Deleted {deleted} blobs, freed {freed} bytes'))
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from mediastore.blobs import prune_incoming
+from mediastore.uploads import prune_expired_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete resumable upload sessions idle for longer than UPLOAD_SESSION_TTL, '
+        'and .incoming part files left behind by aborted uploads'
+    )
+
+    def handle(self, *args, **options):
+        removed = prune_expired_sessions()
+        parts = prune_incoming(getattr(settings, 'UPLOAD_INCOMING_MAX_AGE', 6 * 60 * 60))
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Removed {removed} upload sessions and {parts} incoming part files'))
@@ -0,0 +1,282 @@
+import os
+import re
+import shutil
+from functools import reduce
+from operator import or_
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat
+from imagegen.models import GeneratedImage
+from mediastore.blobs import TREES, _clean_ext, blob_name, hash_file, is_sharded, sharded_name
+from mediastore.models import MediaBlob
+from post.models import Post
+
+# Pre-blob generations lived in generated/image/<folder_id>/<filename>
+LEGACY_GENERATED_PREFIX = 'generated/image/'
+
+# Thumbnails (thumbs/<key>_<width>.<ext>) and HLS renditions (hls/<key>/)
+# were flat before they were sharded like blobs; keys are a blob sha256
+# or "post<id>", so a two character entry is already a shard directory
+FLAT_THUMB_URL = r'^{}thumbs/[^/]+$'
+FLAT_STREAM_URL = r'^{}hls/[^/]+/[^/]+$'
+
+
+def _link_or_copy(src, dst):
+    """Make dst a second name for src (a copy across filesystems)"""
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        pass
+    except OSError:
+        tmp = f"{dst}.part"
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+
+
+class Command(BaseCommand):
+    help = (
+        'Move public media, thumbnails and HLS renditions into the two-level hashed layout '
+        '(<tree>/<aa>/<bb>/<sha256>.<ext>) and rewrite Post URLs; safe to interrupt and run again'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Files moved per database transaction (default 500)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count what would be moved without changing anything'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        dry_run = options['dry_run']
+
+        self.stdout.write('Moving blobs...')
+        moved, missing = self.shard_blobs(batch_size, dry_run)
+        self.stdout.write(self.style.SUCCESS(f'✓ Blobs: {moved} moved, {missing} missing on disk'))
+
+        self.stdout.write('Moving files of posts from before the blob store...')
+        moved, missing = self.shard_legacy_posts(batch_size, dry_run)
+        self.stdout.write(self.style.SUCCESS(f'✓ Legacy files: {moved} moved, {missing} missing on disk'))
+
+        if not dry_run:
+            repaired = self.repair_post_urls(batch_size)
+            self.stdout.write(self.style.SUCCESS(f'✓ Post URLs repaired: {repaired}'))
+
+        self.stdout.write('Moving thumbnails and HLS renditions...')
+        thumbs, renditions = self.shard_derivatives(dry_run)
+        self.stdout.write(self.style.SUCCESS(f'✓ Thumbnails: {thumbs} moved, HLS renditions: {renditions} moved'))
+        if not dry_run:
+            rewritten = self.rewrite_derivative_urls(batch_size)
+            self.stdout.write(self.style.SUCCESS(f'✓ Thumbnail and stream URLs rewritten: {rewritten}'))
+
+    def shard_blobs(self, batch_size, dry_run):
+        """
+        Rename blobs in place, batch by batch
+
+        Each file is renamed before its batch commits, so after a crash the
+        next run finds it at the new path and only updates the rows.
+        """
+        moved = missing = 0
+        last_sha = ''
+        while True:
+            batch = list(MediaBlob.objects.filter(sha256__gt=last_sha).order_by('sha256')[:batch_size])
+            if not batch:
+                return moved, missing
+            last_sha = batch[-1].sha256
+
+            renamed = []
+            for blob in batch:
+                if is_sharded(blob.name):
+                    continue
+                tree = blob.name.split('/', 1)[0]
+                new_name = blob_name(tree if tree in TREES else 'upload', blob.sha256, os.path.splitext(blob.name)[1])
+                old_path = blob.path
+                new_path = os.path.join(settings.PUBLIC_ROOT, new_name)
+
+                if dry_run:
+                    moved += 1
+                    continue
+                if os.path.exists(old_path):
+                    os.makedirs(os.path.dirname(new_path), exist_ok=True)
+                    os.replace(old_path, new_path)
+                elif not os.path.exists(new_path):
+                    missing += 1
+                    continue
+                renamed.append((blob, new_name))
+
+            with transaction.atomic():
+                for blob, new_name in renamed:
+                    old_url = blob.url
+                    MediaBlob.objects.filter(sha256=blob.sha256).update(name=new_name)
+                    Post.objects.filter(media_blob_id=blob.sha256, url=old_url).update(
+                        url=f"{settings.PUBLIC_URL}{new_name}"
+                    )
+            moved += len(renamed)
+            if renamed:
+                self.stdout.write(f'  {moved} blobs moved')
+
+    def shard_legacy_posts(self, batch_size, dry_run):
+        """
+        Bring files of posts without a blob (uploads, scrapes and
+        generations from before the blob store) into it
+
+        A file is hard linked at its new path, the batch's rows are
+        committed, and only then is the old name removed. A crash before
+        the commit changes nothing the next run can't redo; one after it
+        at worst leaves an unreferenced legacy file behind.
+        """
+        moved = missing = 0
+        last_id = 0
+        in_trees = reduce(or_, (Q(url__startswith=f"{settings.PUBLIC_URL}{tree}/") for tree in TREES))
+        while True:
+            batch = list(
+                Post.objects.filter(id__gt=last_id, media_blob__isnull=True)
+                .filter(in_trees)
+                .order_by('id')
+                .values_list('id', 'url')[:batch_size]
+            )
+            if not batch:
+                return moved, missing
+            last_id = batch[-1][0]
+
+            prepared = []
+            for post_id, url in batch:
+                relative = url[len(settings.PUBLIC_URL):]
+                old_path = os.path.join(settings.PUBLIC_ROOT, relative)
+                if not os.path.isfile(old_path):
+                    missing += 1
+                    continue
+                if dry_run:
+                    moved += 1
+                    continue
+
+                sha256, size = hash_file(old_path)
+                existing = MediaBlob.objects.filter(sha256=sha256).first()
+                name = existing.name if existing else blob_name(
+                    relative.split('/', 1)[0], sha256, _clean_ext(os.path.splitext(old_path)[1])
+                )
+                if not existing:
+                    _link_or_copy(old_path, os.path.join(settings.PUBLIC_ROOT, name))
+                prepared.append((post_id, url, relative, old_path, sha256, size, name))
+
+            with transaction.atomic():
+                for post_id, url, relative, old_path, sha256, size, name in prepared:
+                    MediaBlob.objects.get_or_create(sha256=sha256, defaults={'name': name, 'size': size})
+                    MediaBlob.objects.filter(sha256=sha256).update(ref_count=F('ref_count') + 1)
+                    Post.objects.filter(id=post_id).update(url=f"{settings.PUBLIC_URL}{name}", media_blob_id=sha256)
+
+                    # Keeps SelectGeneratedImageView finding old generations
+                    if relative.startswith(LEGACY_GENERATED_PREFIX):
+                        parts = relative[len(LEGACY_GENERATED_PREFIX):].split('/')
+                        if len(parts) == 2:
+                            GeneratedImage.objects.get_or_create(
+                                post_id=post_id, defaults={'folder_id': parts[0], 'filename': parts[1]}
+                            )
+
+            for post_id, url, relative, old_path, *_ in prepared:
+                # Another post may still point at the same legacy file
+                if not Post.objects.filter(url=url).exists() and os.path.exists(old_path):
+                    os.remove(old_path)
+                    if relative.startswith(LEGACY_GENERATED_PREFIX):
+                        try:
+                            os.rmdir(os.path.dirname(old_path))
+                        except OSError:
+                            pass  # Other images of the generation are still there
+            moved += len(prepared)
+            if prepared:
+                self.stdout.write(f'  {moved} legacy files moved')
+
+    def repair_post_urls(self, batch_size):
+        """
+        Point posts at their blob's current name
+
+        Catches posts created from a blob while it was being moved.
+        """
+        repaired = 0
+        stale = Post.objects.filter(media_blob__isnull=False).exclude(
+            url=Concat(Value(settings.PUBLIC_URL), F('media_blob__name'))
+        )
+        while True:
+            batch = list(stale.values_list('id', 'media_blob__name')[:batch_size])
+            if not batch:
+                return repaired
+            with transaction.atomic():
+                for post_id, name in batch:
+                    Post.objects.filter(id=post_id).update(url=f"{settings.PUBLIC_URL}{name}")
+            repaired += len(batch)
+
+    def shard_derivatives(self, dry_run):
+        """
+        Move flat thumbs/<key>_<width>.<ext> files and hls/<key>/
+        directories to their sharded names
+
+        Files go first and URLs after (rewrite_derivative_urls), so an
+        interrupted run is finished by the next one.
+        """
+        thumbs = renditions = 0
+
+        thumbs_root = os.path.join(settings.PUBLIC_ROOT, 'thumbs')
+        if os.path.isdir(thumbs_root):
+            for entry in os.scandir(thumbs_root):
+                key, sep, rest = entry.name.rpartition('_')
+                if not entry.is_file() or not sep:
+                    continue
+                thumbs += 1
+                if not dry_run:
+                    new_path = os.path.join(settings.PUBLIC_ROOT, sharded_name('thumbs', key, f"_{rest}"))
+                    os.makedirs(os.path.dirname(new_path), exist_ok=True)
+                    os.replace(entry.path, new_path)
+
+        hls_root = os.path.join(settings.PUBLIC_ROOT, 'hls')
+        if os.path.isdir(hls_root):
+            for entry in os.scandir(hls_root):
+                if not entry.is_dir() or entry.name.startswith('.') or len(entry.name) == 2:
+                    continue
+                renditions += 1
+                if not dry_run:
+                    new_path = os.path.join(settings.PUBLIC_ROOT, sharded_name('hls', entry.name))
+                    os.makedirs(os.path.dirname(new_path), exist_ok=True)
+                    shutil.rmtree(new_path, ignore_errors=True)
+                    os.rename(entry.path, new_path)
+
+        return thumbs, renditions
+
+    def rewrite_derivative_urls(self, batch_size):
+        """Point Post.thumb_url and Post.stream_url at the sharded names"""
+        prefix = settings.PUBLIC_URL
+        flat_thumb = FLAT_THUMB_URL.format(re.escape(prefix))
+        flat_stream = FLAT_STREAM_URL.format(re.escape(prefix))
+        flat = Post.objects.filter(Q(thumb_url__regex=flat_thumb) | Q(stream_url__regex=flat_stream))
+
+        rewritten = 0
+        last_id = 0
+        while True:
+            batch = list(
+                flat.filter(id__gt=last_id).order_by('id').values_list('id', 'thumb_url', 'stream_url')[:batch_size]
+            )
+            if not batch:
+                return rewritten
+            last_id = batch[-1][0]
+
+            with transaction.atomic():
+                for post_id, thumb_url, stream_url in batch:
+                    fields = {}
+                    if re.match(flat_thumb, thumb_url or ''):
+                        key, sep, rest = thumb_url[len(f"{prefix}thumbs/"):].rpartition('_')
+                        if sep:
+                            fields['thumb_url'] = f"{prefix}{sharded_name('thumbs', key, f'_{rest}')}"
+                    if re.match(flat_stream, stream_url or ''):
+                        key, _, playlist = stream_url[len(f"{prefix}hls/"):].partition('/')
+                        fields['stream_url'] = f"{prefix}{sharded_name('hls', key)}/{playlist}"
+                    if fields:
+                        Post.objects.filter(id=post_id).update(**fields)
+                        rewritten += 1
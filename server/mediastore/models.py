@@ -0,0 +1,70 @@
+import os
+import uuid
+from django.conf import settings
+from django.db import models
+
+
+class MediaBlob(models.Model):
+    """
+    One stored media file, named by the SHA-256 of its content
+
+    Every post showing the same bytes points at the same blob; ref_count
+    tracks how many do (see mediastore.blobs). Unreferenced blobs are
+    removed by `manage.py prune_media_blobs`.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    # Path relative to PUBLIC_ROOT, e.g. "upload/9f/86/9f86d0....mp4"
+    # (mediastore.blobs.blob_name)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'created_at'], name='mediablob_unreferenced_idx'),
+        ]
+
+    @property
+    def url(self):
+        return f"{settings.PUBLIC_URL}{self.name}"
+
+    @property
+    def path(self):
+        return os.path.join(settings.PUBLIC_ROOT, self.name)
+
+    def __str__(self):
+        return self.name
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload in progress (see mediastore.uploads)
+
+    Received bytes are appended to `<UPLOAD_SESSION_DIR>/<id>.part`; the
+    post fields are kept here until the upload is finalized into a post.
+    """
+    STATUS_CHOICES = [
+        ('open', 'open'),
+        ('complete', 'complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    # Optional SHA-256 of the whole file, checked on finalize
+    sha256 = models.CharField(max_length=64, blank=True)
+    # CreatePostView fields: description, media_type, thumb_url, tags, tahun, uploader
+    post_fields = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    post = models.ForeignKey('post.Post', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def part_path(self):
+        return os.path.join(settings.UPLOAD_SESSION_DIR, f"{self.id}.part")
+
+    def __str__(self):
+        return f"Upload {self.id} ({self.offset}/{self.size})"
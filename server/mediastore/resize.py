@@ -0,0 +1,189 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.http import Http404
+from .imaging import IMAGE_FORMATS, image_formats, load_image, save_image, shrink
+from .serving import resolve_path
+
+logger = logging.getLogger(__name__)
+
+# fmt query value ("webp", "jpeg") -> (file extension, Pillow format, content type)
+FORMATS = {fmt.lower(): (ext, fmt, f"image/{fmt.lower()}") for ext, fmt in IMAGE_FORMATS}
+
+RESIZABLE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp')
+
+# A hit refreshes the file's mtime (the LRU clock) at most this often
+TOUCH_INTERVAL_SECONDS = 60
+
+
+class ResizeError(ValueError):
+    """Bad width, format or source path"""
+
+
+def allowed_widths():
+    return tuple(getattr(settings, 'MEDIA_RESIZE_WIDTHS', (160, 320, 480, 640, 960, 1280, 1920)))
+
+
+def resolve_source(path):
+    """
+    Absolute path of a resizable image under PUBLIC_ROOT
+
+    Raises:
+        ResizeError: For paths outside PUBLIC_ROOT, hidden files (e.g.
+            unfinished uploads in .incoming) and non-image files
+        FileNotFoundError: If the file doesn't exist
+    """
+    if os.path.splitext(path)[1].lower() not in RESIZABLE_EXTENSIONS:
+        raise ResizeError("Only images can be resized")
+    try:
+        return resolve_path(settings.PUBLIC_ROOT, path)
+    except Http404 as e:
+        if str(e) == "File not found":
+            raise FileNotFoundError(path)
+        raise ResizeError(str(e))
+
+
+def _render(source, target, width, pil_format):
+    # Square draft box, so EXIF rotation can't leave the long side short
+    img = load_image(source, (width * 2, width * 2))
+    save_image(shrink(img, (width, img.height)), target, pil_format)
+
+
+class ResizeCache:
+    """
+    Sharded disk cache of resized images with size-bounded LRU eviction
+
+    Files live at <root>/<aa>/<bb>/<key>.<ext>, keyed by the source path,
+    its mtime and size, the width and the format, so a replaced original
+    never serves a stale variant. A file's mtime is its last use; once the
+    cache grows past max_bytes the least recently used files are deleted
+    down to 90% of it. The running total is kept per process and corrected
+    by each eviction scan, so several processes can share one directory;
+    it starts from 0 and the first miss runs a scan in the background to
+    learn the real size, so no request waits for a walk of the cache.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = str(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._total = 0
+        self._scanned = False
+
+    def _key(self, source, width, ext):
+        stat = os.stat(source)
+        raw = f"{source}|{stat.st_mtime_ns}|{stat.st_size}|{width}|{ext}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def path_for(self, source, width, fmt):
+        """Cached variant's path (which may not exist yet)"""
+        ext = FORMATS[fmt][0]
+        key = self._key(source, width, ext)
+        return os.path.join(self.root, key[:2], key[2:4], f"{key}.{ext}")
+
+    def get_or_create(self, source, width, fmt):
+        """
+        Path of the resized variant, rendering it on a miss
+
+        Returns:
+            tuple (path, created)
+        """
+        if width not in allowed_widths():
+            raise ResizeError(f"w must be one of {', '.join(map(str, allowed_widths()))}")
+        if fmt not in FORMATS or FORMATS[fmt][0] not in dict(image_formats()):
+            raise ResizeError(f"fmt must be one of {', '.join(FORMATS)}")
+
+        path = self.path_for(source, width, fmt)
+        try:
+            mtime = os.stat(path).st_mtime
+            if time.time() - mtime > TOUCH_INTERVAL_SECONDS:
+                os.utime(path)
+            return path, False
+        except FileNotFoundError:
+            pass
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Concurrent misses render separately; the last rename wins
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            _render(source, tmp_path, width, FORMATS[fmt][1])
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._added(os.path.getsize(path))
+        return path, True
+
+    def _added(self, size):
+        with self._lock:
+            self._total += size
+            needs_scan = not self._scanned or self._total > self.max_bytes
+            self._scanned = True
+        if needs_scan:
+            threading.Thread(target=self.evict, daemon=True).start()
+
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith('.tmp'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def evict(self):
+        """
+        Delete least recently used variants until the cache is under 90% of
+        max_bytes
+
+        Returns:
+            int bytes freed
+        """
+        if not self._evict_lock.acquire(blocking=False):
+            return 0  # another eviction is already running
+        try:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * 0.9)
+            freed = 0
+            for _, size, path in entries:
+                if total - freed <= target:
+                    break
+                try:
+                    os.remove(path)
+                    freed += size
+                except FileNotFoundError:
+                    pass
+            with self._lock:
+                self._total = total - freed
+            if freed:
+                logger.info(f"Resize cache: evicted {freed} bytes")
+            return freed
+        finally:
+            self._evict_lock.release()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_resize_cache():
+    """Process-wide ResizeCache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResizeCache(
+                    root=getattr(settings, 'MEDIA_RESIZE_CACHE_DIR', settings.BASE_DIR / 'resize_cache'),
+                    max_bytes=getattr(settings, 'MEDIA_RESIZE_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024)
+                )
+    return _cache
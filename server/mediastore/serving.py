@@ -0,0 +1,240 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+
+# The only files shown inline: media the app stores, and HLS renditions.
+# Anything else (HTML, SVG, ...) is sent as a download so it can't run
+# as a page on the app's own origin
+INLINE_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.bmp': 'image/bmp',
+    '.tiff': 'image/tiff',
+    '.heic': 'image/heic',
+    '.mp4': 'video/mp4',
+    '.m4v': 'video/x-m4v',
+    '.mov': 'video/quicktime',
+    '.mkv': 'video/x-matroska',
+    '.webm': 'video/webm',
+    '.avi': 'video/x-msvideo',
+    '.flv': 'video/x-flv',
+    '.wmv': 'video/x-ms-wmv',
+    '.3gp': 'video/3gpp',
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t',
+}
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# mediastore blobs are named by the SHA-256 of their content
+_BLOB_NAME = re.compile(r'^([0-9a-f]{64})\.[a-z0-9]+$')
+
+
+def resolve_path(root, path):
+    """
+    Absolute path of a file under root
+
+    Raises:
+        Http404: For paths escaping root, hidden files and directories
+            (e.g. unfinished uploads in .incoming), and missing files
+    """
+    root = os.path.realpath(root)
+    full_path = os.path.realpath(os.path.join(root, path))
+    if not full_path.startswith(root + os.sep):
+        raise Http404("Invalid path")
+    if any(part.startswith('.') for part in os.path.relpath(full_path, root).split(os.sep)):
+        raise Http404("Invalid path")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+    return full_path
+
+
+def _etag(full_path, stat):
+    match = _BLOB_NAME.match(os.path.basename(full_path))
+    if match:
+        # The content hash itself: the best strong validator
+        return f'"{match.group(1)}"'
+    # Changes whenever the file is replaced or rewritten
+    return f'"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _cache_control(full_path):
+    if _BLOB_NAME.match(os.path.basename(full_path)):
+        # A blob's content never changes under its name
+        return 'public, max-age=31536000, immutable'
+    return f"public, max-age={getattr(settings, 'MEDIA_SERVE_MAX_AGE', 60 * 60)}"
+
+
+def _etag_matches(header, etag, weak=False):
+    tags = [tag.strip() for tag in header.split(',')]
+    if '*' in tags:
+        return True
+    if weak:
+        tags = [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+    return etag in tags
+
+
+def _not_modified(request, etag, mtime):
+    """RFC 9110 section 13.2.2: If-None-Match wins over If-Modified-Since"""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        return _etag_matches(if_none_match, etag, weak=True)
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+def parse_range(header, size):
+    """
+    Byte range requested by a Range header
+
+    Only single ranges are honoured; multipart ranges are rare for media
+    and the full file is a valid answer to them.
+
+    Returns:
+        (start, end) inclusive, None to send the whole file, or 'invalid'
+        when no part of the range is inside the file (416)
+    """
+    match = re.fullmatch(r'\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*', header or '')
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return 'invalid'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        return 'invalid'
+    if end < start:
+        return None
+    return start, end
+
+
+def _range_applies(request, etag, mtime):
+    """If-Range: only send a part if the client's copy is still current"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    date = parse_http_date_safe(if_range)
+    return date is not None and int(mtime) == date
+
+
+def _internal_location(full_path):
+    """(backend, value) for X-Accel-Redirect / X-Sendfile, or None to stream from Python"""
+    backend = getattr(settings, 'MEDIA_SENDFILE_BACKEND', None)
+    if backend == 'xsendfile':
+        return 'X-Sendfile', full_path
+    if backend == 'nginx':
+        for root, prefix in getattr(settings, 'MEDIA_SENDFILE_ROOTS', {}).items():
+            root = os.path.realpath(root)
+            if full_path.startswith(root + os.sep):
+                relative = os.path.relpath(full_path, root).replace(os.sep, '/')
+                return 'X-Accel-Redirect', f"{prefix.rstrip('/')}/{quote(relative)}"
+    return None
+
+
+def _read_range(full_path, start, length):
+    with open(full_path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def file_response(request, full_path, content_type=None, cache_control=None):
+    """
+    Response for a file on disk with validators, conditional GETs and ranges
+
+    Answers 304 for If-None-Match / If-Modified-Since, 206 for a satisfiable
+    Range (honouring If-Range) and 416 otherwise. With MEDIA_SENDFILE_BACKEND
+    set, the body is left to the web server (nginx X-Accel-Redirect or
+    X-Sendfile, which handle ranges themselves) and Python only sends headers.
+
+    Without an explicit content_type, only INLINE_TYPES are served inline;
+    other files get Content-Disposition: attachment. Browsers are told not
+    to sniff either way.
+    """
+    stat = os.stat(full_path)
+    etag = _etag(full_path, stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': cache_control or _cache_control(full_path),
+        'Accept-Ranges': 'bytes',
+        'X-Content-Type-Options': 'nosniff',
+    }
+
+    if _not_modified(request, etag, stat.st_mtime):
+        response = HttpResponse(status=304)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    if content_type is None:
+        content_type = INLINE_TYPES.get(os.path.splitext(full_path)[1].lower())
+        if content_type is None:
+            content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+            headers['Content-Disposition'] = 'attachment'
+
+    internal = _internal_location(full_path)
+    if internal:
+        response = HttpResponse(content_type=content_type)
+        response[internal[0]] = internal[1]
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    size = stat.st_size
+    byte_range = None
+    if request.META.get('HTTP_RANGE') and _range_applies(request, etag, stat.st_mtime):
+        byte_range = parse_range(request.META['HTTP_RANGE'], size)
+
+    if byte_range == 'invalid':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type, status=206 if byte_range else 200)
+    else:
+        response = StreamingHttpResponse(
+            _read_range(full_path, start, length),
+            content_type=content_type,
+            status=206 if byte_range else 200
+        )
+    for name, value in headers.items():
+        response[name] = value
+    response['Content-Length'] = str(length)
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+def serve_media(request, path, document_root):
+    """
+    Serve a file from document_root (PUBLIC_ROOT / MEDIA_ROOT)
+
+    Replaces django.views.static.serve, which is for development only: this
+    one is meant for production, supports seeking in videos, and hands the
+    transfer to the web server when MEDIA_SENDFILE_BACKEND is configured.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    return file_response(request, resolve_path(document_root, path))
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from post.models import Post
+from .blobs import acquire, release
+
+
+@receiver(post_save, sender=Post)
+def reference_post_media(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.media_blob_id:
+        acquire(instance.media_blob_id)
+
+
+@receiver(post_delete, sender=Post)
+def dereference_post_media(sender, instance, **kwargs):
+    if instance.media_blob_id:
+        release(instance.media_blob_id)
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import uuid
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from .blobs import _incoming_dir
+
+
+class HashedUploadedFile(UploadedFile):
+    """Upload already on disk in the blob store's .incoming dir, with its SHA-256"""
+
+    def __init__(self, path, name, content_type, size, charset, content_type_extra=None):
+        super().__init__(open(path, 'rb'), name, content_type, size, charset, content_type_extra)
+        self.path = path
+        self.sha256 = None
+
+    def temporary_file_path(self):
+        return self.path
+
+    def discard(self):
+        """Remove the file if it was never committed to the store"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class HashingBlobUploadHandler(FileUploadHandler):
+    """
+    Stream each multipart file straight into <tree>/.incoming, hashing as
+    it arrives
+
+    Files land on the blob store's filesystem in one pass, so storing one
+    is a rename (mediastore.blobs.ingest_hashed_file) instead of a copy out
+    of Django's temp dir plus a second read to hash it. Callers must
+    ingest or discard() every file they get, and call remove_parts() once
+    the request is done: a parse that fails part way (too many files, a
+    body over the size limit) never hands over the files already written.
+    """
+
+    def __init__(self, request=None, tree='upload'):
+        super().__init__(request)
+        self.tree = tree
+        self.paths = []
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.path = os.path.join(_incoming_dir(self.tree), f"{uuid.uuid4().hex}.part")
+        self.paths.append(self.path)
+        self.digest = hashlib.sha256()
+        self.out = open(self.path, 'wb')
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        self.out.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.out.close()
+        uploaded = HashedUploadedFile(
+            self.path, self.file_name, self.content_type, file_size, self.charset, self.content_type_extra
+        )
+        uploaded.sha256 = self.digest.hexdigest()
+        return uploaded
+
+    def upload_interrupted(self):
+        if hasattr(self, 'out'):
+            self.out.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def remove_parts(self):
+        """Delete every file this handler wrote that is still in .incoming"""
+        if hasattr(self, 'out'):
+            self.out.close()
+        for path in self.paths:
+            # Stored files were renamed out of .incoming already
+            if os.path.exists(path):
+                os.remove(path)
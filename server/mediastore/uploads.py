@@ -0,0 +1,212 @@
+import fcntl
+import hashlib
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from mediastore.models import UploadSession
+from post.post_service import create_post, detect_media_type
+from post.tag_service import atomic_with_cached_ids
+from .blobs import CHUNK_SIZE, ChecksumMismatch, UnsupportedMediaType, ingest_file, stage_file
+
+
+class OffsetMismatch(ValueError):
+    """The client's offset is not where the stored upload ends"""
+
+    def __init__(self, expected):
+        super().__init__(f"Upload-Offset must be {expected}")
+        self.expected = expected
+
+
+class UploadBusy(OffsetMismatch):
+    """Another request is still writing a chunk of the same upload"""
+
+    def __init__(self, expected):
+        super().__init__(expected)
+        self.args = (f"Another chunk is still being written; retry from offset {expected} once it finishes",)
+
+
+def create_session(filename, size, sha256='', post_fields=None):
+    """
+    Start a resumable upload
+
+    Args:
+        filename: Original file name (its extension picks the media type)
+        size: Total size in bytes
+        sha256: Optional hex SHA-256 of the whole file, checked on finalize
+        post_fields: CreatePostView fields for the post made on finalize
+
+    Raises:
+        ValueError: For a missing name, a file that isn't a photo or video,
+            or an out-of-range size
+    """
+    if not filename:
+        raise ValueError("filename is required")
+    if detect_media_type(os.path.splitext(filename)[1]) == 'none':
+        raise UnsupportedMediaType("Unsupported file type; upload a photo or video")
+    max_size = getattr(settings, 'UPLOAD_MAX_SIZE', 2 * 1024 * 1024 * 1024)
+    if size <= 0 or size > max_size:
+        raise ValueError(f"size must be between 1 and {max_size} bytes")
+
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    session = UploadSession.objects.create(
+        filename=os.path.basename(filename),
+        size=size,
+        sha256=(sha256 or '').lower(),
+        post_fields=post_fields or {}
+    )
+    open(session.part_path, 'wb').close()
+    return session
+
+
+def append_chunk(session, offset, stream, length, checksum=None):
+    """
+    Write the next chunk of an upload at `offset`
+
+    Bytes that arrive before a dropped connection are kept (unless a
+    checksum was given), so the client resumes from the returned offset.
+    The part file is locked while writing: a second request for the same
+    upload (e.g. a retry while the first is still streaming) gets
+    UploadBusy and writes nothing.
+
+    Args:
+        offset: Where the chunk starts; must equal the stored offset
+        stream: File-like request body
+        length: Content-Length of the chunk
+        checksum: Optional hex SHA-256 of the chunk
+
+    Returns:
+        int new offset
+
+    Raises:
+        OffsetMismatch: If offset isn't where the upload currently ends
+        UploadBusy: If another request is writing to the upload
+        ChecksumMismatch: If the chunk doesn't match checksum (nothing kept)
+        ValueError: If the chunk is too large or the session is finished
+    """
+    if session.status != 'open':
+        raise ValueError("Upload is already finalized")
+    if offset != session.offset:
+        raise OffsetMismatch(session.offset)
+    if length > getattr(settings, 'UPLOAD_CHUNK_MAX_SIZE', 16 * 1024 * 1024):
+        raise ValueError("Chunk is larger than UPLOAD_CHUNK_MAX_SIZE")
+    if offset + length > session.size:
+        raise ValueError(f"Chunk ends past the declared size of {session.size} bytes")
+
+    digest = hashlib.sha256()
+    received = 0
+    with open(session.part_path, 'r+b') as f:
+        # Held until the file is closed (or the process dies)
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadBusy(session.offset)
+
+        # A request that held the lock before us may have moved the offset
+        session.refresh_from_db(fields=['offset', 'status'])
+        if session.status != 'open':
+            raise ValueError("Upload is already finalized")
+        if offset != session.offset:
+            raise OffsetMismatch(session.offset)
+
+        f.seek(offset)
+        while received < length:
+            piece = stream.read(min(CHUNK_SIZE, length - received))
+            if not piece:
+                break
+            digest.update(piece)
+            f.write(piece)
+            received += len(piece)
+
+        if checksum and (received != length or digest.hexdigest() != checksum.lower()):
+            f.truncate(offset)
+            raise ChecksumMismatch("Chunk checksum mismatch; resend it")
+        f.truncate(offset + received)
+
+        # Still under the lock, so no other writer can start before it's stored
+        updated = UploadSession.objects.filter(id=session.id, offset=offset, status='open').update(
+            offset=offset + received,
+            updated_at=timezone.now()
+        )
+    if not updated:
+        raise OffsetMismatch(UploadSession.objects.get(id=session.id).offset)
+
+    session.offset = offset + received
+    return session.offset
+
+
+def finalize(session):
+    """
+    Turn a fully received upload into a post
+
+    The file goes through the content-addressed store like any upload and
+    the post is created with create_post, the same as CreatePostView.
+    Finalizing twice returns the same post.
+
+    Raises:
+        ValueError: If bytes are still missing
+        ChecksumMismatch: If the file doesn't match the session's sha256
+    """
+    with atomic_with_cached_ids():
+        session = UploadSession.objects.select_for_update().get(id=session.id)
+        if session.status == 'complete':
+            return session.post
+        if session.offset != session.size:
+            raise ValueError(f"Upload incomplete: {session.offset} of {session.size} bytes received")
+
+        ext = os.path.splitext(session.filename)[1]
+        # Ingest a second name for the part file and only drop the part file
+        # once the post is committed, so a failed finalize can be retried
+        staged_path = stage_file(session.part_path, 'upload')
+        try:
+            media_blob, _ = ingest_file(staged_path, 'upload', ext, expected_sha256=session.sha256 or None)
+        finally:
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+
+        fields = session.post_fields
+        media_type = fields.get('media_type') or 'none'
+        if media_type == 'none':
+            media_type = detect_media_type(ext)
+
+        post = create_post(
+            url=media_blob.url,
+            media_type=media_type,
+            description=fields.get('description', ''),
+            thumb_url=fields.get('thumb_url', ''),
+            tahun=fields.get('tahun'),
+            uploader_id=fields.get('uploader'),
+            tags=fields.get('tags', []),
+            media_blob=media_blob
+        )
+
+        session.status = 'complete'
+        session.post = post
+        session.save(update_fields=['status', 'post', 'updated_at'])
+        part_path = session.part_path
+        transaction.on_commit(lambda: os.path.exists(part_path) and os.remove(part_path))
+        return post
+
+
+def cancel(session):
+    """Delete an upload session and its partial file"""
+    if os.path.exists(session.part_path):
+        os.remove(session.part_path)
+    session.delete()
+
+
+def prune_expired_sessions():
+    """
+    Remove open sessions untouched for UPLOAD_SESSION_TTL seconds and
+    finished sessions of the same age
+
+    Returns:
+        int number of sessions removed
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'UPLOAD_SESSION_TTL', 24 * 60 * 60))
+    removed = 0
+    for session in UploadSession.objects.filter(updated_at__lt=cutoff).iterator():
+        cancel(session)
+        removed += 1
+    return removed
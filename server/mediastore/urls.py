@@ -0,0 +1,14 @@
+from django.urls import path
+from .views import BlobLookupView, UploadSessionCreateView, UploadSessionView, UploadSessionFinalizeView
+
+app_name = 'mediastore'
+
+urlpatterns = [
+    # Deduplication check before uploading
+    path('blobs/<str:sha256>/', BlobLookupView.as_view(), name='blob-lookup'),
+    
+    # Resumable uploads: create, PATCH chunks, finalize into a post
+    path('uploads/', UploadSessionCreateView.as_view(), name='upload-create'),
+    path('uploads/<uuid:upload_id>/', UploadSessionView.as_view(), name='upload-session'),
+    path('uploads/<uuid:upload_id>/finalize/', UploadSessionFinalizeView.as_view(), name='upload-finalize'),
+]
@@ -0,0 +1,414 @@
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from rest_framework.negotiation import BaseContentNegotiation
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from mediastore.models import UploadSession
+from post.serializers import PostDetailSerializer
+from .blobs import find_blob
+from .resize import FORMATS, ResizeError, get_resize_cache, resolve_source
+from .serving import file_response
+from .uploads import OffsetMismatch, append_chunk, cancel, create_session, finalize
+
+
+class BlobLookupView(APIView):
+    """
+    GET endpoint to check whether media with a given SHA-256 is already stored
+
+    Clients hash a file before uploading; if it exists they can create the
+    post with "media_sha256" instead of sending the bytes again.
+
+    URL: api/media/blobs/<sha256>/
+
+    Response:
+    {
+        "success": true,
+        "exists": true,
+        "sha256": "9f86d0...",
+        "url": "/public/upload/9f/86/9f86d0....mp4",
+        "size": 1048576
+    }
+    """
+    permission_classes = (AllowAny,)
+
+    def get(self, request, sha256):
+        """Look up a blob by content hash"""
+        try:
+            blob = find_blob(sha256)
+            if not blob:
+                return Response({
+                    "success": True,
+                    "exists": False,
+                    "sha256": sha256.lower()
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            return Response({
+                "success": True,
+                "exists": True,
+                "sha256": blob.sha256,
+                "url": blob.url,
+                "size": blob.size
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _session_data(session):
+    return {
+        "upload_id": str(session.id),
+        "filename": session.filename,
+        "size": session.size,
+        "offset": session.offset,
+        "status": session.status,
+        "post_id": session.post_id
+    }
+
+
+class UploadSessionCreateView(APIView):
+    """
+    POST endpoint to start a resumable upload
+
+    URL: api/media/uploads/
+
+    Request body (JSON):
+    {
+        "filename": "holiday.mp4",
+        "size": 314572800,
+        "sha256": "9f86d0...",        // optional, checked on finalize
+        "description": "...",         // optional post fields, as in CreatePostView
+        "media_type": "video",
+        "thumb_url": "",
+        "tags": ["beach"],
+        "tahun": 2019,
+        "uploader": 15
+    }
+
+    Then send the file with PATCH api/media/uploads/<upload_id>/ in chunks
+    and finish with POST api/media/uploads/<upload_id>/finalize/.
+
+    Response:
+    {
+        "success": true,
+        "upload_id": "6f1c...",
+        "filename": "holiday.mp4",
+        "size": 314572800,
+        "offset": 0,
+        "status": "open",
+        "post_id": null,
+        "chunk_max_size": 16777216
+    }
+    """
+    permission_classes = (AllowAny,)
+
+    def post(self, request):
+        """Create an upload session"""
+        try:
+            try:
+                size = int(request.data.get('size'))
+            except (ValueError, TypeError):
+                return Response({
+                    "success": False,
+                    "error": "size must be an integer"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            tags = request.data.get('tags') or []
+            if isinstance(tags, str):
+                tags = [tags]
+
+            post_fields = {
+                'description': request.data.get('description', ''),
+                'media_type': request.data.get('media_type', 'none'),
+                'thumb_url': request.data.get('thumb_url', ''),
+                'tags': tags,
+            }
+            for field in ('tahun', 'uploader'):
+                try:
+                    post_fields[field] = int(request.data.get(field)) if request.data.get(field) else None
+                except (ValueError, TypeError):
+                    post_fields[field] = None
+
+            try:
+                session = create_session(
+                    request.data.get('filename', ''),
+                    size,
+                    sha256=request.data.get('sha256', ''),
+                    post_fields=post_fields
+                )
+            except ValueError as e:
+                return Response({
+                    "success": False,
+                    "error": str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            return Response({
+                "success": True,
+                **_session_data(session),
+                "chunk_max_size": settings.UPLOAD_CHUNK_MAX_SIZE
+            }, status=status.HTTP_201_CREATED)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class UploadSessionView(APIView):
+    """
+    Endpoint for one resumable upload
+
+    URL: api/media/uploads/<upload_id>/
+
+    GET returns the session, including the offset to resume from.
+
+    PATCH appends a chunk. The raw bytes are the request body, with headers:
+    - Upload-Offset: Byte offset the chunk starts at (must equal "offset")
+    - Upload-Checksum: "sha256 <hex>" of the chunk (optional)
+    A wrong offset, or a PATCH while another one for the same upload is
+    still being written, gets 409 with the expected offset and nothing is
+    stored; a checksum mismatch gets 400 and nothing is stored. After a dropped connection, GET the
+    session and continue from its offset.
+
+    DELETE cancels the upload.
+
+    Response:
+    {
+        "success": true,
+        "upload_id": "6f1c...",
+        "filename": "holiday.mp4",
+        "size": 314572800,
+        "offset": 16777216,
+        "status": "open",
+        "post_id": null
+    }
+    """
+    permission_classes = (AllowAny,)
+
+    def _get_session(self, upload_id):
+        try:
+            return UploadSession.objects.get(id=upload_id)
+        except UploadSession.DoesNotExist:
+            return None
+
+    def get(self, request, upload_id):
+        """Get upload progress"""
+        session = self._get_session(upload_id)
+        if not session:
+            return Response({
+                "success": False,
+                "error": "Upload not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response({"success": True, **_session_data(session)}, status=status.HTTP_200_OK)
+
+    def patch(self, request, upload_id):
+        """Append a chunk"""
+        try:
+            session = self._get_session(upload_id)
+            if not session:
+                return Response({
+                    "success": False,
+                    "error": "Upload not found"
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            try:
+                offset = int(request.headers.get('Upload-Offset'))
+                length = int(request.headers.get('Content-Length') or 0)
+            except (ValueError, TypeError):
+                return Response({
+                    "success": False,
+                    "error": "Upload-Offset and Content-Length headers are required"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            checksum = None
+            checksum_header = request.headers.get('Upload-Checksum', '')
+            if checksum_header:
+                algorithm, _, checksum = checksum_header.partition(' ')
+                if algorithm.lower() != 'sha256' or not checksum:
+                    return Response({
+                        "success": False,
+                        "error": "Upload-Checksum must be 'sha256 <hex>'"
+                    }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                # Read the body as a stream; request.data would buffer it
+                append_chunk(session, offset, request._request, length, checksum=checksum)
+            except OffsetMismatch as e:
+                return Response({
+                    "success": False,
+                    "error": str(e),
+                    "offset": e.expected
+                }, status=status.HTTP_409_CONFLICT)
+            except ValueError as e:
+                # Includes ChecksumMismatch
+                return Response({
+                    "success": False,
+                    "error": str(e),
+                    "offset": session.offset
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            return Response({"success": True, **_session_data(session)}, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def delete(self, request, upload_id):
+        """Cancel an upload"""
+        session = self._get_session(upload_id)
+        if not session:
+            return Response({
+                "success": False,
+                "error": "Upload not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+        cancel(session)
+        return Response({"success": True, "message": "Upload cancelled"}, status=status.HTTP_200_OK)
+
+
+class UploadSessionFinalizeView(APIView):
+    """
+    POST endpoint to turn a completed upload into a post
+
+    URL: api/media/uploads/<upload_id>/finalize/
+
+    Runs the same post creation as CreatePostView. Calling it again after
+    success returns the same post.
+
+    Response:
+    {
+        "success": true,
+        "message": "Post created successfully",
+        "post": {...}
+    }
+    """
+    permission_classes = (AllowAny,)
+
+    def post(self, request, upload_id):
+        """Finalize an upload"""
+        try:
+            try:
+                session = UploadSession.objects.get(id=upload_id)
+            except UploadSession.DoesNotExist:
+                return Response({
+                    "success": False,
+                    "error": "Upload not found"
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            try:
+                post = finalize(session)
+            except ValueError as e:
+                # Includes ChecksumMismatch
+                return Response({
+                    "success": False,
+                    "error": str(e),
+                    "offset": session.offset
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            if post is None:
+                return Response({
+                    "success": False,
+                    "error": "The post for this upload was deleted"
+                }, status=status.HTTP_410_GONE)
+
+            return Response({
+                "success": True,
+                "message": "Post created successfully",
+                "post": PostDetailSerializer(post).data
+            }, status=status.HTTP_201_CREATED)
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class _IgnoreAcceptNegotiation(BaseContentNegotiation):
+    """Always answer errors as JSON; Accept only chooses the image format"""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
+
+
+class ResizedImageView(APIView):
+    """
+    GET endpoint serving a resized copy of an image under PUBLIC_ROOT
+
+    URL: media-resize/<path>?w=640&fmt=webp
+
+    <path> is relative to PUBLIC_URL, e.g. media-resize/upload/9f/86/9f86d0....jpg.
+    w must be one of MEDIA_RESIZE_WIDTHS (images are never enlarged); fmt
+    is "webp" or "jpeg", defaulting to WebP when the Accept header allows.
+    Variants are rendered on first request and served from the disk cache
+    (MEDIA_RESIZE_CACHE_DIR) afterwards; X-Resize-Cache says which. Served
+    like other media (mediastore.serving): ETags, 304s and sendfile offload.
+
+    Response: the image, or on error:
+    {
+        "success": false,
+        "error": "w must be one of 160, 320, 480, 640, 960, 1280, 1920"
+    }
+    """
+    permission_classes = (AllowAny,)
+    content_negotiation_class = _IgnoreAcceptNegotiation
+
+    def get(self, request, path):
+        """Serve a resized image"""
+        try:
+            try:
+                width = int(request.query_params.get('w', ''))
+            except ValueError:
+                return Response({
+                    "success": False,
+                    "error": "w must be an integer width"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            fmt = request.query_params.get('fmt')
+            negotiated = not fmt
+            if negotiated:
+                fmt = 'webp' if 'image/webp' in request.META.get('HTTP_ACCEPT', '') else 'jpeg'
+
+            try:
+                source = resolve_source(path)
+                cached_path, created = get_resize_cache().get_or_create(source, width, fmt.lower())
+            except ResizeError as e:
+                return Response({
+                    "success": False,
+                    "error": str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+            except FileNotFoundError:
+                return Response({
+                    "success": False,
+                    "error": "Image not found"
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            response = file_response(
+                request._request,
+                cached_path,
+                content_type=FORMATS[fmt.lower()][2],
+                cache_control=f"public, max-age={getattr(settings, 'MEDIA_RESIZE_MAX_AGE', 24 * 60 * 60)}"
+            )
+            response['X-Resize-Cache'] = 'MISS' if created else 'HIT'
+            if negotiated:
+                patch_vary_headers(response, ('Accept',))
+            return response
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PostConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'post'
+
+    def ready(self):
+        # Keeps the autocomplete index in post.autocomplete current
+        from . import signals  # noqa: F401
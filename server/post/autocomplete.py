@@ -0,0 +1,221 @@
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections
+from django.db.models import Count
+from post.models import Follow, SuggestedTopic, Tag
+
+logger = logging.getLogger(__name__)
+
+# Ranked results are memoized for prefixes matching more entries than this;
+# narrower prefixes are cheaper to rescan than to keep
+MEMO_MIN_MATCHES = 256
+
+
+def normalize(text):
+    """Case- and whitespace-insensitive form used for prefix matching"""
+    return ' '.join(text.split()).casefold()
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index with popularity weights
+
+    Entries are kept as a sorted list of (normalized key, ident) tuples, so
+    a prefix is a bisect plus a contiguous scan. Ranked results for broad
+    prefixes are memoized until an entry under that prefix changes, which
+    keeps "a" or "ja" from rescanning large ranges on every keystroke.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []        # sorted (key, ident)
+        self._items = {}       # ident -> (key, display, weight, payload)
+        self._memo = {}        # (prefix, limit) -> results
+
+    def replace_all(self, entries):
+        """Swap in a freshly built set of (ident, display, weight, payload) entries"""
+        items = {ident: (normalize(display), display, weight, payload) for ident, display, weight, payload in entries}
+        keys = sorted((item[0], ident) for ident, item in items.items())
+        with self._lock:
+            self._items = items
+            self._keys = keys
+            self._memo = {}
+
+    def upsert(self, ident, display, weight=None, payload=None):
+        """Add or rename an entry; weight is kept when not given"""
+        key = normalize(display)
+        with self._lock:
+            old = self._items.get(ident)
+            if weight is None:
+                weight = old[2] if old else 0
+            if old:
+                self._discard_key(old[0], ident)
+            insort(self._keys, (key, ident))
+            self._items[ident] = (key, display, weight, payload)
+            self._forget(key)
+
+    def add_weight(self, ident, delta):
+        """Adjust an entry's popularity; unknown idents are ignored"""
+        with self._lock:
+            old = self._items.get(ident)
+            if old:
+                key, display, weight, payload = old
+                self._items[ident] = (key, display, max(weight + delta, 0), payload)
+                self._forget(key)
+
+    def remove(self, ident):
+        with self._lock:
+            old = self._items.pop(ident, None)
+            if old:
+                self._discard_key(old[0], ident)
+
+    def search(self, prefix, limit=10):
+        """
+        Entries whose normalized text starts with prefix, most popular first
+
+        Returns:
+            list of (display, weight, payload)
+        """
+        prefix = normalize(prefix)
+        with self._lock:
+            memo_key = (prefix, limit)
+            results = self._memo.get(memo_key)
+            if results is None:
+                i = bisect_left(self._keys, (prefix,))
+                matches = []
+                while i < len(self._keys) and self._keys[i][0].startswith(prefix):
+                    matches.append(self._items[self._keys[i][1]])
+                    i += 1
+                best = heapq.nsmallest(limit, matches, key=lambda item: (-item[2], item[0]))
+                results = [(display, weight, payload) for _, display, weight, payload in best]
+                if len(matches) > MEMO_MIN_MATCHES:
+                    self._memo[memo_key] = results
+            return results
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, ident):
+        return ident in self._items
+
+    def _discard_key(self, key, ident):
+        i = bisect_left(self._keys, (key, ident))
+        if i < len(self._keys) and self._keys[i] == (key, ident):
+            del self._keys[i]
+        self._forget(key)
+
+    def _forget(self, key):
+        # Only memoized prefixes of the changed key can be affected
+        if self._memo:
+            self._memo = {
+                (prefix, limit): results for (prefix, limit), results in self._memo.items()
+                if not key.startswith(prefix)
+            }
+
+
+class Autocomplete:
+    """
+    Tag, suggested topic and username indexes for one process
+
+    Built from the database on first use and kept current by the signal
+    handlers in post.signals. Writes made by other processes or by bulk
+    operations that skip signals are picked up by a background rebuild once
+    the index is older than AUTOCOMPLETE_REBUILD_INTERVAL seconds.
+    """
+
+    KINDS = ('tags', 'topics', 'users')
+
+    def __init__(self, rebuild_interval):
+        self.rebuild_interval = rebuild_interval
+        self.tags = PrefixIndex()        # ident: tag id, weight: posts using it
+        self.topics = PrefixIndex()      # ident: normalized topic, weight: posts suggesting it
+        self.users = PrefixIndex()       # ident: user id, weight: followers
+        self._built_at = None
+        self._build_lock = threading.Lock()
+
+    def search(self, prefix, kinds=KINDS, limit=10):
+        """
+        Matches per kind for a prefix
+
+        Returns:
+            dict of kind -> list of (display, weight, payload)
+        """
+        self._ensure_fresh()
+        return {kind: getattr(self, kind).search(prefix, limit) for kind in kinds}
+
+    def rebuild(self):
+        """Reload all three indexes from the database"""
+        tag_weights = Counter(dict(
+            Tag.objects.annotate(n=Count('posttag')).values_list('id', 'n')
+        ))
+        self.tags.replace_all(
+            (tag_id, name, tag_weights[tag_id], None)
+            for tag_id, name in Tag.objects.values_list('id', 'tag_name')
+        )
+
+        topics = {}
+        for topic in SuggestedTopic.objects.values_list('topic', flat=True).iterator():
+            ident = normalize(topic)
+            if ident:
+                display, weight = topics.get(ident, (topic, 0))
+                topics[ident] = (display, weight + 1)
+        self.topics.replace_all(
+            (ident, display, weight, None) for ident, (display, weight) in topics.items()
+        )
+
+        follower_counts = Counter(dict(
+            Follow.objects.values('followee_id').annotate(n=Count('id')).values_list('followee_id', 'n')
+        ))
+        self.users.replace_all(
+            (user_id, username, follower_counts[user_id], {'id': user_id})
+            for user_id, username in User.objects.filter(is_active=True).values_list('id', 'username').iterator()
+        )
+
+        self._built_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        if self._built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self.rebuild()
+            return
+
+        if time.monotonic() - self._built_at > self.rebuild_interval and self._build_lock.acquire(blocking=False):
+            # Serve the current index while a fresh one is built
+            self._built_at = time.monotonic()
+            threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception as e:
+            logger.error(f"Autocomplete rebuild failed: {e}", exc_info=True)
+        finally:
+            close_old_connections()
+            self._build_lock.release()
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+
+_autocomplete = None
+_autocomplete_lock = threading.Lock()
+
+
+def get_autocomplete():
+    """Process-wide Autocomplete"""
+    global _autocomplete
+    if _autocomplete is None:
+        with _autocomplete_lock:
+            if _autocomplete is None:
+                _autocomplete = Autocomplete(
+                    rebuild_interval=getattr(settings, 'AUTOCOMPLETE_REBUILD_INTERVAL', 600)
+                )
+    return _autocomplete
@@ -15,8 +15,8 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = ['id', 'post', 'user', 'parent_comment', 'text', 'created_at', 'replies']
-        read_only_fields = ['id', 'created_at', 'user']
+        fields = ['id', 'post', 'user', 'parent_comment', 'text', 'likes_count', 'created_at', 'replies']
+        read_only_fields = ['id', 'created_at', 'user', 'likes_count']
 
     def get_replies(self, obj):
         # Get all child comments
@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from post.models import Comment
+from timecapsule.models import Profile
+
+
+def ingest_comments(post_id, comments_data, default_username='Anonymous', user_defaults=None):
+    """
+    Bulk-insert comments for a post, creating missing authors on the fly
+
+    Resolves every username with one query, bulk-creates the users that
+    don't exist yet (with their profiles) and bulk-creates the comments,
+    all in one transaction.
+    Used by GeneratePostContentView and the generate_post_content command,
+    and meant to be reused by any other comment importer.
+
+    Args:
+        post_id: ID of the post the comments belong to
+        comments_data: List of dicts with 'username' and 'comment' keys
+        default_username: Username used for entries without one
+        user_defaults: Optional callable(username) returning extra fields
+            for newly created users (e.g. {'email': ...})
+
+    Returns:
+        list of created Comment objects (entries with empty text are skipped)
+    """
+    entries = []
+    for comment_dict in comments_data or []:
+        if not isinstance(comment_dict, dict):
+            continue
+        username = comment_dict.get('username') or default_username
+        text = comment_dict.get('comment', '')
+        if text:
+            entries.append((username, text))
+
+    if not entries:
+        return []
+
+    usernames = {username for username, _ in entries}
+
+    with transaction.atomic():
+        user_ids = dict(
+            User.objects.filter(username__in=usernames).values_list('username', 'id')
+        )
+
+        missing = usernames - user_ids.keys()
+        if missing:
+            User.objects.bulk_create(
+                [
+                    User(username=username, **(user_defaults(username) if user_defaults else {}))
+                    for username in missing
+                ],
+                ignore_conflicts=True
+            )
+            # ignore_conflicts doesn't hand back primary keys, so re-read them
+            new_ids = dict(User.objects.filter(username__in=missing).values_list('username', 'id'))
+            user_ids.update(new_ids)
+
+            # bulk_create skips post_save, so create the profiles it would have
+            Profile.objects.bulk_create(
+                [Profile(user_id=user_id) for user_id in new_ids.values()],
+                ignore_conflicts=True
+            )
+
+        return Comment.objects.bulk_create([
+            Comment(post_id=post_id, user_id=user_ids.get(username), text=text)
+            for username, text in entries
+        ])
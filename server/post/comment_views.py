@@ -1,14 +1,21 @@
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
-from post.models import Comment, Post, SuggestedTopic
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from post.models import Comment, CommentLike, Post, SuggestedTopic
 from .comment_serializers import CommentSerializer, CommentCreateSerializer
+from .notification_service import notify
+from .stats_service import record_comments_received
 
 
 class CommentListView(APIView):
     """
     GET endpoint for listing all comments on a post
+
+    Query parameters:
+    - order: 'new' (default, newest first) or 'top' (most liked first)
     """
     permission_classes = (AllowAny,)
 
@@ -28,7 +35,12 @@ class CommentListView(APIView):
                 )
             
             # Get root comments (no parent)
-            comments = Comment.objects.filter(post=post, parent_comment__isnull=True).order_by('-created_at')
+            comments = Comment.objects.filter(post=post, parent_comment__isnull=True)
+            if request.query_params.get('order') == 'top':
+                # Reads the denormalized counter through comment_post_top_idx
+                comments = comments.order_by('-likes_count', '-id')
+            else:
+                comments = comments.order_by('-created_at')
             serializer = CommentSerializer(comments, many=True)
             
             return Response({
@@ -103,6 +115,15 @@ class CommentCreateView(APIView):
                 parent_comment=parent_comment,
                 text=text
             )
+
+            record_comments_received(post.uploader_id, 1)
+
+            # Uploader and parent comment author are notified in one batch
+            if comment.user_id:
+                events = [(post.uploader_id, comment.user_id, 'comment', post.id)]
+                if parent_comment and parent_comment.user_id != post.uploader_id:
+                    events.append((parent_comment.user_id, comment.user_id, 'reply', post.id))
+                notify(events)
             
             # Return comment details
             result_serializer = CommentSerializer(comment)
@@ -211,7 +232,9 @@ class CommentDetailView(APIView):
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            comment.delete()
+            # Replies go with it (CASCADE), so uncount all of them
+            _, deleted_per_model = comment.delete()
+            record_comments_received(post.uploader_id, -deleted_per_model.get('post.Comment', 0))
             
             return Response({
                 "success": True,
@@ -228,6 +251,74 @@ class CommentDetailView(APIView):
             )
 
 
+class CommentLikeView(APIView):
+    """
+    POST endpoint to toggle like on a comment
+
+    URL: api/post/<post_id>/comments/<comment_id>/like/
+
+    Response:
+    {
+        "success": true,
+        "action": "liked" or "unliked",
+        "comment_id": 1,
+        "likes_count": 3
+    }
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, post_id, comment_id):
+        """Toggle like on a comment"""
+        try:
+            with transaction.atomic():
+                # Lock the comment row so the counter stays in step with CommentLike
+                comment = (
+                    Comment.objects.select_for_update()
+                    .filter(id=comment_id, post_id=post_id)
+                    .only('id', 'likes_count')
+                    .first()
+                )
+                if comment is None:
+                    return Response(
+                        {
+                            "success": False,
+                            "error": "Comment not found"
+                        },
+                        status=status.HTTP_404_NOT_FOUND
+                    )
+
+                deleted, _ = CommentLike.objects.filter(user=request.user, comment_id=comment.id).delete()
+                if deleted:
+                    action = "unliked"
+                    delta = -1
+                else:
+                    action = "liked"
+                    delta = 1
+                    try:
+                        # Savepoint: a concurrent like from the same user may win the insert
+                        with transaction.atomic():
+                            CommentLike.objects.create(user=request.user, comment_id=comment.id)
+                    except IntegrityError:
+                        delta = 0  # Already liked
+
+                if delta:
+                    Comment.objects.filter(id=comment.id).update(likes_count=F('likes_count') + delta)
+
+            comment.refresh_from_db(fields=['likes_count'])
+            return Response({
+                "success": True,
+                "action": action,
+                "comment_id": comment.id,
+                "likes_count": max(comment.likes_count, 0)
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class SuggestedTopicsView(APIView):
     """
     GET endpoint for listing suggested topics on a post
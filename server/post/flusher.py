@@ -0,0 +1,53 @@
+import atexit
+import logging
+import threading
+import time
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlusher:
+    """
+    Base class for in-process write-behind buffers
+
+    Subclasses collect writes in memory and implement flush(). A daemon
+    thread is started on first use and calls flush() every `interval`
+    seconds; a final flush is attempted when the process exits.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def ensure_started(self):
+        """Start the background flush thread if it isn't running yet"""
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name=f"{type(self).__name__}-flusher",
+                    daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.safe_flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.safe_flush()
+
+    def safe_flush(self):
+        """flush() that logs instead of raising, for the background thread"""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"{type(self).__name__} flush failed: {e}", exc_info=True)
+        finally:
+            close_old_connections()
+
+    def flush(self):
+        raise NotImplementedError
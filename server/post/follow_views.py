@@ -0,0 +1,133 @@
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from post.models import Post, UserStats
+from .serializers import PostDetailSerializer
+from .timeline_service import follow, get_home_timeline, unfollow
+
+
+class FollowView(APIView):
+    """
+    POST/DELETE endpoint to follow or unfollow a user
+
+    URL: api/post/follow/<user_id>/
+
+    POST follows the user (their latest posts are added to your home
+    timeline), DELETE unfollows them. Both are idempotent.
+
+    Response:
+    {
+        "success": true,
+        "following": true,
+        "changed": true,
+        "followers_count": 12
+    }
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, user_id):
+        """Follow a user"""
+        return self._set_following(request, user_id, True)
+
+    def delete(self, request, user_id):
+        """Unfollow a user"""
+        return self._set_following(request, user_id, False)
+
+    def _set_following(self, request, user_id, following):
+        try:
+            try:
+                followee = User.objects.get(id=user_id)
+            except User.DoesNotExist:
+                return Response({
+                    "success": False,
+                    "error": f"User with ID {user_id} not found"
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            try:
+                if following:
+                    changed = follow(request.user.id, followee.id)
+                else:
+                    changed = unfollow(request.user.id, followee.id)
+            except ValueError as e:
+                return Response({
+                    "success": False,
+                    "error": str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            followers_count = (
+                UserStats.objects.filter(user_id=followee.id)
+                .values_list('followers_count', flat=True)
+                .first()
+            )
+            return Response({
+                "success": True,
+                "following": following,
+                "changed": changed,
+                "followers_count": followers_count or 0
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class HomeTimelineView(APIView):
+    """
+    GET endpoint for the current user's home timeline
+
+    Posts by the current user and the users they follow, newest first.
+
+    URL: api/post/timeline/
+
+    Query parameters:
+    - cursor: next_cursor from the previous page (omit for the first page)
+    - limit: Page size (default 20, max 100)
+
+    Response:
+    {
+        "success": true,
+        "count": 20,
+        "posts": [...],
+        "next_cursor": 118
+    }
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """Get a page of the home timeline"""
+        try:
+            try:
+                limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+            except (ValueError, TypeError):
+                limit = 20
+
+            cursor = request.query_params.get('cursor')
+            try:
+                cursor = int(cursor) if cursor else None
+            except (ValueError, TypeError):
+                return Response({
+                    "success": False,
+                    "error": "cursor must be an integer"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            post_ids, next_cursor = get_home_timeline(request.user.id, before=cursor, limit=limit)
+
+            posts = Post.objects.select_related('tahun', 'uploader').in_bulk(post_ids)
+            posts_data = [PostDetailSerializer(posts[post_id]).data for post_id in post_ids if post_id in posts]
+
+            return Response({
+                "success": True,
+                "count": len(posts_data),
+                "posts": posts_data,
+                "next_cursor": next_cursor
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,358 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from post.models import Post, PostLike
+from .flusher import PeriodicFlusher
+from .like_service import LIKE_MODES, recount_likes
+from .notification_service import notify, retract
+from .stats_service import record_likes_received
+
+logger = logging.getLogger(__name__)
+
+
+class LikeBuffer(PeriodicFlusher):
+    """
+    Write-behind buffer for PostLike toggles
+
+    Toggles only touch memory and an append-only spill file, so a burst of
+    taps on a popular post doesn't queue up behind SQLite's single writer.
+    Pending toggles are folded into buffered counts straight away and
+    written to PostLike in one transaction per flush interval.
+
+    Each process appends to <spill_dir>/<pid>.log. A flush renames that
+    file to <pid>.flushing, writes the batch and deletes it after commit.
+    Spill files left behind by dead processes are replayed on startup by
+    whichever live process locks them first.
+    """
+
+    def __init__(self, spill_dir, interval):
+        super().__init__(interval)
+        self.spill_dir = str(spill_dir)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}              # (user_id, post_id) -> liked
+        self._deltas = Counter()        # post_id -> likes_count delta
+        self._inflight = {}             # batch currently being written
+        self._inflight_deltas = Counter()
+        self._spill = None
+        self._recovered = False
+
+    # -- spill file -------------------------------------------------------
+
+    def _spill_path(self, pid=None, suffix='log'):
+        return os.path.join(self.spill_dir, f"{pid or os.getpid()}.{suffix}")
+
+    def _append(self, user_id, post_id, liked):
+        if self._spill is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._spill = open(self._spill_path(), 'a', encoding='utf-8')
+        self._spill.write(json.dumps({'u': user_id, 'p': post_id, 'l': liked}) + '\n')
+        # Survives a process crash; an OS crash can still lose the last interval
+        self._spill.flush()
+
+    def _close_spill(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def _rotate_spill(self):
+        """Move the live spill file aside so new toggles start a fresh one"""
+        self._close_spill()
+        log_path = self._spill_path()
+        flushing_path = self._spill_path(suffix='flushing')
+        if os.path.exists(log_path):
+            os.replace(log_path, flushing_path)
+            return flushing_path
+        return None
+
+    def _restore_spill(self, flushing_path):
+        """Put a failed batch back in front of toggles recorded since"""
+        self._close_spill()
+        log_path = self._spill_path()
+        if os.path.exists(log_path):
+            with open(flushing_path, 'a', encoding='utf-8') as dst, open(log_path, encoding='utf-8') as src:
+                dst.write(src.read())
+        os.replace(flushing_path, log_path)
+
+    @staticmethod
+    def _read_spill(path):
+        states = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    states[(entry['u'], entry['p'])] = entry['l']
+                except (ValueError, KeyError):
+                    # Torn last line from a crash mid-write
+                    continue
+        return states
+
+    @staticmethod
+    def _pid_alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _recover(self):
+        """Replay spill files left by processes that died before flushing"""
+        if self._recovered or not os.path.isdir(self.spill_dir):
+            self._recovered = True
+            return
+
+        orphans = defaultdict(list)
+        for name in os.listdir(self.spill_dir):
+            pid, _, suffix = name.partition('.')
+            if not pid.isdigit() or suffix not in ('flushing', 'log'):
+                continue
+            if int(pid) == os.getpid() or not self._pid_alive(int(pid)):
+                orphans[int(pid)].append(suffix)
+
+        for pid, suffixes in orphans.items():
+            # .flushing holds older toggles than .log
+            paths = [self._spill_path(pid, suffix) for suffix in ('flushing', 'log') if suffix in suffixes]
+            claimed = self._claim(paths)
+            if claimed is None:
+                continue  # Another process is replaying (or has replayed) them
+            try:
+                states = {}
+                for path in paths:
+                    states.update(self._read_spill(path))
+                if states:
+                    logger.info(f"Replaying {len(states)} buffered likes from process {pid}")
+                    self._write(states)
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            finally:
+                for f in claimed:
+                    f.close()
+
+        self._recovered = True
+
+    @staticmethod
+    def _claim(paths):
+        """
+        Lock an orphan's spill files so only one live process replays them
+
+        The lock is released with the files (or by the OS if this process
+        dies), and a file that was replayed and unlinked while we waited
+        is noticed by its link count.
+
+        Returns:
+            list of open locked files, or None if any is taken or gone
+        """
+        claimed = []
+        try:
+            for path in paths:
+                f = open(path, 'rb')
+                claimed.append(f)
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                if os.fstat(f.fileno()).st_nlink == 0:
+                    raise FileNotFoundError(path)
+            return claimed
+        except OSError:
+            # BlockingIOError (locked elsewhere) or FileNotFoundError (already replayed)
+            for f in claimed:
+                f.close()
+            return None
+
+    # -- reads ------------------------------------------------------------
+
+    def _state(self, key):
+        if key in self._pending:
+            return self._pending[key]
+        return self._inflight.get(key)
+
+    def is_liked(self, user_id, post_id):
+        """Buffered like state, or None if the database is authoritative"""
+        with self._lock:
+            return self._state((user_id, post_id))
+
+    def likes_count(self, post_id, stored_count):
+        """Stored Post.likes_count adjusted by toggles not yet flushed"""
+        with self._lock:
+            delta = self._deltas.get(post_id, 0) + self._inflight_deltas.get(post_id, 0)
+        return max(stored_count + delta, 0)
+
+    # -- writes -----------------------------------------------------------
+
+    def record(self, user_id, post_id, mode='toggle'):
+        """
+        Buffer a like/unlike/toggle; same contract as like_service.set_like
+
+        Only reads the database (post row and, on first sight of a
+        user/post pair, PostLike existence).
+
+        Raises:
+            Post.DoesNotExist: If the post doesn't exist
+            ValueError: If mode is not one of LIKE_MODES
+        """
+        if mode not in LIKE_MODES:
+            raise ValueError(f"mode must be one of {', '.join(LIKE_MODES)}")
+
+        row = Post.objects.filter(id=post_id).values_list('likes_count', 'uploader_id').first()
+        if row is None:
+            raise Post.DoesNotExist(f"Post {post_id} not found")
+        stored_count, uploader_id = row
+
+        key = (user_id, post_id)
+        current = self.is_liked(user_id, post_id)
+        if current is None:
+            current = PostLike.objects.filter(user_id=user_id, post_id=post_id).exists()
+
+        if not self._recovered:
+            with self._flush_lock:
+                self._recover()
+
+        with self._lock:
+            buffered = self._state(key)
+            if buffered is not None:
+                current = buffered
+            target = (not current) if mode == 'toggle' else (mode == 'like')
+            changed = target != current
+            if changed:
+                self._pending[key] = target
+                self._deltas[post_id] += 1 if target else -1
+                self._append(user_id, post_id, target)
+            delta = self._deltas.get(post_id, 0) + self._inflight_deltas.get(post_id, 0)
+
+        self.ensure_started()
+
+        return {
+            'action': 'liked' if target else 'unliked',
+            'changed': changed,
+            'likes_count': max(stored_count + delta, 0),
+            'uploader_id': uploader_id,
+        }
+
+    def flush(self):
+        """Write pending toggles to PostLike in one transaction"""
+        with self._flush_lock:
+            self._recover()
+
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._inflight = batch
+                self._inflight_deltas = self._deltas
+                self._pending = {}
+                self._deltas = Counter()
+                flushing_path = self._rotate_spill()
+
+            try:
+                self._write(batch)
+            except Exception:
+                with self._lock:
+                    # Newer toggles recorded during the failed write win
+                    for key, liked in batch.items():
+                        self._pending.setdefault(key, liked)
+                    self._deltas.update(self._inflight_deltas)
+                    self._inflight = {}
+                    self._inflight_deltas = Counter()
+                    if flushing_path:
+                        self._restore_spill(flushing_path)
+                raise
+
+            with self._lock:
+                self._inflight = {}
+                self._inflight_deltas = Counter()
+            if flushing_path:
+                os.remove(flushing_path)
+
+            return len(batch)
+
+    @staticmethod
+    def _write(states):
+        post_ids = {post_id for _, post_id in states}
+        user_ids = {user_id for user_id, _ in states}
+
+        with transaction.atomic():
+            # Skip rows whose post or user was deleted since the tap
+            rows = Post.objects.filter(id__in=post_ids).values_list('id', 'uploader_id', 'likes_count')
+            uploaders = {post_id: uploader_id for post_id, uploader_id, _ in rows}
+            old_counts = {post_id: likes_count for post_id, _, likes_count in rows}
+            live_users = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+
+            # Which pairs are already stored, so only real changes are notified
+            stored = set(
+                PostLike.objects.filter(post_id__in=post_ids, user_id__in=user_ids)
+                .values_list('user_id', 'post_id')
+            )
+
+            likes = []
+            unlikes = defaultdict(list)
+            for (user_id, post_id), liked in states.items():
+                if post_id not in uploaders or user_id not in live_users:
+                    continue
+                if liked and (user_id, post_id) not in stored:
+                    likes.append(PostLike(user_id=user_id, post_id=post_id))
+                elif not liked and (user_id, post_id) in stored:
+                    unlikes[post_id].append(user_id)
+
+            if likes:
+                PostLike.objects.bulk_create(likes, batch_size=500, ignore_conflicts=True)
+            for post_id, unliked_by in unlikes.items():
+                PostLike.objects.filter(post_id=post_id, user_id__in=unliked_by).delete()
+
+            # Exact recount also repairs any drift in the counters
+            recount_likes(uploaders.keys())
+
+            received = Counter()
+            for post_id, likes_count in Post.objects.filter(id__in=post_ids).values_list('id', 'likes_count'):
+                received[uploaders[post_id]] += likes_count - old_counts[post_id]
+            for uploader_id, delta in received.items():
+                record_likes_received(uploader_id, delta)
+
+        notify([
+            (uploaders[like.post_id], like.user_id, 'like', like.post_id)
+            for like in likes
+        ])
+        retract([
+            (uploaders[post_id], user_id, 'like', post_id)
+            for post_id, unliked_by in unlikes.items()
+            for user_id in unliked_by
+        ])
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_like_buffer():
+    """Process-wide LikeBuffer, or None unless POST_LIKE_WRITE_BEHIND is on"""
+    global _buffer
+    if not getattr(settings, 'POST_LIKE_WRITE_BEHIND', False):
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = LikeBuffer(
+                    spill_dir=getattr(settings, 'POST_LIKE_SPILL_DIR', settings.BASE_DIR / 'like_buffer'),
+                    interval=getattr(settings, 'POST_LIKE_FLUSH_INTERVAL', 2.0),
+                )
+    return _buffer
+
+
+def buffered_likes_count(post_id, stored_count):
+    """Post.likes_count including toggles still waiting in the buffer"""
+    buffer = get_like_buffer()
+    return buffer.likes_count(post_id, stored_count) if buffer else stored_count
+
+
+def buffered_is_liked(user_id, post_id):
+    """Like state from the buffer, or None to fall back to the database"""
+    buffer = get_like_buffer()
+    return buffer.is_liked(user_id, post_id) if buffer else None
@@ -0,0 +1,107 @@
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from post.models import Post, PostLike
+from .stats_service import record_likes_received
+
+LIKE_MODES = ('toggle', 'like', 'unlike')
+
+
+def _apply_likes_delta(post_id, delta):
+    """
+    Add delta to Post.likes_count and read back the new value
+
+    Uses UPDATE ... RETURNING where the backend supports it (SQLite 3.35+,
+    PostgreSQL) so the write and the read are one statement.
+
+    Returns:
+        (likes_count, uploader_id) or None if the post doesn't exist
+    """
+    if delta and connection.features.can_return_columns_from_insert:
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {qn(Post._meta.db_table)} "
+                f"SET {qn('likes_count')} = {qn('likes_count')} + %s "
+                f"WHERE {qn('id')} = %s "
+                f"RETURNING {qn('likes_count')}, {qn('uploader_id')}",
+                [delta, post_id]
+            )
+            return cursor.fetchone()
+
+    if delta:
+        Post.objects.filter(id=post_id).update(likes_count=F('likes_count') + delta)
+    return Post.objects.filter(id=post_id).values_list('likes_count', 'uploader_id').first()
+
+
+def set_like(user_id, post_id, mode='toggle'):
+    """
+    Like, unlike or toggle a like in one transaction without a COUNT query
+
+    'toggle' deletes the like and falls back to inserting it when nothing
+    was deleted. 'like' and 'unlike' are idempotent, so clients can retry
+    them safely. A concurrent duplicate insert is absorbed by the
+    unique_user_post_like constraint instead of raising.
+
+    Args:
+        user_id: ID of the liking user
+        post_id: ID of the post
+        mode: One of LIKE_MODES
+
+    Returns:
+        dict with 'action' ("liked"/"unliked"), 'changed' (bool),
+        'likes_count' and 'uploader_id'
+
+    Raises:
+        Post.DoesNotExist: If the post doesn't exist
+        ValueError: If mode is not one of LIKE_MODES
+    """
+    if mode not in LIKE_MODES:
+        raise ValueError(f"mode must be one of {', '.join(LIKE_MODES)}")
+
+    with transaction.atomic():
+        deleted = 0
+        if mode != 'like':
+            deleted, _ = PostLike.objects.filter(user_id=user_id, post_id=post_id).delete()
+
+        if deleted or mode == 'unlike':
+            action = 'unliked'
+            delta = -deleted
+        else:
+            action = 'liked'
+            try:
+                with transaction.atomic():
+                    PostLike.objects.create(user_id=user_id, post_id=post_id)
+                delta = 1
+            except IntegrityError:
+                # Already liked (retry or a concurrent tap)
+                delta = 0
+
+        row = _apply_likes_delta(post_id, delta)
+        if row is None:
+            # Rolls back the insert above, which would fail the FK check anyway
+            raise Post.DoesNotExist(f"Post {post_id} not found")
+
+        likes_count, uploader_id = row
+        record_likes_received(uploader_id, delta)
+
+    return {
+        'action': action,
+        'changed': bool(delta),
+        'likes_count': likes_count,
+        'uploader_id': uploader_id,
+    }
+
+
+def recount_likes(post_ids):
+    """Recompute Post.likes_count from PostLike for the given posts in one UPDATE"""
+    counts = (
+        PostLike.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(c=Count('id'))
+        .values('c')
+    )
+    return Post.objects.filter(id__in=post_ids).update(
+        likes_count=Coalesce(Subquery(counts), Value(0))
+    )
@@ -1,7 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from post.models import Post, Comment, SuggestedTopic
-from django.contrib.auth.models import User
+from post.models import Post, SuggestedTopic
+from post.comment_service import ingest_comments
+from post.stats_service import record_comments_received
 import os
 from pathlib import Path
 import sys
@@ -71,26 +72,14 @@ class Command(BaseCommand):
                     comments_data = generate_comments_for_file(file_path)
                     
                     if comments_data:
-                        created_count = 0
-                        for comment_data in comments_data:
-                            username = comment_data.get('username', 'Anonymous')
-                            comment_text = comment_data.get('comment', '')
-                            
-                            if comment_text:
-                                # Get or create user
-                                user, _ = User.objects.get_or_create(
-                                    username=username,
-                                    defaults={'email': f'{username}@timecapsule.local'}
-                                )
-                                
-                                # Create comment
-                                Comment.objects.create(
-                                    post=post,
-                                    user=user,
-                                    text=comment_text
-                                )
-                                created_count += 1
-                        
+                        created = ingest_comments(
+                            post.id,
+                            comments_data,
+                            user_defaults=lambda username: {'email': f'{username}@timecapsule.local'}
+                        )
+                        created_count = len(created)
+                        record_comments_received(post.uploader_id, created_count)
+
                         self.stdout.write(
                             self.style.SUCCESS(f'  ✓ Created {created_count} comments')
                         )
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Q
+from post.models import Post
+from post.thumbnails import generate_thumbnails
+
+
+def _thumbnail_post(post_id):
+    try:
+        post = Post.objects.select_related('media_blob').get(id=post_id)
+        thumb_url = generate_thumbnails(post)
+        if thumb_url:
+            Post.objects.filter(id=post_id).update(thumb_url=thumb_url)
+        return post_id, thumb_url, None
+    except Exception as e:
+        return post_id, None, e
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Generate WebP/JPEG thumbnails for existing posts that have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Posts thumbnailed in parallel (default 4)'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            help='Stop after this many posts'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate for every photo/video post, replacing existing thumb_url values'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.filter(media_type__in=['photo', 'video']).order_by('id')
+        if not options['force']:
+            posts = posts.filter(Q(thumb_url__isnull=True) | Q(thumb_url=''))
+        post_ids = list(posts.values_list('id', flat=True))
+        if options['limit']:
+            post_ids = post_ids[:options['limit']]
+
+        self.stdout.write(f'Thumbnailing {len(post_ids)} posts with {options["workers"]} workers...')
+
+        done = skipped = failed = 0
+        # Pillow and ffmpeg both release the GIL, so threads run in parallel
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            for post_id, thumb_url, error in executor.map(_thumbnail_post, post_ids):
+                if error:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'✗ Post {post_id}: {error}'))
+                elif thumb_url:
+                    done += 1
+                else:
+                    skipped += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Generated thumbnails for {done} posts ({skipped} skipped: missing file or no ffmpeg, {failed} failed)'
+        ))
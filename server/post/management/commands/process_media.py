@@ -0,0 +1,66 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from post.models import Post
+from post.processing import process_pending, process_post
+
+
+class Command(BaseCommand):
+    help = 'Run background media processing (metadata, year, derivatives) for queued posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--post-id',
+            type=int,
+            action='append',
+            help='Process only this post, queueing it if needed (can be repeated)'
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Queue posts whose processing failed again first'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for queued posts (a dedicated worker process)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds between polls with --loop (default 5)'
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            retried = Post.objects.filter(processing_status='failed').update(
+                processing_status='processing',
+                processing_stage='',
+                processing_error='',
+                processing_started_at=None
+            )
+            self.stdout.write(f'Queued {retried} failed posts again')
+
+        if options['post_id']:
+            # Queued directly rather than with enqueue_processing, which would
+            # also hand the posts to this process's in-process queue
+            Post.objects.filter(id__in=options['post_id']).exclude(processing_status='processing').update(
+                processing_status='processing',
+                processing_stage='',
+                processing_error='',
+                processing_started_at=None
+            )
+            for post_id in Post.objects.filter(id__in=options['post_id']).order_by('id').values_list('id', flat=True):
+                processed = process_post(post_id)
+                self.stdout.write(f"{'✓ Processed' if processed else '✗ Skipped (already running)'} post {post_id}")
+            return
+
+        while True:
+            processed = process_pending()
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f'✓ Processed {processed} posts'))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
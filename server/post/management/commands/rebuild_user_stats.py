@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from post.stats_service import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute UserStats (post count, likes/comments received, active years) from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            action='append',
+            help='Only rebuild stats for this user (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options.get('user_id')
+
+        written = rebuild_user_stats(user_ids)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt stats for {written} users'))
@@ -0,0 +1,82 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from post.models import Post
+from post.transcoding import next_pending_post_id, transcode_post
+
+
+class Command(BaseCommand):
+    help = 'Transcode queued video posts to HLS renditions (run as a dedicated worker with --loop)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--post-id',
+            type=int,
+            action='append',
+            help='Transcode only this video post, queueing it if needed (can be repeated)'
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Queue existing video posts that were never transcoded'
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Queue posts whose transcode failed again'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for queued posts'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=10.0,
+            help='Seconds between polls with --loop (default 10)'
+        )
+
+    def handle(self, *args, **options):
+        statuses = []
+        if options['backfill']:
+            statuses.append('none')
+        if options['retry_failed']:
+            statuses.append('failed')
+        if statuses:
+            queued = Post.objects.filter(media_type='video', transcode_status__in=statuses).update(
+                transcode_status='pending',
+                transcode_error='',
+                transcode_started_at=None
+            )
+            self.stdout.write(f'Queued {queued} video posts')
+
+        if options['post_id']:
+            Post.objects.filter(id__in=options['post_id'], media_type='video').exclude(
+                transcode_status='pending'
+            ).update(transcode_status='pending', transcode_error='', transcode_started_at=None)
+            for post_id in options['post_id']:
+                self._transcode(post_id)
+            return
+
+        while True:
+            # One video at a time per worker; ffmpeg already uses every core
+            post_id = next_pending_post_id()
+            if post_id:
+                self._transcode(post_id)
+                continue
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+
+    def _transcode(self, post_id):
+        self.stdout.write(f'Transcoding post {post_id}...')
+        if not transcode_post(post_id):
+            self.stdout.write(f'✗ Skipped post {post_id} (not queued or claimed by another worker)')
+            return
+        post = Post.objects.only('transcode_status', 'transcode_error', 'stream_url').get(id=post_id)
+        if post.transcode_status == 'ready':
+            self.stdout.write(self.style.SUCCESS(f'✓ Post {post_id}: {post.stream_url}'))
+        else:
+            self.stdout.write(self.style.WARNING(f'✗ Post {post_id}: {post.transcode_error}'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0008_post_likes_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='postlike',
+            index=models.Index(fields=['post', 'id'], name='postlike_post_id_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0009_postlike_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='views',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='PostDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='post.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'post'], name='postdailystats_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'date'), name='unique_post_daily_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0013_post_media_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='media_metadata',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='processing_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='processing_stage',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='processing_status',
+            field=models.CharField(choices=[('processing', 'processing'), ('ready', 'ready'), ('failed', 'failed')], db_index=True, default='ready', max_length=20),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0014_post_processing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='stream_url',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='transcode_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='transcode_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='transcode_status',
+            field=models.CharField(choices=[('none', 'none'), ('pending', 'pending'), ('ready', 'ready'), ('failed', 'failed')], db_index=True, default='none', max_length=20),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+def seed_actor_ids(apps, schema_editor):
+    """Open entries remember at least their latest actor"""
+    Notification = apps.get_model('post', 'Notification')
+    rows = list(Notification.objects.filter(is_read=False, actor__isnull=False).only('id', 'actor_id'))
+    for notification in rows:
+        notification.actor_ids = [notification.actor_id]
+    Notification.objects.bulk_update(rows, ['actor_ids'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0015_post_transcoding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(seed_actor_ids, migrations.RunPython.noop),
+    ]
@@ -23,13 +23,44 @@ class Post(models.Model):
         ('photo', 'photo'),
         ('none', 'none'),
     ]
+    PROCESSING_CHOICES = [
+        ('processing', 'processing'),
+        ('ready', 'ready'),
+        ('failed', 'failed'),
+    ]
+    TRANSCODE_CHOICES = [
+        ('none', 'none'),
+        ('pending', 'pending'),
+        ('ready', 'ready'),
+        ('failed', 'failed'),
+    ]
 
     url = models.TextField()
     media_type = models.CharField(max_length=20, choices=MEDIA_CHOICES)
     thumb_url = models.TextField(blank=True, null=True)
+    # Stored file behind `url`, for uploads/scrapes/generations since dedup
+    media_blob = models.ForeignKey('mediastore.MediaBlob', on_delete=models.SET_NULL, null=True, blank=True, related_name='posts')
     description = models.TextField(blank=True, null=True)
     tahun = models.ForeignKey(Tahun, on_delete=models.SET_NULL, null=True, blank=True, related_name='posts')
     uploader = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='uploaded_posts', null=True, blank=True)
+    # Denormalized PostLike count, maintained by post.like_service
+    likes_count = models.PositiveIntegerField(default=0)
+    # Flushed periodically from post.view_counter
+    views = models.PositiveBigIntegerField(default=0)
+    # Background media processing (post.processing): 'processing' until
+    # every stage has run; processing_started_at marks the run claiming it
+    processing_status = models.CharField(max_length=20, choices=PROCESSING_CHOICES, default='ready', db_index=True)
+    processing_stage = models.CharField(max_length=50, blank=True)
+    processing_error = models.TextField(blank=True)
+    processing_started_at = models.DateTimeField(null=True, blank=True)
+    # MetadataExtractor output for the media file, filled in by processing
+    media_metadata = models.JSONField(null=True, blank=True)
+    # HLS renditions for videos (post.transcoding), made by transcode_videos
+    # workers; stream_url is the master playlist once transcode_status is 'ready'
+    transcode_status = models.CharField(max_length=20, choices=TRANSCODE_CHOICES, default='none', db_index=True)
+    transcode_error = models.TextField(blank=True)
+    transcode_started_at = models.DateTimeField(null=True, blank=True)
+    stream_url = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -68,23 +99,65 @@ class PostLike(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['user', 'post'], name='unique_user_post_like')
         ]
+        indexes = [
+            # Keyset pagination of a post's likers (PostLikesListView)
+            models.Index(fields=['post', 'id'], name='postlike_post_id_idx')
+        ]
 
     def __str__(self):
         return f"{self.user_id} likes {self.post_id}"
 
 
+class PostDailyStats(models.Model):
+    """Per-post, per-day view rollup for trend queries"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'date'], name='unique_post_daily_stats')
+        ]
+        indexes = [
+            models.Index(fields=['date', 'post'], name='postdailystats_date_idx')
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} @ {self.date}: {self.views} views"
+
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, null=True, related_name='comments')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='comments')
     parent_comment = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
     text = models.TextField(blank=True, null=True)
+    likes_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Serves "top comments" (?order=top) as an index range scan
+            models.Index(fields=['post', '-likes_count', '-id'], name='comment_post_top_idx')
+        ]
+
     def __str__(self):
         short = (self.text[:30] + '...') if self.text and len(self.text) > 30 else (self.text or '')
         return f"Comment {self.id} by {getattr(self.user, 'username', 'Anonymous')} - {short}"
 
 
+class CommentLike(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='comment_likes')
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name='likes')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'comment'], name='unique_user_comment_like')
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} likes comment {self.comment_id}"
+
+
 class SuggestedTopic(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='suggested_topics')
     topic = models.CharField(max_length=100)
@@ -95,3 +168,102 @@ class SuggestedTopic(models.Model):
 
     class Meta:
         ordering = ['id']
+
+
+class Notification(models.Model):
+    VERB_CHOICES = [
+        ('like', 'like'),
+        ('comment', 'comment'),
+        ('reply', 'reply'),
+    ]
+
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    # Most recent actor; earlier actors of an aggregated entry are only counted
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    verb = models.CharField(max_length=20, choices=VERB_CHOICES)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='notifications')
+    # Distinct actors folded into this entry, so repeat events don't inflate actor_count
+    actor_ids = models.JSONField(default=list, blank=True)
+    actor_count = models.PositiveIntegerField(default=1)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', '-updated_at'], name='notification_inbox_idx'),
+            models.Index(fields=['recipient', 'verb', 'post', 'is_read'], name='notification_open_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.verb} x{self.actor_count} on {self.post_id} for {self.recipient_id}"
+
+
+class NotificationCounter(models.Model):
+    """Per-user unread notification count, so the badge is a primary key read"""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+
+class UserStats(models.Model):
+    """
+    Per-user activity counters, updated incrementally by post.stats_service
+
+    Rebuild from scratch with `manage.py rebuild_user_stats`.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    post_count = models.PositiveIntegerField(default=0)
+    likes_received = models.PositiveIntegerField(default=0)
+    comments_received = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    active_years = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.user_id}"
+
+
+class Follow(models.Model):
+    follower = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='following')
+    followee = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='followers')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['follower', 'followee'], name='unique_follow')
+        ]
+        indexes = [
+            # Fan-out walks a followee's followers
+            models.Index(fields=['followee', 'follower'], name='follow_followee_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.follower_id} -> {self.followee_id}"
+
+
+class TimelineEntry(models.Model):
+    """
+    One post in one user's home timeline, written by post.timeline_service
+
+    Ordered by post ID, so a timeline page is a backward range scan of
+    the unique (user, post) index. `author` is the post's uploader, kept here so
+    unfollowing can drop that user's entries without a join.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in timeline of {self.user_id}"
@@ -0,0 +1,214 @@
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from post.models import Notification, NotificationCounter
+
+
+def get_aggregation_window():
+    return timedelta(seconds=getattr(settings, 'NOTIFICATION_AGGREGATION_SECONDS', 3600))
+
+
+def _open_notifications(keys, now):
+    """Unread entries within the aggregation window for (recipient, verb, post) keys"""
+    return {
+        (n.recipient_id, n.verb, n.post_id): n
+        for n in Notification.objects.filter(
+            recipient_id__in={key[0] for key in keys},
+            verb__in={key[1] for key in keys},
+            post_id__in={key[2] for key in keys},
+            is_read=False,
+            updated_at__gte=now - get_aggregation_window(),
+        ).order_by('updated_at')
+    }
+
+
+def _group_actors(events):
+    """(recipient, verb, post) -> distinct actor ids in event order"""
+    actors = {}
+    for recipient_id, actor_id, verb, post_id in events:
+        if not recipient_id or recipient_id == actor_id:
+            continue
+        actors.setdefault((recipient_id, verb, post_id), {})[actor_id] = None
+    return {key: list(ids) for key, ids in actors.items()}
+
+
+def notify(events):
+    """
+    Write a batch of notifications with a constant number of queries
+
+    Unread notifications with the same (recipient, verb, post) that were
+    touched within the aggregation window are collapsed into one entry
+    ("N people liked your post") instead of getting a new row. The entry
+    counts distinct actors: an actor already folded into it (a re-like,
+    a second comment) doesn't add to actor_count.
+
+    Args:
+        events: Iterable of (recipient_id, actor_id, verb, post_id) tuples.
+            Events without a recipient or where the actor is the recipient
+            are dropped.
+
+    Returns:
+        int number of new notification rows created
+    """
+    actors = _group_actors(events)
+    if not actors:
+        return 0
+
+    now = timezone.now()
+
+    with transaction.atomic():
+        # One query for every entry the batch could fold into
+        open_notifications = _open_notifications(actors, now)
+
+        to_update = []
+        to_create = []
+        for key, actor_ids in actors.items():
+            existing = open_notifications.get(key)
+            if existing:
+                new_actors = [actor_id for actor_id in actor_ids if actor_id not in existing.actor_ids]
+                if not new_actors:
+                    continue
+                existing.actor_ids = existing.actor_ids + new_actors
+                existing.actor_count += len(new_actors)
+                existing.actor_id = new_actors[-1]
+                existing.updated_at = now
+                to_update.append(existing)
+            else:
+                recipient_id, verb, post_id = key
+                to_create.append(Notification(
+                    recipient_id=recipient_id,
+                    actor_id=actor_ids[-1],
+                    verb=verb,
+                    post_id=post_id,
+                    actor_ids=actor_ids,
+                    actor_count=len(actor_ids),
+                ))
+
+        if to_update:
+            Notification.objects.bulk_update(to_update, ['actor_ids', 'actor_count', 'actor', 'updated_at'])
+
+        if to_create:
+            Notification.objects.bulk_create(to_create)
+
+            # Only brand-new rows move the badge; folded ones are already unread
+            new_per_user = Counter(n.recipient_id for n in to_create)
+            NotificationCounter.objects.bulk_create(
+                [NotificationCounter(user_id=user_id) for user_id in new_per_user],
+                ignore_conflicts=True
+            )
+            for user_id, new_count in new_per_user.items():
+                NotificationCounter.objects.filter(user_id=user_id).update(unread=F('unread') + new_count)
+
+    return len(to_create)
+
+
+def retract(events):
+    """
+    Take actors back out of unread notifications (e.g. after an unlike)
+
+    An entry left without actors is deleted and the recipient's unread
+    counter decremented. Entries already read, or older than the
+    aggregation window, are left alone.
+
+    Args:
+        events: Iterable of (recipient_id, actor_id, verb, post_id) tuples
+
+    Returns:
+        int number of notification rows deleted
+    """
+    actors = _group_actors(events)
+    if not actors:
+        return 0
+
+    with transaction.atomic():
+        open_notifications = _open_notifications(actors, timezone.now())
+
+        to_update = []
+        to_delete = []
+        for key, actor_ids in actors.items():
+            existing = open_notifications.get(key)
+            if not existing:
+                continue
+            remaining = [actor_id for actor_id in existing.actor_ids if actor_id not in actor_ids]
+            removed = len(existing.actor_ids) - len(remaining)
+            if not removed:
+                continue
+            existing.actor_count = max(existing.actor_count - removed, 0)
+            if not remaining and not existing.actor_count:
+                to_delete.append(existing)
+                continue
+            existing.actor_ids = remaining
+            if existing.actor_id in actor_ids:
+                existing.actor_id = remaining[-1] if remaining else None
+            to_update.append(existing)
+
+        if to_update:
+            # updated_at is kept, so a retraction doesn't bump the entry in the inbox
+            for n in to_update:
+                Notification.objects.filter(id=n.id).update(
+                    actor_ids=n.actor_ids, actor_count=n.actor_count, actor_id=n.actor_id
+                )
+
+        if to_delete:
+            Notification.objects.filter(id__in=[n.id for n in to_delete]).delete()
+            for user_id, deleted in Counter(n.recipient_id for n in to_delete).items():
+                counter = NotificationCounter.objects.select_for_update().filter(user_id=user_id).first()
+                if counter:
+                    counter.unread = max(counter.unread - deleted, 0)
+                    counter.save(update_fields=['unread'])
+
+    return len(to_delete)
+
+
+def get_unread_count(user_id):
+    """Badge count for a user, read from NotificationCounter"""
+    return (
+        NotificationCounter.objects.filter(user_id=user_id)
+        .values_list('unread', flat=True)
+        .first()
+    ) or 0
+
+
+def mark_read(user_id, notification_ids=None):
+    """
+    Mark notifications as read and keep the unread counter in step
+
+    Args:
+        user_id: Recipient whose notifications are marked
+        notification_ids: Optional list of IDs; all unread ones if omitted
+
+    Returns:
+        int number of notifications marked read
+    """
+    with transaction.atomic():
+        unread = Notification.objects.filter(recipient_id=user_id, is_read=False)
+        if notification_ids is not None:
+            unread = unread.filter(id__in=notification_ids)
+        marked = unread.update(is_read=True)
+
+        if notification_ids is None:
+            NotificationCounter.objects.filter(user_id=user_id).update(unread=0)
+        elif marked:
+            counter = NotificationCounter.objects.select_for_update().filter(user_id=user_id).first()
+            if counter:
+                counter.unread = max(counter.unread - marked, 0)
+                counter.save(update_fields=['unread'])
+
+    return marked
+
+
+def describe(notification):
+    """Human readable text for a notification"""
+    actor_name = notification.actor.username if notification.actor else 'Someone'
+    others = notification.actor_count - 1
+    if others > 0:
+        actor_name = f"{actor_name} and {others} other{'s' if others > 1 else ''}"
+
+    if notification.verb == 'like':
+        return f"{actor_name} liked your post"
+    if notification.verb == 'reply':
+        return f"{actor_name} replied to your comment"
+    return f"{actor_name} commented on your post"
@@ -0,0 +1,172 @@
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from post.models import Notification
+from .notification_service import describe, get_unread_count, mark_read
+
+
+class NotificationListView(APIView):
+    """
+    GET endpoint for the current user's notification inbox
+
+    URL: api/post/notifications/
+
+    Query parameters:
+    - limit: Page size (default 20, max 100)
+    - offset: Number of notifications to skip (default 0)
+
+    Response:
+    {
+        "success": true,
+        "unread_count": 2,
+        "notifications": [
+            {
+                "id": 7,
+                "verb": "like",
+                "post_id": 1,
+                "actor": {"id": 3, "username": "user3"},
+                "actor_count": 4,
+                "message": "user3 and 3 others liked your post",
+                "is_read": false,
+                "created_at": "...",
+                "updated_at": "..."
+            }
+        ],
+        "has_more": false
+    }
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """List notifications, most recently updated first"""
+        try:
+            try:
+                limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+                offset = max(int(request.query_params.get('offset', 0)), 0)
+            except (ValueError, TypeError):
+                limit, offset = 20, 0
+
+            notifications = (
+                Notification.objects.filter(recipient=request.user)
+                .select_related('actor')
+                .order_by('-updated_at', '-id')
+            )
+
+            # Fetch one extra row to know whether another page exists
+            page = list(notifications[offset:offset + limit + 1])
+            has_more = len(page) > limit
+            page = page[:limit]
+
+            notifications_data = [
+                {
+                    "id": n.id,
+                    "verb": n.verb,
+                    "post_id": n.post_id,
+                    "actor": {
+                        "id": n.actor.id,
+                        "username": n.actor.username
+                    } if n.actor else None,
+                    "actor_count": n.actor_count,
+                    "message": describe(n),
+                    "is_read": n.is_read,
+                    "created_at": n.created_at,
+                    "updated_at": n.updated_at
+                }
+                for n in page
+            ]
+
+            return Response({
+                "success": True,
+                "unread_count": get_unread_count(request.user.id),
+                "notifications": notifications_data,
+                "has_more": has_more
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class NotificationUnreadCountView(APIView):
+    """
+    GET endpoint for the notification badge
+
+    URL: api/post/notifications/unread/
+
+    Response:
+    {
+        "success": true,
+        "unread_count": 2
+    }
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """Get unread notification count"""
+        try:
+            return Response({
+                "success": True,
+                "unread_count": get_unread_count(request.user.id)
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class NotificationMarkReadView(APIView):
+    """
+    POST endpoint to mark notifications as read
+
+    URL: api/post/notifications/read/
+
+    Request body (optional):
+    {
+        "ids": [7, 8]  // omit to mark everything as read
+    }
+
+    Response:
+    {
+        "success": true,
+        "marked": 2,
+        "unread_count": 0
+    }
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        """Mark notifications as read"""
+        try:
+            ids = request.data.get('ids')
+            if ids is not None:
+                if not isinstance(ids, list):
+                    return Response({
+                        "success": False,
+                        "error": "ids must be a list"
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                try:
+                    ids = [int(i) for i in ids]
+                except (ValueError, TypeError):
+                    return Response({
+                        "success": False,
+                        "error": "ids must be integers"
+                    }, status=status.HTTP_400_BAD_REQUEST)
+
+            marked = mark_read(request.user.id, ids)
+
+            return Response({
+                "success": True,
+                "marked": marked,
+                "unread_count": get_unread_count(request.user.id)
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,74 @@
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from mediastore.blobs import PHOTO_EXTENSIONS, VIDEO_EXTENSIONS
+from post.models import Post
+from .stats_service import record_post_created
+from .timeline_service import fan_out_post
+from .processing import enqueue_processing
+from .tag_service import add_tags, atomic_with_cached_ids, get_tahun
+
+
+def detect_media_type(ext):
+    """'photo', 'video' or 'none' for a file extension (with or without the dot)"""
+    ext = (ext or '').lower().lstrip('.')
+    if ext in PHOTO_EXTENSIONS:
+        return 'photo'
+    if ext in VIDEO_EXTENSIONS:
+        return 'video'
+    return 'none'
+
+
+def create_post(url, media_type, description='', thumb_url='', tahun=None, uploader_id=None, tags=(), media_blob=None):
+    """
+    Create a post with its year, uploader and tags
+
+    Shared by CreatePostView, batch and resumable uploads, scrapes and
+    generated images. Unknown uploader IDs are ignored, like in the
+    original view. Posts with a media file are returned straight away in
+    the 'processing' state and finished by the background pipeline in
+    post.processing. Everything runs in one transaction, and the year and
+    tags cost a constant number of queries (see post.tag_service). Called
+    outside a transaction, a commit that fails on a stale cached Tag/Tahun
+    id is retried once with fresh ids; callers that open their own
+    transaction should use tag_service.atomic_with_cached_ids.
+
+    Args:
+        tahun: Year as int (the Tahun row is created if needed)
+        uploader_id: User ID or None
+        tags: Tag names
+        media_blob: mediastore MediaBlob behind url, if any
+
+    Returns:
+        the created Post
+    """
+    uploader = None
+    if uploader_id:
+        uploader = User.objects.filter(id=uploader_id).first()
+
+    outermost = not transaction.get_connection().in_atomic_block
+    for attempt in range(2):
+        try:
+            with atomic_with_cached_ids():
+                post = Post.objects.create(
+                    url=url,
+                    media_type=media_type,
+                    description=description,
+                    thumb_url=thumb_url,
+                    tahun=get_tahun(tahun),
+                    uploader=uploader,
+                    media_blob=media_blob,
+                    processing_status='processing' if media_blob else 'ready'
+                )
+
+                record_post_created(post)
+                fan_out_post(post)
+
+                add_tags(post, tags)
+
+                if media_blob:
+                    enqueue_processing(post)
+            return post
+        except IntegrityError:
+            # Caches were cleared; nothing was written, so try once more
+            if attempt or not outermost:
+                raise
@@ -0,0 +1,196 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from metadata.extractor import MetadataExtractor
+from post.models import Post
+from .stats_service import record_active_year
+from .tag_service import get_tahun
+from .thumbnails import thumbnail_stage
+from .transcoding import queue_transcode_stage
+
+logger = logging.getLogger(__name__)
+
+# EXIF tags holding when a photo was taken, most specific first
+EXIF_DATE_TAGS = ('DateTimeOriginal', 'DateTimeDigitized', 'DateTime')
+
+
+def extract_year_from_metadata_dict(metadata: dict):
+    """
+    Extract ONLY year (int) from metadata['data']['- Creation date']
+    """
+    try:
+        creation_date = metadata.get('data', {}).get('- Creation date')
+        if not creation_date:
+            return None
+
+        # Format: '2025-12-14 12:19:11'
+        dt = datetime.strptime(creation_date, "%Y-%m-%d %H:%M:%S")
+        return dt.year
+    except Exception:
+        return None
+
+
+def infer_year(metadata):
+    """
+    Year the media was made, from MetadataExtractor output
+
+    Video creation dates come from hachoir ('- Creation date'); photos
+    fall back to EXIF dates ('2019:05:01 12:00:00').
+    """
+    year = extract_year_from_metadata_dict(metadata)
+    if year:
+        return year
+
+    exif = (metadata.get('data') or {}).get('exif') or {}
+    for tag in EXIF_DATE_TAGS:
+        try:
+            return datetime.strptime(exif[tag].strip()[:19], "%Y:%m:%d %H:%M:%S").year
+        except (KeyError, AttributeError, ValueError):
+            continue
+    return None
+
+
+def extract_metadata_stage(post):
+    """Read the media's metadata once, keep it, and fill in a missing year"""
+    if not post.media_blob_id or not os.path.exists(post.media_blob.path):
+        return []
+
+    path = post.media_blob.path
+    post.media_metadata = MetadataExtractor.extract_metadata(path, os.path.basename(path))
+    fields = ['media_metadata']
+
+    if not post.tahun_id:
+        year = infer_year(post.media_metadata)
+        if year:
+            post.tahun = get_tahun(year)
+            fields.append('tahun')
+            record_active_year(post.uploader_id, year)
+            logger.info(f"Post {post.id}: extracted year {year}")
+
+    return fields
+
+
+# Run in order for every post; each takes the Post and returns the names of
+# the fields it changed
+STAGES = [
+    ('metadata', extract_metadata_stage),
+    ('thumbnail', thumbnail_stage),
+    ('transcode', queue_transcode_stage),
+]
+
+
+def _claimable():
+    stale = timezone.now() - timedelta(seconds=getattr(settings, 'POST_PROCESSING_STALE_SECONDS', 15 * 60))
+    return Post.objects.filter(processing_status='processing').filter(
+        Q(processing_started_at__isnull=True) | Q(processing_started_at__lt=stale)
+    )
+
+
+def process_post(post_id):
+    """
+    Run every stage for one post
+
+    The post is claimed first, so the in-process queue and the
+    process_media worker never run the same post at once; a claim older
+    than POST_PROCESSING_STALE_SECONDS (a crashed run) can be taken over.
+
+    Returns:
+        bool whether this call processed the post
+    """
+    if not _claimable().filter(id=post_id).update(processing_started_at=timezone.now()):
+        return False
+
+    try:
+        post = Post.objects.select_related('media_blob', 'tahun').get(id=post_id)
+        for name, run_stage in STAGES:
+            Post.objects.filter(id=post_id).update(processing_stage=name)
+            fields = run_stage(post)
+            if fields:
+                post.save(update_fields=[*fields, 'updated_at'])
+    except Exception as e:
+        logger.error(f"Processing post {post_id} failed: {e}", exc_info=True)
+        Post.objects.filter(id=post_id).update(
+            processing_status='failed',
+            processing_error=str(e)[:1000],
+            processing_started_at=None
+        )
+        return True
+
+    Post.objects.filter(id=post_id).update(
+        processing_status='ready',
+        processing_stage='',
+        processing_error='',
+        processing_started_at=None
+    )
+    return True
+
+
+def process_pending(limit=None):
+    """Process queued (or stale) posts one after another; returns how many ran"""
+    post_ids = _claimable().order_by('id').values_list('id', flat=True)
+    if limit:
+        post_ids = post_ids[:limit]
+    return sum(process_post(post_id) for post_id in list(post_ids))
+
+
+class ProcessingQueue:
+    """Thread pool running process_post for posts created in this process"""
+
+    def __init__(self, workers):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='post-processing')
+
+    def submit(self, post_id):
+        self._executor.submit(self._run, post_id)
+
+    @staticmethod
+    def _run(post_id):
+        try:
+            process_post(post_id)
+        except Exception as e:
+            logger.error(f"Processing post {post_id} crashed: {e}", exc_info=True)
+        finally:
+            close_old_connections()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_processing_queue():
+    """Process-wide ProcessingQueue, or None when POST_PROCESSING_IN_PROCESS is off"""
+    global _queue
+    if not getattr(settings, 'POST_PROCESSING_IN_PROCESS', True):
+        return None
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = ProcessingQueue(workers=getattr(settings, 'POST_PROCESSING_WORKERS', 2))
+    return _queue
+
+
+def enqueue_processing(post):
+    """
+    Queue a post for background processing once the current transaction commits
+
+    Posts should be created with processing_status='processing'; others
+    are switched to it here. Without the in-process queue the post waits
+    for `manage.py process_media`.
+    """
+    if post.processing_status != 'processing':
+        Post.objects.filter(id=post.id).update(
+            processing_status='processing',
+            processing_stage='',
+            processing_error='',
+            processing_started_at=None
+        )
+        post.processing_status = 'processing'
+
+    queue = get_processing_queue()
+    if queue:
+        transaction.on_commit(lambda: queue.submit(post.id))
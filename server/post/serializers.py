@@ -1,5 +1,8 @@
 from rest_framework import serializers
 from post.models import Post, Tag, PostTag, Time, Tahun
+from .like_buffer import buffered_likes_count
+from .thumbnails import thumbnail_urls
+from .view_counter import get_view_counter
 from django.core.files.storage import default_storage
 from django.conf import settings
 import uuid
@@ -61,6 +64,9 @@ class PostDetailSerializer(serializers.ModelSerializer):
     tahun = TahunSerializer(read_only=True)
     likes_count = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
+    views = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
+    stream_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
@@ -69,6 +75,8 @@ class PostDetailSerializer(serializers.ModelSerializer):
             'url',
             'media_type',
             'thumb_url',
+            'thumbnails',
+            'stream_url',
             'description',
             'tags',
             'tahun',
@@ -76,11 +84,23 @@ class PostDetailSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at',
             'likes_count',
-            'comments_count'
+            'comments_count',
+            'views',
+            'processing_status'
         ]
 
     def get_likes_count(self, obj):
-        return obj.likes.count()
+        return buffered_likes_count(obj.id, obj.likes_count)
 
     def get_comments_count(self, obj):
         return obj.comments.count()
+
+    def get_views(self, obj):
+        return get_view_counter().views(obj.id, obj.views)
+
+    def get_thumbnails(self, obj):
+        return thumbnail_urls(obj)
+
+    def get_stream_url(self, obj):
+        # HLS master playlist; null until transcode_videos has made one
+        return obj.stream_url if obj.transcode_status == 'ready' else None
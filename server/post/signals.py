@@ -0,0 +1,86 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from post.models import Follow, PostTag, SuggestedTopic, Tag, Tahun
+from .autocomplete import get_autocomplete, normalize
+from .tag_service import tag_ids, tahun_ids
+
+
+def _index():
+    # Nothing to patch until the first query builds the index from the database
+    autocomplete = get_autocomplete()
+    return autocomplete if autocomplete.is_built else None
+
+
+@receiver(post_save, sender=Tag)
+def index_saved_tag(sender, instance, raw=False, **kwargs):
+    if not raw and (index := _index()):
+        index.tags.upsert(instance.id, instance.tag_name)
+
+
+@receiver(post_delete, sender=Tag)
+def unindex_deleted_tag(sender, instance, **kwargs):
+    tag_ids.forget_id(instance.id)
+    if index := _index():
+        index.tags.remove(instance.id)
+
+
+@receiver(post_delete, sender=Tahun)
+def forget_deleted_tahun(sender, instance, **kwargs):
+    tahun_ids.forget_id(instance.id)
+
+
+@receiver(post_save, sender=PostTag)
+def count_tag_use(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and (index := _index()):
+        index.tags.add_weight(instance.tag_id, 1)
+
+
+@receiver(post_delete, sender=PostTag)
+def uncount_tag_use(sender, instance, **kwargs):
+    if index := _index():
+        index.tags.add_weight(instance.tag_id, -1)
+
+
+@receiver(post_save, sender=SuggestedTopic)
+def index_saved_topic(sender, instance, created, raw=False, **kwargs):
+    ident = normalize(instance.topic)
+    if created and not raw and ident and (index := _index()):
+        if ident in index.topics:
+            index.topics.add_weight(ident, 1)
+        else:
+            index.topics.upsert(ident, instance.topic, weight=1)
+
+
+@receiver(post_delete, sender=SuggestedTopic)
+def uncount_deleted_topic(sender, instance, **kwargs):
+    if index := _index():
+        index.topics.add_weight(normalize(instance.topic), -1)
+
+
+@receiver(post_save, sender=User)
+def index_saved_user(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or update_fields == frozenset({'last_login'}) or not (index := _index()):
+        return
+    if instance.is_active:
+        index.users.upsert(instance.id, instance.username, payload={'id': instance.id})
+    else:
+        index.users.remove(instance.id)
+
+
+@receiver(post_delete, sender=User)
+def unindex_deleted_user(sender, instance, **kwargs):
+    if index := _index():
+        index.users.remove(instance.id)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and (index := _index()):
+        index.users.add_weight(instance.followee_id, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    if index := _index():
+        index.users.add_weight(instance.followee_id, -1)
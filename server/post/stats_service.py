@@ -0,0 +1,146 @@
+from collections import defaultdict
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
+from post.models import Comment, Follow, Post, UserStats
+
+
+def _bump(user_id, **deltas):
+    """Add deltas to a user's UserStats counters, creating the row if needed"""
+    if not user_id:
+        return
+    UserStats.objects.bulk_create([UserStats(user_id=user_id)], ignore_conflicts=True)
+    UserStats.objects.filter(user_id=user_id).update(**{
+        field: Greatest(F(field) + delta, 0) for field, delta in deltas.items()
+    })
+
+
+def record_post_created(post):
+    """Count a new post for its uploader and add the post's year to active_years"""
+    if not post.uploader_id:
+        return
+
+    with transaction.atomic():
+        _bump(post.uploader_id, post_count=1)
+        if post.tahun_id:
+            record_active_year(post.uploader_id, post.tahun.tahun)
+
+
+def record_active_year(user_id, year):
+    """Add a year to a user's active_years (e.g. once processing infers it)"""
+    if not user_id or year is None:
+        return
+
+    with transaction.atomic():
+        UserStats.objects.bulk_create([UserStats(user_id=user_id)], ignore_conflicts=True)
+        stats = UserStats.objects.select_for_update().get(user_id=user_id)
+        if year not in stats.active_years:
+            stats.active_years = sorted(stats.active_years + [year])
+            stats.save(update_fields=['active_years', 'updated_at'])
+
+
+def record_posts_deleted(uploader_id, count):
+    """Uncount deleted posts (active_years is left to rebuild_user_stats)"""
+    if count:
+        _bump(uploader_id, post_count=-count)
+
+
+def record_likes_received(uploader_id, delta):
+    """Track likes gained (or lost, with a negative delta) on a user's posts"""
+    if delta:
+        _bump(uploader_id, likes_received=delta)
+
+
+def record_comments_received(uploader_id, delta):
+    """Track comments added (or removed) on a user's posts"""
+    if delta:
+        _bump(uploader_id, comments_received=delta)
+
+
+def record_follow(follower_id, followee_id, delta):
+    """Track a follow (delta 1) or unfollow (delta -1) on both users' counters"""
+    if delta:
+        _bump(followee_id, followers_count=delta)
+        _bump(follower_id, following_count=delta)
+
+
+def is_fan_out_on_read(user_id):
+    """Whether a user's posts skip timeline fan-out (see post.timeline_service)"""
+    threshold = getattr(settings, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 5000)
+    return UserStats.objects.filter(user_id=user_id, followers_count__gte=threshold).exists()
+
+
+def rebuild_user_stats(user_ids=None):
+    """
+    Recompute UserStats from Post, PostLike counters, Comment and Follow
+
+    Args:
+        user_ids: Optional iterable of user IDs; all users if omitted
+
+    Returns:
+        int number of UserStats rows written
+    """
+    posts = Post.objects.filter(uploader__isnull=False)
+    comments = Comment.objects.filter(post__uploader__isnull=False)
+    followers = Follow.objects.all()
+    following = Follow.objects.all()
+    users = User.objects.all()
+    if user_ids is not None:
+        posts = posts.filter(uploader_id__in=user_ids)
+        comments = comments.filter(post__uploader_id__in=user_ids)
+        followers = followers.filter(followee_id__in=user_ids)
+        following = following.filter(follower_id__in=user_ids)
+        users = users.filter(id__in=user_ids)
+
+    stats = {
+        user_id: UserStats(user_id=user_id, active_years=[])
+        for user_id in users.values_list('id', flat=True)
+    }
+
+    for row in posts.values('uploader_id').annotate(n=Count('id'), likes=Sum('likes_count')):
+        stats[row['uploader_id']].post_count = row['n']
+        stats[row['uploader_id']].likes_received = row['likes'] or 0
+
+    for row in comments.values('post__uploader_id').annotate(n=Count('id')):
+        stats[row['post__uploader_id']].comments_received = row['n']
+
+    for row in followers.values('followee_id').annotate(n=Count('id')):
+        stats[row['followee_id']].followers_count = row['n']
+
+    for row in following.values('follower_id').annotate(n=Count('id')):
+        stats[row['follower_id']].following_count = row['n']
+
+    years = defaultdict(set)
+    for uploader_id, year in posts.filter(tahun__isnull=False).values_list('uploader_id', 'tahun__tahun').distinct():
+        years[uploader_id].add(year)
+    for uploader_id, user_years in years.items():
+        stats[uploader_id].active_years = sorted(user_years)
+
+    with transaction.atomic():
+        UserStats.objects.bulk_create(
+            stats.values(),
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=[
+                'post_count', 'likes_received', 'comments_received',
+                'followers_count', 'following_count', 'active_years', 'updated_at'
+            ]
+        )
+
+    return len(stats)
+
+
+def get_user_stats(user):
+    """Stats dict for API responses; zeros for users without a UserStats row"""
+    stats = getattr(user, 'stats', None) if user.pk else None
+    return {
+        "post_count": stats.post_count if stats else 0,
+        "likes_received": stats.likes_received if stats else 0,
+        "comments_received": stats.comments_received if stats else 0,
+        "followers_count": stats.followers_count if stats else 0,
+        "following_count": stats.following_count if stats else 0,
+        "active_years": stats.active_years if stats else [],
+    }
@@ -0,0 +1,149 @@
+import threading
+from contextlib import contextmanager
+from django.db import IntegrityError, transaction
+from post.models import PostTag, Tag, Tahun
+from .autocomplete import get_autocomplete
+
+
+class NameIdCache:
+    """
+    Thread-safe name -> id map for small lookup tables (Tag, Tahun)
+
+    Ids are only added once the transaction that found (or created) them
+    has committed, so a rolled back insert never leaves an id behind.
+    Rows are never renamed, so entries only go stale when a row is deleted;
+    post.signals forgets those in this process, and a commit failing on a
+    row deleted by another process clears the cache (see
+    atomic_with_cached_ids). Cleared wholesale when it reaches max_entries.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._ids = {}
+
+    def get_many(self, names):
+        with self._lock:
+            return {name: self._ids[name] for name in names if name in self._ids}
+
+    def set_many(self, mapping):
+        with self._lock:
+            if len(self._ids) + len(mapping) > self.max_entries:
+                self._ids = {}
+            self._ids.update(mapping)
+
+    def set_many_on_commit(self, mapping):
+        """set_many once the current transaction commits (now outside one)"""
+        if mapping:
+            transaction.on_commit(lambda: self.set_many(mapping))
+
+    def forget_id(self, ident):
+        with self._lock:
+            self._ids = {name: i for name, i in self._ids.items() if i != ident}
+
+    def clear(self):
+        with self._lock:
+            self._ids = {}
+
+
+tag_ids = NameIdCache(max_entries=50_000)
+tahun_ids = NameIdCache(max_entries=1_000)
+
+
+@contextmanager
+def atomic_with_cached_ids():
+    """
+    transaction.atomic() for writes that may use cached Tag/Tahun ids
+
+    Foreign keys are only checked at COMMIT (Django declares them
+    DEFERRABLE INITIALLY DEFERRED), so an id whose row another process
+    deleted fails there rather than at the insert. Use this for the
+    outermost transaction: an IntegrityError clears both caches, so the
+    next attempt looks the ids up again.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError:
+        tag_ids.clear()
+        tahun_ids.clear()
+        raise
+
+
+def get_tahun(year):
+    """
+    Tahun for a year, created if needed; None for no year
+
+    The instance is built from the cached id, so repeat years cost no query.
+    """
+    if not year:
+        return None
+    year = int(year)
+    tahun_id = tahun_ids.get_many([year]).get(year)
+    if tahun_id is None:
+        tahun_id = Tahun.objects.get_or_create(tahun=year)[0].id
+        tahun_ids.set_many_on_commit({year: tahun_id})
+    return Tahun(id=tahun_id, tahun=year)
+
+
+def resolve_tags(names):
+    """
+    Ids for tag names, creating missing tags
+
+    At most three queries whatever the number of names: look up the
+    uncached ones, bulk insert the missing ones (ignore_conflicts, so a
+    concurrent insert of the same name is harmless) and read back their ids.
+
+    Returns:
+        dict name -> id
+    """
+    names = list(dict.fromkeys(name for name in names if name))
+    ids = tag_ids.get_many(names)
+    missing = [name for name in names if name not in ids]
+
+    if missing:
+        found = dict(Tag.objects.filter(tag_name__in=missing).values_list('tag_name', 'id'))
+        to_create = [name for name in missing if name not in found]
+        if to_create:
+            Tag.objects.bulk_create([Tag(tag_name=name) for name in to_create], ignore_conflicts=True)
+            # ignore_conflicts doesn't return ids (and another writer may have won)
+            found.update(Tag.objects.filter(tag_name__in=to_create).values_list('tag_name', 'id'))
+        tag_ids.set_many_on_commit(found)
+        ids.update(found)
+
+    return ids
+
+
+def add_tags(post, names):
+    """
+    Tag a post with a constant number of queries
+
+    PostTag rows are bulk inserted, which skips the post_save signals that
+    keep the autocomplete index current, so the index is updated here once
+    the transaction commits.
+
+    Returns:
+        list of tag ids added
+    """
+    if not names:
+        return []
+
+    ids = resolve_tags(names)
+    PostTag.objects.bulk_create(
+        [PostTag(post_id=post.id, tag_id=tag_id) for tag_id in ids.values()],
+        ignore_conflicts=True
+    )
+
+    def index():
+        autocomplete = get_autocomplete()
+        if autocomplete.is_built:
+            for name, tag_id in ids.items():
+                # New tags were bulk inserted too, skipping their signal
+                if tag_id not in autocomplete.tags:
+                    autocomplete.tags.upsert(tag_id, name)
+                autocomplete.tags.add_weight(tag_id, 1)
+
+    # Not for tags of a post that is rolled back
+    transaction.on_commit(index)
+
+    return list(ids.values())
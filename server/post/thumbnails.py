@@ -0,0 +1,160 @@
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from django.conf import settings
+from mediastore.blobs import sharded_name
+from mediastore.imaging import IMAGE_FORMATS, image_formats, load_image, save_image, shrink
+
+logger = logging.getLogger(__name__)
+
+# Seek this far into a video for the poster frame, skipping fades from black
+POSTER_OFFSET_SECONDS = 1
+
+
+def _widths():
+    return tuple(getattr(settings, 'POST_THUMBNAIL_WIDTHS', (320, 640)))
+
+
+def source_path(post):
+    """Local file behind a post's media: its blob, or a file under PUBLIC_URL"""
+    if post.media_blob_id:
+        return post.media_blob.path
+    if post.url and post.url.startswith(settings.PUBLIC_URL):
+        return os.path.join(settings.PUBLIC_ROOT, post.url[len(settings.PUBLIC_URL):])
+    return None
+
+
+def _thumbnail_key(post):
+    # Posts sharing a blob share thumbnails
+    return post.media_blob_id or f"post{post.id}"
+
+
+def thumbnail_name(post, width, ext):
+    """Path of a thumbnail relative to PUBLIC_ROOT: thumbs/<aa>/<bb>/<key>_<width>.<ext>"""
+    return sharded_name('thumbs', _thumbnail_key(post), f"_{width}.{ext}")
+
+
+def thumbnail_urls(post):
+    """
+    URLs of every thumbnail size and format for a post with thumbnails
+
+    Returns:
+        dict of width (as str) -> {ext: url}, or {} if none were generated
+    """
+    if not post.thumb_url or not post.thumb_url.startswith(f"{settings.PUBLIC_URL}thumbs/"):
+        return {}
+    return {
+        str(width): {ext: f"{settings.PUBLIC_URL}{thumbnail_name(post, width, ext)}" for ext, _ in image_formats()}
+        for width in _widths()
+    }
+
+
+def remove_thumbnails(key):
+    """Delete every thumbnail written for a blob sha256 (or "post<id>")"""
+    for width in _widths():
+        for ext, _ in IMAGE_FORMATS:
+            suffix = f"_{width}.{ext}"
+            # Flat names are from before shard_media moved them
+            for name in (sharded_name('thumbs', key, suffix), f"thumbs/{key}{suffix}"):
+                path = os.path.join(settings.PUBLIC_ROOT, name)
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def extract_poster_frame(video_path, output_path, width):
+    """
+    Grab one frame of a video as a JPEG with ffmpeg
+
+    Returns:
+        bool whether a frame was written (False if ffmpeg is missing or fails)
+    """
+    ffmpeg = shutil.which(getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'))
+    if not ffmpeg:
+        logger.warning("ffmpeg not found; skipping video thumbnail")
+        return False
+
+    # Videos shorter than the offset produce nothing, so retry from the start
+    error = b''
+    for offset in (POSTER_OFFSET_SECONDS, 0):
+        try:
+            result = subprocess.run(
+                [
+                    ffmpeg, '-v', 'error', '-y',
+                    '-ss', str(offset), '-i', video_path,
+                    '-frames:v', '1', '-vf', f"scale='min({width},iw)':-2",
+                    '-q:v', '3', output_path
+                ],
+                capture_output=True,
+                timeout=60
+            )
+        except subprocess.TimeoutExpired:
+            error = b'timed out'
+            continue
+        if result.returncode == 0 and os.path.exists(output_path) and os.path.getsize(output_path):
+            return True
+        error = result.stderr
+    logger.warning(f"ffmpeg could not extract a frame from {video_path}: {error[-300:]!r}")
+    return False
+
+
+def _write_image_thumbnails(post, image_path):
+    widths = _widths()
+    img = load_image(image_path, (max(widths) * 2, max(widths) * 4))
+
+    written = {}
+    for width in sorted(widths, reverse=True):
+        # Fixed width; tall images are capped at twice the width
+        thumb = shrink(img, (width, width * 2))
+        for ext, fmt in image_formats():
+            name = thumbnail_name(post, width, ext)
+            path = os.path.join(settings.PUBLIC_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            save_image(thumb, path, fmt)
+            written[(width, ext)] = name
+    return written
+
+
+def generate_thumbnails(post):
+    """
+    Write WebP/JPEG thumbnails at POST_THUMBNAIL_WIDTHS for a post
+
+    Photos are downscaled with Pillow; videos get a poster frame from
+    ffmpeg first.
+
+    Returns:
+        URL for Post.thumb_url (the POST_THUMBNAIL_DEFAULT_WIDTH size, WebP
+        when available), or None when there is nothing to thumbnail
+    """
+    path = source_path(post)
+    if not path or not os.path.exists(path) or post.media_type not in ('photo', 'video'):
+        return None
+
+    if post.media_type == 'video':
+        fd, frame_path = tempfile.mkstemp(suffix='.jpg')
+        os.close(fd)
+        try:
+            if not extract_poster_frame(path, frame_path, max(_widths())):
+                return None
+            written = _write_image_thumbnails(post, frame_path)
+        finally:
+            os.remove(frame_path)
+    else:
+        written = _write_image_thumbnails(post, path)
+
+    default_width = getattr(settings, 'POST_THUMBNAIL_DEFAULT_WIDTH', 640)
+    if default_width not in _widths():
+        default_width = max(_widths())
+    return f"{settings.PUBLIC_URL}{written[(default_width, image_formats()[0][0])]}"
+
+
+def thumbnail_stage(post):
+    """post.processing stage: fill in thumb_url unless the client gave one"""
+    if post.thumb_url:
+        return []
+    thumb_url = generate_thumbnails(post)
+    if not thumb_url:
+        return []
+    post.thumb_url = thumb_url
+    return ['thumb_url']
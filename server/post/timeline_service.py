@@ -0,0 +1,181 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from post.models import Follow, Post, TimelineEntry
+from .stats_service import is_fan_out_on_read, record_follow
+
+FAN_OUT_BATCH_SIZE = 1000
+
+
+def _fan_out_threshold():
+    return getattr(settings, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 5000)
+
+
+def fan_out_post(post):
+    """
+    Copy a new post into its uploader's and their followers' home timelines
+
+    Uploaders with TIMELINE_FANOUT_MAX_FOLLOWERS or more followers only get
+    the entry in their own timeline; their followers pick the post up at
+    read time in get_home_timeline instead.
+
+    Returns:
+        int number of timeline entries written
+    """
+    if not post.uploader_id:
+        return 0
+
+    recipients = [post.uploader_id]
+    if not is_fan_out_on_read(post.uploader_id):
+        recipients.extend(
+            Follow.objects.filter(followee_id=post.uploader_id)
+            .values_list('follower_id', flat=True)
+            .iterator(chunk_size=FAN_OUT_BATCH_SIZE)
+        )
+
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=user_id, post_id=post.id, author_id=post.uploader_id) for user_id in recipients],
+            batch_size=FAN_OUT_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+    return len(recipients)
+
+
+def _recent_post_ids(author_id):
+    return list(
+        Post.objects.filter(uploader_id=author_id)
+        .order_by('-id')
+        .values_list('id', flat=True)[:getattr(settings, 'TIMELINE_BACKFILL_POSTS', 50)]
+    )
+
+
+def backfill_followers(author_id):
+    """
+    Copy an author's latest posts into all their followers' timelines
+
+    Run when an author drops back below the fan-out threshold: posts made
+    while above it were only merged in at read time, which stops for
+    authors below it, so they would otherwise vanish from timelines.
+    Entries that already exist are skipped.
+
+    Returns:
+        int number of timeline entries attempted
+    """
+    recent = _recent_post_ids(author_id)
+    if not recent:
+        return 0
+
+    written = 0
+    followers = (
+        Follow.objects.filter(followee_id=author_id)
+        .values_list('follower_id', flat=True)
+        .iterator(chunk_size=FAN_OUT_BATCH_SIZE)
+    )
+    batch = []
+    for follower_id in followers:
+        batch.extend(TimelineEntry(user_id=follower_id, post_id=post_id, author_id=author_id) for post_id in recent)
+        if len(batch) >= FAN_OUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, batch_size=FAN_OUT_BATCH_SIZE, ignore_conflicts=True)
+            written += len(batch)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, batch_size=FAN_OUT_BATCH_SIZE, ignore_conflicts=True)
+        written += len(batch)
+    return written
+
+
+def follow(follower_id, followee_id):
+    """
+    Follow a user and backfill their latest posts into the follower's timeline
+
+    Returns:
+        bool whether a new follow was created (False if already following)
+
+    Raises:
+        ValueError: If a user tries to follow themselves
+    """
+    if follower_id == followee_id:
+        raise ValueError("Users cannot follow themselves")
+
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                Follow.objects.create(follower_id=follower_id, followee_id=followee_id)
+        except IntegrityError:
+            return False
+
+        record_follow(follower_id, followee_id, 1)
+
+        if not is_fan_out_on_read(followee_id):
+            TimelineEntry.objects.bulk_create(
+                [
+                    TimelineEntry(user_id=follower_id, post_id=post_id, author_id=followee_id)
+                    for post_id in _recent_post_ids(followee_id)
+                ],
+                ignore_conflicts=True
+            )
+
+    return True
+
+
+def unfollow(follower_id, followee_id):
+    """
+    Unfollow a user and drop their posts from the follower's timeline
+
+    If this takes the followee below the fan-out threshold, their latest
+    posts are backfilled into the remaining followers' timelines.
+
+    Returns:
+        bool whether a follow was removed
+    """
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(follower_id=follower_id, followee_id=followee_id).delete()
+        if not deleted:
+            return False
+
+        was_fan_out_on_read = is_fan_out_on_read(followee_id)
+        record_follow(follower_id, followee_id, -1)
+        TimelineEntry.objects.filter(user_id=follower_id, author_id=followee_id).delete()
+
+        if was_fan_out_on_read and not is_fan_out_on_read(followee_id):
+            backfill_followers(followee_id)
+
+    return True
+
+
+def get_home_timeline(user_id, before=None, limit=20):
+    """
+    Post IDs for a page of a user's home timeline, newest first
+
+    Fanned-out posts come from one range scan of the user's TimelineEntry
+    rows; posts by followed accounts above the fan-out threshold are read
+    from Post directly and merged in.
+
+    Args:
+        user_id: Timeline owner
+        before: Only return posts with an ID below this (keyset cursor)
+        limit: Page size
+
+    Returns:
+        tuple (list of post IDs, next cursor or None)
+    """
+    entries = TimelineEntry.objects.filter(user_id=user_id)
+    if before is not None:
+        entries = entries.filter(post_id__lt=before)
+    post_ids = set(entries.order_by('-post_id').values_list('post_id', flat=True)[:limit])
+
+    large_followees = list(
+        Follow.objects.filter(
+            follower_id=user_id,
+            followee__stats__followers_count__gte=_fan_out_threshold()
+        ).values_list('followee_id', flat=True)
+    )
+    if large_followees:
+        pulled = Post.objects.filter(uploader_id__in=large_followees)
+        if before is not None:
+            pulled = pulled.filter(id__lt=before)
+        post_ids.update(pulled.order_by('-id').values_list('id', flat=True)[:limit])
+
+    page = sorted(post_ids, reverse=True)[:limit]
+    next_cursor = page[-1] if len(page) == limit else None
+    return page, next_cursor
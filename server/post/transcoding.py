@@ -0,0 +1,213 @@
+import logging
+import os
+import re
+import shutil
+import subprocess
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from mediastore.blobs import sharded_name
+from post.models import Post
+from .thumbnails import source_path
+
+logger = logging.getLogger(__name__)
+
+# (name, height, video kbit/s, audio kbit/s), lowest first
+DEFAULT_RENDITIONS = (
+    ('360p', 360, 800, 96),
+    ('720p', 720, 2800, 128),
+    ('1080p', 1080, 5000, 160),
+)
+
+# Seconds per HLS segment; keyframes are forced on segment boundaries
+SEGMENT_SECONDS = 6
+
+
+def _renditions():
+    return tuple(getattr(settings, 'HLS_RENDITIONS', DEFAULT_RENDITIONS))
+
+
+def _ffmpeg():
+    return shutil.which(getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'))
+
+
+def hls_name(post):
+    """Directory of a post's renditions relative to PUBLIC_ROOT: hls/<aa>/<bb>/<key>"""
+    # Posts sharing a blob share renditions, like thumbnails
+    return sharded_name('hls', post.media_blob_id or f'post{post.id}')
+
+
+def remove_renditions(key):
+    """Delete the renditions written for a blob sha256 (or "post<id>")"""
+    # The flat hls/<key> is from before shard_media moved it
+    for name in (sharded_name('hls', key), f"hls/{key}"):
+        shutil.rmtree(os.path.join(settings.PUBLIC_ROOT, name), ignore_errors=True)
+
+
+def _source_height(post):
+    # hachoir reports '- Image height': '1080 pixels' for videos
+    data = (post.media_metadata or {}).get('data') or {}
+    match = re.match(r'\d+', str(data.get('- Image height', '')))
+    return int(match.group()) if match else None
+
+
+def pick_renditions(post):
+    """
+    Renditions worth making for a video: none taller than the source, but
+    always at least the lowest one
+    """
+    renditions = _renditions()
+    height = _source_height(post)
+    if not height:
+        return renditions
+    fitting = tuple(r for r in renditions if r[1] <= height)
+    return fitting or renditions[:1]
+
+
+def _transcode_rendition(ffmpeg, source, output_dir, height, video_kbps, audio_kbps):
+    os.makedirs(output_dir)
+    result = subprocess.run(
+        [
+            ffmpeg, '-v', 'error', '-y', '-i', source,
+            '-map', '0:v:0', '-map', '0:a:0?',
+            '-vf', f"scale=-2:'min({height},ih)'",
+            '-c:v', 'libx264', '-preset', 'veryfast', '-profile:v', 'main',
+            '-b:v', f'{video_kbps}k', '-maxrate', f'{int(video_kbps * 1.07)}k', '-bufsize', f'{video_kbps * 2}k',
+            # By time, not frame count, so boundaries hold at any frame rate
+            '-force_key_frames', f'expr:gte(t,n_forced*{SEGMENT_SECONDS})', '-sc_threshold', '0',
+            '-c:a', 'aac', '-b:a', f'{audio_kbps}k', '-ac', '2',
+            '-hls_time', str(SEGMENT_SECONDS), '-hls_playlist_type', 'vod',
+            '-hls_segment_filename', os.path.join(output_dir, 'seg_%05d.ts'),
+            os.path.join(output_dir, 'index.m3u8')
+        ],
+        capture_output=True,
+        timeout=getattr(settings, 'HLS_TRANSCODE_TIMEOUT', 60 * 60)
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace')[-500:]}")
+
+
+def _master_playlist(renditions):
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3']
+    for name, height, video_kbps, audio_kbps in renditions:
+        # No RESOLUTION: the width depends on the source's aspect ratio
+        lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={(video_kbps + audio_kbps) * 1000}')
+        lines.append(f'{name}/index.m3u8')
+    return '\n'.join(lines) + '\n'
+
+
+def transcode_to_hls(post):
+    """
+    Write HLS renditions and a master playlist for a video post
+
+    Everything is written to a scratch directory and renamed into place at
+    the end, so players never see a half-finished stream.
+
+    Returns:
+        URL of the master playlist
+
+    Raises:
+        RuntimeError: If ffmpeg is missing or fails
+        FileNotFoundError: If the post's media file is gone
+    """
+    ffmpeg = _ffmpeg()
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg not found; set FFMPEG_BINARY")
+    source = source_path(post)
+    if not source or not os.path.exists(source):
+        raise FileNotFoundError(f"Media file for post {post.id} not found")
+
+    name = hls_name(post)
+    final_dir = os.path.join(settings.PUBLIC_ROOT, name)
+    master_url = f"{settings.PUBLIC_URL}{name}/master.m3u8"
+    if os.path.exists(os.path.join(final_dir, 'master.m3u8')):
+        # Another post with the same blob already has renditions
+        return master_url
+
+    work_dir = os.path.join(settings.PUBLIC_ROOT, 'hls', '.incoming', uuid.uuid4().hex)
+    try:
+        renditions = pick_renditions(post)
+        for rendition, height, video_kbps, audio_kbps in renditions:
+            _transcode_rendition(ffmpeg, source, os.path.join(work_dir, rendition), height, video_kbps, audio_kbps)
+        with open(os.path.join(work_dir, 'master.m3u8'), 'w') as f:
+            f.write(_master_playlist(renditions))
+
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.makedirs(os.path.dirname(final_dir), exist_ok=True)
+        os.rename(work_dir, final_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return master_url
+
+
+def queue_transcode_stage(post):
+    """
+    post.processing stage: mark video posts for the transcode_videos workers
+
+    Transcoding takes minutes, so the processing pipeline (which may run
+    in web processes) only queues it.
+    """
+    if post.media_type != 'video' or not getattr(settings, 'HLS_TRANSCODING', True):
+        return []
+    if post.transcode_status in ('pending', 'ready'):
+        return []
+    post.transcode_status = 'pending'
+    post.transcode_error = ''
+    post.transcode_started_at = None
+    return ['transcode_status', 'transcode_error', 'transcode_started_at']
+
+
+def _claim_timeout():
+    """Seconds before a claim is taken to be a dead worker's"""
+    # HLS_TRANSCODE_TIMEOUT is per rendition, and a run may make all of them
+    return getattr(settings, 'HLS_TRANSCODE_TIMEOUT', 60 * 60) * (len(_renditions()) + 1)
+
+
+def _claimable():
+    stale = timezone.now() - timedelta(seconds=_claim_timeout())
+    return Post.objects.filter(transcode_status='pending').filter(
+        Q(transcode_started_at__isnull=True) | Q(transcode_started_at__lt=stale)
+    )
+
+
+def transcode_post(post_id):
+    """
+    Claim and transcode one queued post
+
+    Claims work like post.processing: a conditional update, so several
+    workers can poll the same queue; a claim older than
+    HLS_TRANSCODE_TIMEOUT for every rendition plus one more is treated as
+    a dead worker's and taken over.
+
+    Returns:
+        bool whether this call handled the post
+    """
+    if not _claimable().filter(id=post_id).update(transcode_started_at=timezone.now()):
+        return False
+
+    try:
+        post = Post.objects.select_related('media_blob').get(id=post_id)
+        stream_url = transcode_to_hls(post)
+    except Exception as e:
+        logger.error(f"Transcoding post {post_id} failed: {e}")
+        Post.objects.filter(id=post_id).update(
+            transcode_status='failed',
+            transcode_error=str(e)[:1000],
+            transcode_started_at=None
+        )
+        return True
+
+    Post.objects.filter(id=post_id).update(
+        transcode_status='ready',
+        transcode_error='',
+        transcode_started_at=None,
+        stream_url=stream_url
+    )
+    return True
+
+
+def next_pending_post_id():
+    """Oldest queued post a worker could claim, or None"""
+    return _claimable().order_by('id').values_list('id', flat=True).first()
@@ -1,9 +1,12 @@
 from django.urls import path
 from .views import (
-    CreatePostView, PostListView, PostListByUserView, PostDetailView, 
-    GeneratePostContentView, TahunListView, PostLikeView, PostLikesCountView, PostLikesListView
+    CreatePostView, BatchCreatePostView, PostListView, PostListByUserView, PostDetailView, 
+    GeneratePostContentView, TahunListView, PostLikeView, PostLikesCountView, PostLikesListView,
+    PostLikesStatusView, PostViewStatsView, PostProcessingStatusView, TrendingPostsView, AutocompleteView
 )
-from .comment_views import CommentListView, CommentCreateView, CommentDetailView, SuggestedTopicsView
+from .notification_views import NotificationListView, NotificationUnreadCountView, NotificationMarkReadView
+from .follow_views import FollowView, HomeTimelineView
+from .comment_views import CommentListView, CommentCreateView, CommentDetailView, CommentLikeView, SuggestedTopicsView
 
 app_name = 'post'
 
@@ -11,6 +14,9 @@ urlpatterns = [
     # Create post with file upload
     path('create/', CreatePostView.as_view(), name='create-post'),
     
+    # Create one post per file from a multi-file upload
+    path('create/batch/', BatchCreatePostView.as_view(), name='create-post-batch'),
+    
     # List all posts
     path('list/', PostListView.as_view(), name='post-list'),
     
@@ -20,9 +26,33 @@ urlpatterns = [
     # List all tahun (years)
     path('tahun/', TahunListView.as_view(), name='tahun-list'),
     
+    # Notifications for the current user
+    path('notifications/', NotificationListView.as_view(), name='notification-list'),
+    path('notifications/unread/', NotificationUnreadCountView.as_view(), name='notification-unread'),
+    path('notifications/read/', NotificationMarkReadView.as_view(), name='notification-read'),
+    
+    # Like counts and liked state for many posts in one call
+    path('likes/status/', PostLikesStatusView.as_view(), name='post-likes-status'),
+    
+    # Most viewed posts over recent days
+    path('trending/', TrendingPostsView.as_view(), name='post-trending'),
+    
+    # Tag, topic and username suggestions while typing
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
+    
+    # Home timeline (own posts and followed users' posts) and follow/unfollow
+    path('timeline/', HomeTimelineView.as_view(), name='home-timeline'),
+    path('follow/<int:user_id>/', FollowView.as_view(), name='follow'),
+    
     # Get single post
     path('<int:post_id>/', PostDetailView.as_view(), name='post-detail'),
     
+    # Daily view stats for a post
+    path('<int:post_id>/stats/', PostViewStatsView.as_view(), name='post-view-stats'),
+    
+    # Background media processing state
+    path('<int:post_id>/status/', PostProcessingStatusView.as_view(), name='post-processing-status'),
+    
     # Like endpoints
     path('<int:post_id>/like/', PostLikeView.as_view(), name='post-like'),
     path('<int:post_id>/likes/', PostLikesCountView.as_view(), name='post-likes-count'),
@@ -35,6 +65,7 @@ urlpatterns = [
     path('<int:post_id>/comments/', CommentListView.as_view(), name='comment-list'),
     path('<int:post_id>/comments/create/', CommentCreateView.as_view(), name='comment-create'),
     path('<int:post_id>/comments/<int:comment_id>/', CommentDetailView.as_view(), name='comment-detail'),
+    path('<int:post_id>/comments/<int:comment_id>/like/', CommentLikeView.as_view(), name='comment-like'),
     
     # Suggested Topics
     path('<int:post_id>/topics/', SuggestedTopicsView.as_view(), name='suggested-topics'),
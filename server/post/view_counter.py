@@ -0,0 +1,125 @@
+import threading
+from collections import Counter, OrderedDict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from post.models import Post, PostDailyStats
+from .flusher import PeriodicFlusher
+
+
+class ViewCounter(PeriodicFlusher):
+    """
+    In-memory post view aggregator
+
+    Views are summed per post in process memory and flushed every
+    `interval` seconds as one `views = views + n` UPDATE per post plus the
+    matching PostDailyStats rollup, all in a single transaction. Repeat
+    views by the same viewer are dropped using a small LRU of recently
+    seen (viewer, post) pairs.
+    """
+
+    def __init__(self, interval, dedupe_size):
+        super().__init__(interval)
+        self.dedupe_size = dedupe_size
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = Counter()       # post_id -> views not yet flushed
+        self._inflight = Counter()      # batch currently being written
+        self._seen = OrderedDict()      # (viewer_key, post_id) -> None, LRU order
+
+    def record(self, post_id, viewer_key=None):
+        """
+        Count a view of a post
+
+        Args:
+            post_id: ID of the viewed post
+            viewer_key: Stable key for the viewer (user, session or IP);
+                views with the same key are counted once while in the LRU
+
+        Returns:
+            bool whether the view was counted
+        """
+        with self._lock:
+            if viewer_key is not None:
+                seen_key = (viewer_key, post_id)
+                if seen_key in self._seen:
+                    self._seen.move_to_end(seen_key)
+                    return False
+                self._seen[seen_key] = None
+                if len(self._seen) > self.dedupe_size:
+                    self._seen.popitem(last=False)
+            self._pending[post_id] += 1
+
+        self.ensure_started()
+        return True
+
+    def views(self, post_id, stored_views):
+        """Stored Post.views plus views not yet flushed"""
+        with self._lock:
+            return stored_views + self._pending.get(post_id, 0) + self._inflight.get(post_id, 0)
+
+    def flush(self):
+        """Write pending view counts and today's rollups in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._inflight = batch
+                self._pending = Counter()
+
+            try:
+                today = timezone.localdate()
+                with transaction.atomic():
+                    # Posts deleted since the view would fail the rollup's FK
+                    live = set(Post.objects.filter(id__in=batch.keys()).values_list('id', flat=True))
+
+                    PostDailyStats.objects.bulk_create(
+                        [PostDailyStats(post_id=post_id, date=today) for post_id in live],
+                        ignore_conflicts=True
+                    )
+                    for post_id in live:
+                        count = batch[post_id]
+                        Post.objects.filter(id=post_id).update(views=F('views') + count)
+                        PostDailyStats.objects.filter(post_id=post_id, date=today).update(views=F('views') + count)
+            except Exception:
+                with self._lock:
+                    self._pending.update(batch)
+                    self._inflight = Counter()
+                raise
+
+            with self._lock:
+                self._inflight = Counter()
+
+            return sum(batch.values())
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def get_view_counter():
+    """Process-wide ViewCounter"""
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                _counter = ViewCounter(
+                    interval=getattr(settings, 'POST_VIEW_FLUSH_INTERVAL', 10.0),
+                    dedupe_size=getattr(settings, 'POST_VIEW_DEDUPE_SIZE', 10000),
+                )
+    return _counter
+
+
+def viewer_key_for(request):
+    """Dedupe key for a request: user, then session, then client IP"""
+    if request.user.is_authenticated:
+        return f"u:{request.user.id}"
+    session_key = getattr(getattr(request, 'session', None), 'session_key', None)
+    if session_key:
+        return f"s:{session_key}"
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        return f"ip:{forwarded.split(',')[0].strip()}"
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
@@ -3,40 +3,38 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
-from post.models import Post, Tag, PostTag, Tahun, Comment, SuggestedTopic, PostLike
+from post.models import Post, Tahun, SuggestedTopic, PostLike, PostDailyStats
 from .serializers import PostCreateSerializer, PostDetailSerializer
+from .comment_service import ingest_comments
+from .notification_service import notify, retract
+from .like_service import LIKE_MODES, set_like
+from .like_buffer import buffered_is_liked, buffered_likes_count, get_like_buffer
+from .view_counter import get_view_counter, viewer_key_for
+from .stats_service import record_comments_received
+from .post_service import create_post, detect_media_type
+from .tag_service import atomic_with_cached_ids
+from .autocomplete import Autocomplete, get_autocomplete
+from mediastore.blobs import UnsupportedMediaType, find_blob, ingest_chunks, ingest_hashed_file
+from mediastore.upload_handlers import HashedUploadedFile, HashingBlobUploadHandler
 from django.contrib.auth.models import User
-from metadata.extractor import MetadataExtractor
-import uuid
 import os
 from django.conf import settings
 import threading
 from django.conf import settings
-from datetime import datetime
-
-def extract_year_from_metadata_dict(metadata: dict):
-    """
-    Extract ONLY year (int) from metadata['data']['- Creation date']
-    """
-    try:
-        creation_date = metadata.get('data', {}).get('- Creation date')
-        if not creation_date:
-            return None
-
-        # Format: '2025-12-14 12:19:11'
-        dt = datetime.strptime(creation_date, "%Y-%m-%d %H:%M:%S")
-        return dt.year
-    except Exception:
-        return None
-
-
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
 
 class CreatePostView(APIView):
     """
     POST endpoint for creating posts with file upload
     
     Accepts multipart/form-data with:
-    - file: Image or video file (optional)
+    - file: Image or video file (optional); stored by SHA-256, so a file
+      that was uploaded before is not stored twice
+    - media_sha256: Instead of file, the SHA-256 of media already stored
+      (check with GET api/media/blobs/<sha256>/) to skip the upload
     - description: Post description (optional)
     - media_type: 'photo', 'video', or 'none' (auto-detected from file if provided)
     - tags: List of tag names (optional, comma-separated or JSON array)
@@ -102,110 +100,67 @@ class CreatePostView(APIView):
             
             # Handle file upload separately
             url = ''
+            media_blob = None
             media_type = data.get('media_type', 'none')
+            media_sha256 = request.data.get('media_sha256')
+            
+            if not file and media_sha256:
+                # Content the client already uploaded once (see api/media/blobs/<sha256>/)
+                media_blob = find_blob(media_sha256)
+                if not media_blob:
+                    return Response({
+                        "success": False,
+                        "error": "No stored media with that media_sha256; upload the file instead"
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                url = media_blob.url
+                if not media_type or media_type == 'none':
+                    media_type = Post.objects.filter(media_blob=media_blob).values_list('media_type', flat=True).first() or 'none'
+                data['media_type'] = media_type
             
             if file:
                 print(f"Processing file: {file.name}")
-                # Generate unique filename
                 ext = file.name.split('.')[-1].lower()
-                random_filename = f"{uuid.uuid4()}.{ext}"
                 
                 # Auto-detect media type from extension
                 if not media_type or media_type == 'none':
-                    if ext in ['jpg', 'jpeg', 'png', 'gif', 'webp', 'bmp', 'tiff', 'heic']:
-                        media_type = 'photo'
-                    elif ext in ['mp4', 'avi', 'mov', 'mkv', 'webm', 'flv', 'wmv', 'm4v', '3gp']:
-                        media_type = 'video'
+                    media_type = detect_media_type(ext)
                 
                 print(f"Detected media_type: {media_type}")
                 
-                # Save file to public/upload
-                public_upload_path = os.path.join(settings.PUBLIC_ROOT, 'upload')
-                print(f"Public upload path: {public_upload_path}")
-                os.makedirs(public_upload_path, exist_ok=True)
-                
-                file_path = os.path.join(public_upload_path, random_filename)
-                print(f"Full file path: {file_path}")
-                
-                with open(file_path, 'wb') as f:
-                    for chunk in file.chunks():
-                        f.write(chunk)
+                # Save file to public/upload, named by its SHA-256 (hashed while
+                # streaming); identical content resolves to the existing file
+                try:
+                    media_blob, created = ingest_chunks(file.chunks(), 'upload', ext)
+                except UnsupportedMediaType as e:
+                    return Response({
+                        "success": False,
+                        "error": str(e)
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                file_path = media_blob.path
                 
-                url = f"{settings.PUBLIC_URL}upload/{random_filename}"
+                url = media_blob.url
                 data['media_type'] = media_type
-                print(f"File saved: {file_path}")
+                print(f"File {'saved' if created else 'already stored'}: {file_path}")
                 print(f"Generated URL: {url}")
                 
-                # Extract year from file metadata if tahun not provided
-                if not tahun:
-                    print(f"\nExtracting metadata from file...")
-                    metadata = MetadataExtractor.extract_metadata(file_path, file.name)
-                    print(f"=== METADATA ===")
-                    print(f"Type: {metadata.get('type')}")
-                    print(f"Status: {metadata.get('status')}")
-                    print(f"Data: {metadata.get('data')}")
-                    print(f"================\n")
-                    
-                if not tahun:
-                    print(f"\nExtracting metadata from file...")
-                    metadata = MetadataExtractor.extract_metadata(file_path, file.name)
+                # Metadata (and the year, if not given) is read in the background
+                # by post.processing; the post is returned as 'processing'
 
-                    print(f"=== METADATA ===")
-                    print(f"Data: {metadata}")
-                    print(f"================\n")
-
-                    extracted_year = extract_year_from_metadata_dict(metadata)
-
-                    if extracted_year:
-                        tahun = extracted_year
-                        print(f"✓ Extracted YEAR only: {tahun}")
-                    else:
-                        print(f"✗ No year found in metadata")
-
-            else:
+            elif not media_blob:
                 print("No file provided")
             
             # Create post directly
-            uploader_id = data.pop('uploader', None)
-            tags_list = data.pop('tags', [])
-            data.pop('tahun', None)  # Remove tahun from data since we handle it separately
-            
-            # Get Tahun object
-            tahun_obj = None
-            if tahun:
-                try:
-                    tahun_obj = Tahun.objects.get(tahun=tahun)
-                except Tahun.DoesNotExist:
-                    tahun_obj = Tahun.objects.create(tahun=tahun)
-
-            
-            # Get uploader
-            uploader = None
-            if uploader_id:
-                try:
-                    uploader = User.objects.get(id=uploader_id)
-                except User.DoesNotExist:
-                    pass
-            
-            print(f"Creating post with url={url}, media_type={data['media_type']}")
-            
-            # Create post
-            post = Post.objects.create(
+            post = create_post(
                 url=url,
                 media_type=data['media_type'],
                 description=data['description'],
                 thumb_url=data['thumb_url'],
-                tahun=tahun_obj,
-                uploader=uploader
+                tahun=tahun,
+                uploader_id=data.get('uploader'),
+                tags=data['tags'],
+                media_blob=media_blob
             )
             
-            print(f"Post created: {post.id}")
-            
-            # Add tags
-            for tag_name in tags_list:
-                tag, _ = Tag.objects.get_or_create(tag_name=tag_name)
-                PostTag.objects.create(post=post, tag=tag)
-            
             # Return post details
             post_serializer = PostDetailSerializer(post)
             
@@ -227,6 +182,145 @@ class CreatePostView(APIView):
             )
 
 
+class BatchCreatePostView(APIView):
+    """
+    POST endpoint for creating one post per file from many files at once
+    (e.g. a scanned photo album)
+
+    URL: api/post/create/batch/
+
+    Accepts multipart/form-data with:
+    - files: Image or video files (repeat the field, up to BATCH_UPLOAD_MAX_FILES)
+    - description, tags, tahun, uploader: As for create/, applied to every post
+
+    Each file is hashed while it streams into the media store, so it is
+    written to disk once. The posts are created in one transaction and a
+    bad file only fails its own entry. Metadata for all of them is read in
+    parallel afterwards by the processing pool; poll <post_id>/status/.
+
+    Response:
+    {
+        "success": true,
+        "created": 2,
+        "failed": 1,
+        "results": [
+            {"filename": "001.jpg", "success": true, "post": {"id": 1, ...}},
+            {"filename": "002.jpg", "success": true, "post": {"id": 2, ...}},
+            {"filename": "notes.txt", "success": false, "error": "Unsupported file type"}
+        ]
+    }
+    """
+    permission_classes = (AllowAny,)
+    parser_classes = (MultiPartParser, FormParser)
+
+    def initialize_request(self, request, *args, **kwargs):
+        # Must be set before anything (authentication, CSRF) parses the body
+        request.upload_handlers = [HashingBlobUploadHandler(request, tree='upload')]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # Also covers a body that failed to parse, before post() runs
+            for handler in request.upload_handlers:
+                if isinstance(handler, HashingBlobUploadHandler):
+                    handler.remove_parts()
+
+    def post(self, request):
+        """Create a post per uploaded file"""
+        files = []
+        try:
+            files = request.FILES.getlist('files')
+
+            max_files = getattr(settings, 'BATCH_UPLOAD_MAX_FILES', 50)
+            if not files:
+                return Response({
+                    "success": False,
+                    "error": "No files provided (use the 'files' field)"
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if len(files) > max_files:
+                return Response({
+                    "success": False,
+                    "error": f"At most {max_files} files per batch"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            tahun = None
+            try:
+                tahun = int(request.data.get('tahun') or 0) or None
+            except (ValueError, TypeError):
+                pass
+            uploader_id = None
+            try:
+                uploader_id = int(request.data.get('uploader') or 0) or None
+            except (ValueError, TypeError):
+                pass
+            description = request.data.get('description', '')
+            tags = request.data.getlist('tags') or []
+
+            results = []
+            with atomic_with_cached_ids():
+                for file in files:
+                    ext = os.path.splitext(file.name)[1]
+                    media_type = detect_media_type(ext)
+                    if media_type == 'none':
+                        results.append({"filename": file.name, "success": False, "error": "Unsupported file type"})
+                        continue
+
+                    try:
+                        # Savepoint per file, so one failure doesn't undo the others
+                        with transaction.atomic():
+                            if isinstance(file, HashedUploadedFile):
+                                file.close()
+                                media_blob, _ = ingest_hashed_file(file.path, file.sha256, file.size, 'upload', ext)
+                            else:
+                                # Body was parsed before our upload handler was installed
+                                media_blob, _ = ingest_chunks(file.chunks(), 'upload', ext)
+
+                            post = create_post(
+                                url=media_blob.url,
+                                media_type=media_type,
+                                description=description,
+                                tahun=tahun,
+                                uploader_id=uploader_id,
+                                tags=tags,
+                                media_blob=media_blob
+                            )
+                        results.append({"filename": file.name, "success": True, "post": post})
+                    except Exception as e:
+                        results.append({"filename": file.name, "success": False, "error": str(e)})
+
+            # Serialized after commit, once the posts are final
+            for result in results:
+                if result["success"]:
+                    result["post"] = PostDetailSerializer(result["post"]).data
+
+            created = sum(1 for result in results if result["success"])
+
+            return Response({
+                "success": created > 0,
+                "created": created,
+                "failed": len(results) - created,
+                "results": results
+            }, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return Response(
+                {
+                    "success": False,
+                    "error": str(e)
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        finally:
+            # Files that weren't stored (rejected, failed, or a rolled back batch)
+            for file in files:
+                if isinstance(file, HashedUploadedFile):
+                    file.discard()
+
+
 class PostListView(APIView):
     """
     GET endpoint for listing all posts
@@ -327,6 +421,9 @@ class PostListByUserView(APIView):
 class PostDetailView(APIView):
     """
     GET endpoint for individual post details
+
+    Each call counts as a view (deduplicated per viewer), aggregated in
+    memory and flushed to Post.views by post.view_counter.
     """
     permission_classes = (AllowAny,)
 
@@ -334,6 +431,7 @@ class PostDetailView(APIView):
         """Get post by ID"""
         try:
             post = Post.objects.get(id=post_id)
+            get_view_counter().record(post.id, viewer_key_for(request))
             serializer = PostDetailSerializer(post)
             
             return Response({
@@ -359,6 +457,195 @@ class PostDetailView(APIView):
             )
 
 
+class PostProcessingStatusView(APIView):
+    """
+    GET endpoint for the background processing state of a post
+
+    URL: api/post/<post_id>/status/
+
+    Poll after creating a post with media until status is "ready" (or
+    "failed"); stage names the step currently running. Video transcoding
+    finishes later, in transcode_videos workers: poll transcode_status
+    until "ready" for stream_url.
+
+    Response:
+    {
+        "success": true,
+        "post_id": 1,
+        "status": "processing",
+        "stage": "metadata",
+        "error": "",
+        "tahun": null,
+        "thumb_url": "",
+        "transcode_status": "pending",
+        "stream_url": null
+    }
+    """
+    permission_classes = (AllowAny,)
+
+    def get(self, request, post_id):
+        """Get processing state"""
+        try:
+            post = (
+                Post.objects.filter(id=post_id)
+                .values('processing_status', 'processing_stage', 'processing_error', 'tahun__tahun', 'thumb_url',
+                        'transcode_status', 'stream_url')
+                .first()
+            )
+            if not post:
+                return Response({
+                    "success": False,
+                    "error": f"Post with ID {post_id} not found"
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            return Response({
+                "success": True,
+                "post_id": post_id,
+                "status": post['processing_status'],
+                "stage": post['processing_stage'],
+                "error": post['processing_error'],
+                "tahun": post['tahun__tahun'],
+                "thumb_url": post['thumb_url'],
+                "transcode_status": post['transcode_status'],
+                "stream_url": post['stream_url'] or None
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class PostViewStatsView(APIView):
+    """
+    GET endpoint for a post's daily view counts
+
+    URL: api/post/<post_id>/stats/
+
+    Query parameters:
+    - days: Number of days to return, counting back from today (default 30, max 365)
+
+    Response:
+    {
+        "success": true,
+        "post_id": 1,
+        "views": 120,
+        "daily": [
+            {"date": "2025-12-13", "views": 40},
+            {"date": "2025-12-14", "views": 80}
+        ]
+    }
+    """
+    permission_classes = (AllowAny,)
+
+    def get(self, request, post_id):
+        """Get daily view stats for a post"""
+        try:
+            try:
+                days = min(max(int(request.query_params.get('days', 30)), 1), 365)
+            except (ValueError, TypeError):
+                days = 30
+
+            stored_views = Post.objects.filter(id=post_id).values_list('views', flat=True).first()
+            if stored_views is None:
+                return Response(
+                    {
+                        "success": False,
+                        "error": "Post not found"
+                    },
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+            since = timezone.localdate() - timedelta(days=days - 1)
+            daily = PostDailyStats.objects.filter(post_id=post_id, date__gte=since).order_by('date')
+
+            return Response({
+                "success": True,
+                "post_id": post_id,
+                "views": get_view_counter().views(post_id, stored_views),
+                "daily": [
+                    {
+                        "date": stats.date,
+                        "views": stats.views
+                    }
+                    for stats in daily
+                ]
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TrendingPostsView(APIView):
+    """
+    GET endpoint for the most viewed posts over recent days
+
+    URL: api/post/trending/
+
+    Query parameters:
+    - days: Window size in days, counting back from today (default 7, max 90)
+    - limit: Number of posts (default 20, max 100)
+
+    Response:
+    {
+        "success": true,
+        "days": 7,
+        "count": 1,
+        "posts": [
+            {
+                "id": 1,
+                ...
+                "recent_views": 120
+            }
+        ]
+    }
+    """
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        """Get trending posts from the daily rollups"""
+        try:
+            try:
+                days = min(max(int(request.query_params.get('days', 7)), 1), 90)
+                limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+            except (ValueError, TypeError):
+                days, limit = 7, 20
+
+            since = timezone.localdate() - timedelta(days=days - 1)
+            top = list(
+                PostDailyStats.objects.filter(date__gte=since)
+                .values('post_id')
+                .annotate(recent_views=Sum('views'))
+                .order_by('-recent_views')[:limit]
+            )
+
+            posts = Post.objects.in_bulk([row['post_id'] for row in top])
+            posts_data = []
+            for row in top:
+                post = posts.get(row['post_id'])
+                if post:
+                    post_data = PostDetailSerializer(post).data
+                    post_data['recent_views'] = row['recent_views']
+                    posts_data.append(post_data)
+
+            return Response({
+                "success": True,
+                "days": days,
+                "count": len(posts_data),
+                "posts": posts_data
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class GeneratePostContentView(APIView):
     """
     POST endpoint to generate Gemini comments and topics for a specific post
@@ -414,23 +701,15 @@ class GeneratePostContentView(APIView):
                 print(f"Comments data: {comments_data}")
                 
                 if comments_data and isinstance(comments_data, list):
-                    for comment_dict in comments_data:
-                        username = comment_dict.get('username', f'AI_User_{post_id}')
-                        comment_text = comment_dict.get('comment', '')
-                        
-                        # Create or get user
-                        user, _ = User.objects.get_or_create(
-                            username=username,
-                            defaults={'first_name': username}
-                        )
-                        
-                        # Create comment
-                        Comment.objects.create(
-                            post_id=post_id,
-                            user=user,
-                            text=comment_text
-                        )
-                    comments_count = len(comments_data)
+                    # Users and comments are bulk-created in one transaction
+                    created = ingest_comments(
+                        post_id,
+                        comments_data,
+                        default_username=f'AI_User_{post_id}',
+                        user_defaults=lambda username: {'first_name': username}
+                    )
+                    comments_count = len(created)
+                    record_comments_received(post.uploader_id, comments_count)
                     print(f"✓ Generated {comments_count} comments for post {post_id}")
             except Exception as e:
                 error_msg = f"Error generating comments: {str(e)}"
@@ -547,11 +826,19 @@ class PostLikeView(APIView):
     URL: api/post/<post_id>/like/
     
     Requires authentication. Toggles like status (add if not exists, remove if exists)
+
+    Request body (optional):
+    {
+        "action": "toggle" | "like" | "unlike"  // default "toggle"
+    }
+
+    "like" and "unlike" are idempotent and safe to retry.
     
     Response:
     {
         "success": true,
         "action": "liked" or "unliked",
+        "changed": true,
         "post_id": 1,
         "likes_count": 5
     }
@@ -561,9 +848,25 @@ class PostLikeView(APIView):
     def post(self, request, post_id):
         """Toggle like on a post"""
         try:
-            # Check if post exists
+            mode = request.data.get('action') or 'toggle'
+            if mode not in LIKE_MODES:
+                return Response(
+                    {
+                        "success": False,
+                        "error": f"action must be one of: {', '.join(LIKE_MODES)}"
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # With POST_LIKE_WRITE_BEHIND the toggle is buffered and written
+            # (and notified) on the next flush; otherwise it's a single
+            # transaction: delete/insert plus counter update, no COUNT query
+            like_buffer = get_like_buffer()
             try:
-                post = Post.objects.get(id=post_id)
+                if like_buffer:
+                    result = like_buffer.record(request.user.id, post_id, mode)
+                else:
+                    result = set_like(request.user.id, post_id, mode)
             except Post.DoesNotExist:
                 return Response(
                     {
@@ -572,27 +875,20 @@ class PostLikeView(APIView):
                     },
                     status=status.HTTP_404_NOT_FOUND
                 )
-            
-            # Check if user already liked this post
-            like_exists = PostLike.objects.filter(user=request.user, post=post).exists()
-            
-            if like_exists:
-                # Unlike the post
-                PostLike.objects.filter(user=request.user, post=post).delete()
-                action = "unliked"
-            else:
-                # Like the post
-                PostLike.objects.create(user=request.user, post=post)
-                action = "liked"
-            
-            # Get current likes count
-            likes_count = PostLike.objects.filter(post=post).count()
+
+            if not like_buffer and result['changed']:
+                event = (result['uploader_id'], request.user.id, 'like', post_id)
+                if result['action'] == 'liked':
+                    notify([event])
+                else:
+                    retract([event])
             
             return Response({
                 "success": True,
-                "action": action,
+                "action": result['action'],
+                "changed": result['changed'],
                 "post_id": post_id,
-                "likes_count": likes_count
+                "likes_count": result['likes_count']
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -635,13 +931,15 @@ class PostLikesCountView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Get likes count
-            likes_count = PostLike.objects.filter(post=post).count()
+            # Denormalized counter, kept current by like_service
+            likes_count = buffered_likes_count(post.id, post.likes_count)
             
             # Check if user has liked (only if authenticated)
             user_liked = False
             if request.user.is_authenticated:
-                user_liked = PostLike.objects.filter(user=request.user, post=post).exists()
+                user_liked = buffered_is_liked(request.user.id, post.id)
+                if user_liked is None:
+                    user_liked = PostLike.objects.filter(user=request.user, post=post).exists()
             
             response = {
                 "success": True,
@@ -661,11 +959,99 @@ class PostLikesCountView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class PostLikesStatusView(APIView):
+    """
+    POST endpoint to get like counts and liked state for many posts at once
+
+    URL: api/post/likes/status/
+
+    Request body:
+    {
+        "post_ids": [1, 2, 3]  // up to 200 IDs
+    }
+
+    Response:
+    {
+        "success": true,
+        "posts": {
+            "1": {"likes_count": 5, "user_liked": true},  // user_liked only if authenticated
+            "2": {"likes_count": 0, "user_liked": false}
+        }
+    }
+
+    Unknown post IDs are left out of "posts".
+    """
+    permission_classes = (AllowAny,)
+    MAX_POST_IDS = 200
+
+    def post(self, request):
+        """Get likes status for a list of posts"""
+        try:
+            post_ids = request.data.get('post_ids')
+            if not isinstance(post_ids, list):
+                return Response({
+                    "success": False,
+                    "error": "post_ids must be a list"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                post_ids = {int(post_id) for post_id in post_ids}
+            except (ValueError, TypeError):
+                return Response({
+                    "success": False,
+                    "error": "post_ids must be integers"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            if len(post_ids) > self.MAX_POST_IDS:
+                return Response({
+                    "success": False,
+                    "error": f"At most {self.MAX_POST_IDS} post_ids per request"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            # Query 1: denormalized counters for every requested post
+            counts = dict(Post.objects.filter(id__in=post_ids).values_list('id', 'likes_count'))
+
+            posts_data = {
+                str(post_id): {"likes_count": buffered_likes_count(post_id, likes_count)}
+                for post_id, likes_count in counts.items()
+            }
+
+            if request.user.is_authenticated:
+                # Query 2: which of these posts the caller has liked
+                liked = set(
+                    PostLike.objects.filter(user=request.user, post_id__in=counts.keys())
+                    .values_list('post_id', flat=True)
+                )
+                for post_id in counts:
+                    user_liked = buffered_is_liked(request.user.id, post_id)
+                    if user_liked is None:
+                        user_liked = post_id in liked
+                    posts_data[str(post_id)]["user_liked"] = user_liked
+
+            return Response({
+                "success": True,
+                "posts": posts_data
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class PostLikesListView(APIView):
     """
     GET endpoint to get list of users who liked a post
     
     URL: api/post/<post_id>/likes/list/
+
+    Keyset-paginated by like ID (oldest first), so every page is an index
+    range scan no matter how many likes the post has.
+
+    Query parameters:
+    - cursor: next_cursor from the previous page (optional)
+    - limit: Page size (default 50, max 200)
     
     Response:
     {
@@ -675,26 +1061,37 @@ class PostLikesListView(APIView):
         "users": [
             {
                 "id": 1,
-                "username": "user1",
-                "email": "user1@example.com"
+                "username": "user1"
             },
             {
                 "id": 2,
-                "username": "user2",
-                "email": "user2@example.com"
+                "username": "user2"
             }
-        ]
+        ],
+        "next_cursor": 17  // null on the last page
     }
     """
     permission_classes = (AllowAny,)
+    DEFAULT_LIMIT = 50
+    MAX_LIMIT = 200
 
     def get(self, request, post_id):
-        """Get list of users who liked a post"""
+        """Get a page of users who liked a post"""
         try:
-            # Check if post exists
             try:
-                post = Post.objects.get(id=post_id)
-            except Post.DoesNotExist:
+                limit = min(max(int(request.query_params.get('limit', self.DEFAULT_LIMIT)), 1), self.MAX_LIMIT)
+                cursor = int(request.query_params.get('cursor', 0))
+            except (ValueError, TypeError):
+                return Response(
+                    {
+                        "success": False,
+                        "error": "cursor and limit must be integers"
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # Check if post exists
+            if not Post.objects.filter(id=post_id).exists():
                 return Response(
                     {
                         "success": False,
@@ -703,22 +1100,30 @@ class PostLikesListView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Get all users who liked this post
-            likes = PostLike.objects.filter(post=post).select_related('user')
+            # Only the like ID and the two user columns are selected; one
+            # extra row tells whether another page exists
+            likes = list(
+                PostLike.objects.filter(post_id=post_id, id__gt=cursor)
+                .order_by('id')
+                .values_list('id', 'user_id', 'user__username')[:limit + 1]
+            )
+            has_more = len(likes) > limit
+            likes = likes[:limit]
+
             users_data = [
                 {
-                    "id": like.user.id,
-                    "username": like.user.username,
-                    "email": like.user.email
+                    "id": user_id,
+                    "username": username
                 }
-                for like in likes
+                for _, user_id, username in likes
             ]
             
             return Response({
                 "success": True,
                 "post_id": post_id,
                 "count": len(users_data),
-                "users": users_data
+                "users": users_data,
+                "next_cursor": likes[-1][0] if has_more else None
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -727,3 +1132,75 @@ class PostLikesListView(APIView):
                 "error": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+
+class AutocompleteView(APIView):
+    """
+    GET endpoint for tag, topic and username suggestions while typing
+
+    Served from the in-process prefix index in post.autocomplete, most
+    popular first (tags by posts using them, topics by how often they were
+    suggested, users by followers).
+
+    URL: api/post/autocomplete/
+
+    Query parameters:
+    - q: Prefix typed so far (required, case-insensitive)
+    - type: Comma-separated kinds to search: tags, topics, users (default all)
+    - limit: Suggestions per kind (default 10, max 50)
+
+    Response:
+    {
+        "success": true,
+        "query": "jak",
+        "tags": [{"name": "jakarta", "posts": 12}],
+        "topics": [{"topic": "Jakarta floods", "count": 3}],
+        "users": [{"id": 4, "username": "jaka", "followers": 10}]
+    }
+    """
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        """Get suggestions for a prefix"""
+        try:
+            query = request.query_params.get('q', '').strip()
+            if not query:
+                return Response({
+                    "success": False,
+                    "error": "q is required"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            kinds = [kind.strip() for kind in request.query_params.get('type', '').split(',') if kind.strip()]
+            kinds = kinds or list(Autocomplete.KINDS)
+            unknown = set(kinds) - set(Autocomplete.KINDS)
+            if unknown:
+                return Response({
+                    "success": False,
+                    "error": f"type must be one of {', '.join(Autocomplete.KINDS)}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+            except (ValueError, TypeError):
+                limit = 10
+
+            matches = get_autocomplete().search(query, kinds=kinds, limit=limit)
+
+            response = {"success": True, "query": query}
+            if 'tags' in matches:
+                response["tags"] = [{"name": name, "posts": weight} for name, weight, _ in matches['tags']]
+            if 'topics' in matches:
+                response["topics"] = [{"topic": topic, "count": weight} for topic, weight, _ in matches['topics']]
+            if 'users' in matches:
+                response["users"] = [
+                    {"id": payload['id'], "username": username, "followers": weight}
+                    for username, weight, payload in matches['users']
+                ]
+
+            return Response(response, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
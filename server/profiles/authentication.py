@@ -0,0 +1,64 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def _token_cache():
+    """
+    Cache holding token lookups (AUTH_TOKEN_CACHE_ALIAS)
+
+    Raises:
+        ImproperlyConfigured: If it is local to the process; invalidation
+            would then only reach the worker that handled the logout or
+            deactivation, and the others would keep accepting the token
+    """
+    cache = caches[getattr(settings, 'AUTH_TOKEN_CACHE_ALIAS', 'default')]
+    if isinstance(cache, LocMemCache):
+        raise ImproperlyConfigured(
+            "CachedTokenAuthentication needs a cache shared between processes; "
+            "set AUTH_TOKEN_CACHE_ALIAS to a file, database, Redis or memcached cache"
+        )
+    return cache
+
+
+def _token_cache_key(key):
+    # Hashed so raw tokens never end up as cache keys
+    return f"auth:token:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def invalidate_token(key):
+    """Forget a cached token lookup"""
+    _token_cache().delete(_token_cache_key(key))
+
+
+def invalidate_user_tokens(user_id):
+    """Forget cached token lookups for every token a user owns"""
+    keys = Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    _token_cache().delete_many([_token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that caches the Token -> User lookup
+
+    Successful lookups are kept for AUTH_TOKEN_CACHE_TIMEOUT seconds in the
+    shared AUTH_TOKEN_CACHE_ALIAS cache so the usual authenticated read
+    skips the token/user join. Entries are dropped on logout, token
+    deletion and user changes (see profiles.signals), for every worker at
+    once; failed lookups are never cached.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = _token_cache()
+        cache_key = _token_cache_key(key)
+        token = cache.get(cache_key)
+        if token is not None:
+            return (token.user, token)
+
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, token, timeout=getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 300))
+        return (user, token)
@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from timecapsule.models import Profile
+from .images import AVATAR_SIZES, variant_urls
+from .serializers import ProfileSerializer
+
+
+def _profile_cache():
+    """
+    Cache holding profile data (PROFILE_CACHE_ALIAS)
+
+    Raises:
+        ImproperlyConfigured: If it is local to the process; an edit would
+            then only be invalidated in the worker that handled it
+    """
+    cache = caches[getattr(settings, 'PROFILE_CACHE_ALIAS', 'default')]
+    if isinstance(cache, LocMemCache):
+        raise ImproperlyConfigured(
+            "Profile caching needs a cache shared between processes; "
+            "set PROFILE_CACHE_ALIAS to a file, database, Redis or memcached cache"
+        )
+    return cache
+
+
+def _summary_key(user_id):
+    return f"profiles:summary:{user_id}"
+
+
+def _detail_key(user_id=None, username=None):
+    if user_id is not None:
+        return f"profiles:detail:id:{user_id}"
+    return f"profiles:detail:username:{username}"
+
+
+def get_profile_data(user_id=None, username=None):
+    """
+    Serialized ProfileSerializer data for one user, by ID or username
+
+    Read-only: a user without a Profile row (created before profiles were
+    guaranteed and not yet backfilled) is served an empty profile instead
+    of having one inserted on a GET. Cached in the shared profile cache
+    for PROFILE_CACHE_TIMEOUT seconds under both the ID and the username.
+
+    Raises:
+        User.DoesNotExist: If no such user exists
+    """
+    cache = _profile_cache()
+    data = cache.get(_detail_key(user_id, username))
+    if data is not None:
+        return data
+
+    lookup = {'id': user_id} if user_id is not None else {'username': username}
+    user = User.objects.select_related('profile', 'stats').get(**lookup)
+    profile = getattr(user, 'profile', None) or Profile(user=user)
+    data = dict(ProfileSerializer(profile).data)
+
+    cache.set_many(
+        {
+            _detail_key(user_id=user.id): data,
+            _detail_key(username=user.username): data,
+        },
+        timeout=getattr(settings, 'PROFILE_CACHE_TIMEOUT', 60)
+    )
+    return data
+
+
+def get_profile_summaries(user_ids):
+    """
+    Username, avatar and bio for many users
+
+    Served from the cache where possible; the rest are loaded with one
+    User + Profile join and cached for PROFILE_CACHE_TIMEOUT seconds.
+    Never writes to the database.
+
+    Args:
+        user_ids: Iterable of user IDs
+
+    Returns:
+        dict of user_id -> summary dict (unknown IDs are left out)
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+
+    cache = _profile_cache()
+    cached = cache.get_many([_summary_key(user_id) for user_id in user_ids])
+    summaries = {summary['id']: summary for summary in cached.values()}
+
+    missing = user_ids - summaries.keys()
+    if missing:
+        users = (
+            User.objects.filter(id__in=missing)
+            .select_related('profile')
+            .only('id', 'username', 'profile__profile_picture', 'profile__bio')
+        )
+        fresh = {}
+        for user in users:
+            profile = getattr(user, 'profile', None)
+            picture = profile.profile_picture if profile else None
+            summary = {
+                "id": user.id,
+                "username": user.username,
+                "profile_picture": picture.url if picture else None,
+                "profile_picture_variants": variant_urls(picture, AVATAR_SIZES),
+                "bio": profile.bio if profile else None,
+            }
+            summaries[user.id] = summary
+            fresh[_summary_key(user.id)] = summary
+
+        cache.set_many(fresh, timeout=getattr(settings, 'PROFILE_CACHE_TIMEOUT', 60))
+
+    return summaries
+
+
+def invalidate_profile(user_id, username=None):
+    """Drop cached profile data for a user after it changes"""
+    keys = [_summary_key(user_id), _detail_key(user_id=user_id)]
+    if username is not None:
+        keys.append(_detail_key(username=username))
+    _profile_cache().delete_many(keys)
@@ -0,0 +1,100 @@
+import logging
+import os
+import threading
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from PIL import Image, ImageOps
+from mediastore.imaging import image_formats, load_image, save_image, shrink
+
+logger = logging.getLogger(__name__)
+
+# Square avatar edges and banner widths, in pixels
+AVATAR_SIZES = (64, 128)
+BANNER_WIDTHS = (1200,)
+
+
+def variant_name(original_name, size, ext):
+    """Storage name of a variant, next to the original under variants/"""
+    directory, filename = os.path.split(original_name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'variants', f"{stem}_{size}.{ext}")
+
+
+def variant_urls(field_file, sizes):
+    """
+    URLs of the variants generated so far for an image field
+
+    Returns:
+        dict of size (as str) -> {ext: url}, e.g. {"64": {"webp": "...", "jpg": "..."}}
+    """
+    if not field_file:
+        return {}
+
+    storage = field_file.storage
+    urls = {}
+    for size in sizes:
+        for ext, _ in image_formats():
+            name = variant_name(field_file.name, size, ext)
+            if storage.exists(name):
+                urls.setdefault(str(size), {})[ext] = storage.url(name)
+    return urls
+
+
+def generate_variants(field_file, sizes, square):
+    """
+    Write fixed-size WebP/JPEG variants of an uploaded image
+
+    Args:
+        field_file: ImageField file (Profile.profile_picture, Banner.image)
+        sizes: Edge lengths (square) or widths (not square) to produce
+        square: Center-crop to size x size instead of scaling to a width
+
+    Returns:
+        int number of variants written (existing ones are skipped)
+    """
+    if not field_file:
+        return 0
+
+    storage = field_file.storage
+    wanted = [
+        (size, ext, fmt)
+        for size in sizes
+        for ext, fmt in image_formats()
+        if not storage.exists(variant_name(field_file.name, size, ext))
+    ]
+    if not wanted:
+        return 0
+
+    with storage.open(field_file.name, 'rb') as f:
+        img = load_image(f, (max(sizes) * 2, max(sizes) * 2))
+
+    written = 0
+    for size, ext, fmt in wanted:
+        if square:
+            variant = ImageOps.fit(img, (size, size), Image.LANCZOS)
+        else:
+            variant = shrink(img, (size, img.height))
+
+        buffer = BytesIO()
+        save_image(variant, buffer, fmt)
+        storage.save(variant_name(field_file.name, size, ext), ContentFile(buffer.getvalue()))
+        written += 1
+
+    return written
+
+
+def generate_variants_in_background(field_file, sizes, square, on_done=None):
+    """Run generate_variants in a daemon thread so uploads don't wait for it"""
+
+    def run():
+        try:
+            written = generate_variants(field_file, sizes, square)
+            if written and on_done:
+                on_done()
+        except Exception as e:
+            logger.error(f"Failed to generate variants for {field_file.name}: {e}", exc_info=True)
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=run, daemon=True).start()
@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from rest_framework.validators import UniqueValidator
-from timecapsule.models import Profile
+from post.stats_service import get_user_stats
+from timecapsule.models import Banner, Profile
+from .images import AVATAR_SIZES, BANNER_WIDTHS, variant_urls
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -10,17 +12,55 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ("id", "username", "email")
 
 
+class BannerSerializer(serializers.ModelSerializer):
+    image_variants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Banner
+        fields = (
+            "id",
+            "image",
+            "image_variants",
+            "title",
+            "description",
+            "uploaded_at",
+        )
+
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image, BANNER_WIDTHS)
+
+
 class ProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    profile_picture_variants = serializers.SerializerMethodField()
+    banners = serializers.SerializerMethodField()
+    stats = serializers.SerializerMethodField()
 
     class Meta:
         model = Profile
         fields = (
             "user",
             "profile_picture",
+            "profile_picture_variants",
             "bio",
+            "banners",
+            "stats",
         )
 
+    def get_profile_picture_variants(self, obj):
+        # Thumbnails for avatars; clients shouldn't fetch the original for these
+        return variant_urls(obj.profile_picture, AVATAR_SIZES)
+
+    def get_banners(self, obj):
+        if obj.pk is None:
+            # Unsaved placeholder profile (see profiles.cache.get_profile_data)
+            return []
+        return BannerSerializer(obj.banners.all(), many=True).data
+
+    def get_stats(self, obj):
+        # Maintained incrementally in post.stats_service, so this is a PK read
+        return get_user_stats(obj.user)
+
 
 class RegisterSerializer(serializers.Serializer):
     username = serializers.CharField(max_length=150, validators=[UniqueValidator(queryset=User.objects.all())])
@@ -31,6 +71,5 @@ class RegisterSerializer(serializers.Serializer):
         username = validated_data.get("username")
         email = validated_data.get("email", "")
         password = validated_data.get("password")
-        user = User.objects.create_user(username=username, email=email, password=password)
-        Profile.objects.get_or_create(user=user)
-        return user
+        # Profile is created by the post_save signal in profiles.signals
+        return User.objects.create_user(username=username, email=email, password=password)
@@ -0,0 +1,85 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from timecapsule.models import Banner, Profile
+from .authentication import invalidate_token, invalidate_user_tokens
+from .cache import invalidate_profile
+from .images import AVATAR_SIZES, BANNER_WIDTHS, generate_variants_in_background
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def create_profile_for_new_user(sender, instance, created, raw=False, **kwargs):
+    # Every user has a Profile from the start, so profile reads never write
+    if created and not raw:
+        Profile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def forget_tokens_of_changed_user(sender, instance, created, update_fields=None, **kwargs):
+    # Cached tokens carry a copy of the user, so deactivation (or any
+    # other change) must not be served from a stale entry
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    invalidate_user_tokens(instance.id)
+
+
+def _remember_stored_image(instance, field_name, update_fields):
+    # Read before the save overwrites it, so post_save can tell a new image
+    # from an unrelated edit
+    if update_fields is not None and field_name not in update_fields:
+        stored = getattr(instance, field_name).name
+    elif instance.pk is None:
+        stored = None
+    else:
+        stored = type(instance).objects.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+    setattr(instance, f'_stored_{field_name}', stored or None)
+
+
+def _image_changed(instance, field_name):
+    field_file = getattr(instance, field_name)
+    return bool(field_file) and field_file.name != getattr(instance, f'_stored_{field_name}', None)
+
+
+@receiver(pre_save, sender=Profile)
+def remember_profile_picture(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        _remember_stored_image(instance, 'profile_picture', update_fields)
+
+
+@receiver(pre_save, sender=Banner)
+def remember_banner_image(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        _remember_stored_image(instance, 'image', update_fields)
+
+
+@receiver(post_save, sender=Profile)
+def make_profile_picture_variants(sender, instance, raw=False, **kwargs):
+    if raw or not _image_changed(instance, 'profile_picture'):
+        return
+    user = instance.user
+    transaction.on_commit(lambda: generate_variants_in_background(
+        instance.profile_picture,
+        AVATAR_SIZES,
+        square=True,
+        on_done=lambda: invalidate_profile(user.id, user.username)
+    ))
+
+
+@receiver(post_save, sender=Banner)
+def make_banner_variants(sender, instance, raw=False, **kwargs):
+    if raw or not _image_changed(instance, 'image'):
+        return
+    user = instance.profile.user
+    transaction.on_commit(lambda: generate_variants_in_background(
+        instance.image,
+        BANNER_WIDTHS,
+        square=False,
+        on_done=lambda: invalidate_profile(user.id, user.username)
+    ))
@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
-    RegisterView, LoginView, LogoutView, ProfileView, PublicProfileView, ProfileByIdView
+    RegisterView, LoginView, LogoutView, ProfileView, PublicProfileView, ProfileByIdView,
+    ProfileBatchView
 )
 
 urlpatterns = [
@@ -9,5 +10,6 @@ urlpatterns = [
     path("logout/", LogoutView.as_view()),
     path("profile/", ProfileView.as_view()),
     path("profiles/id", ProfileByIdView.as_view()),
+    path("profiles/batch/", ProfileBatchView.as_view()),
     path("profiles/<str:username>/", PublicProfileView.as_view()),
 ]
@@ -10,6 +10,8 @@ from .serializers import (
     UserSerializer, ProfileSerializer, RegisterSerializer
 )
 from timecapsule.models import Profile
+from .cache import get_profile_data, get_profile_summaries, invalidate_profile
+from .authentication import invalidate_token
 
 
 class RegisterView(APIView):
@@ -47,6 +49,9 @@ class LogoutView(APIView):
             token.delete()
         except Token.DoesNotExist:
             pass
+        # The post_delete signal covers this too; be explicit for the token used here
+        if isinstance(request.auth, Token):
+            invalidate_token(request.auth.key)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -55,9 +60,7 @@ class ProfileView(APIView):
     parser_classes = (MultiPartParser, FormParser)
 
     def get(self, request):
-        profile, _ = Profile.objects.get_or_create(user=request.user)
-        serializer = ProfileSerializer(profile)
-        return Response(serializer.data)
+        return Response(get_profile_data(user_id=request.user.id))
 
     def put(self, request):
         profile, _ = Profile.objects.get_or_create(user=request.user)
@@ -74,6 +77,7 @@ class ProfileView(APIView):
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             serializer.save()
+            invalidate_profile(request.user.id, request.user.username)
         
         # Return the profile
         return Response(ProfileSerializer(profile).data)
@@ -84,12 +88,10 @@ class PublicProfileView(APIView):
 
     def get(self, request, username):
         try:
-            user = User.objects.get(username=username)
+            data = get_profile_data(username=username)
         except User.DoesNotExist:
             return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
-        profile, _ = Profile.objects.get_or_create(user=user)
-        serializer = ProfileSerializer(profile)
-        return Response(serializer.data)
+        return Response(data)
 
 
 class ProfileByIdView(APIView):
@@ -115,14 +117,12 @@ class ProfileByIdView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Get user by ID
-            user = User.objects.get(id=user_id)
-            profile, _ = Profile.objects.get_or_create(user=user)
-            serializer = ProfileSerializer(profile)
+            # Pure read, served from cache when warm
+            data = get_profile_data(user_id=user_id)
             
             return Response({
                 "success": True,
-                "data": serializer.data
+                "data": data
             }, status=status.HTTP_200_OK)
             
         except User.DoesNotExist:
@@ -137,4 +137,64 @@ class ProfileByIdView(APIView):
             )
 
 
+class ProfileBatchView(APIView):
+    """
+    GET endpoint for many user profiles in one call
+
+    URL: api/profiles/batch/?ids=1,2,3  (up to 100 IDs)
+
+    Response:
+    {
+        "success": true,
+        "profiles": {
+            "1": {
+                "id": 1,
+                "username": "user1",
+                "profile_picture": "/media/profile_pictures/user_1/me.jpg",
+                "profile_picture_variants": {"64": {"webp": "...", "jpg": "..."}},
+                "bio": "..."
+            }
+        }
+    }
+
+    Unknown IDs are left out of "profiles".
+    """
+    permission_classes = (AllowAny,)
+    MAX_IDS = 100
+
+    def get(self, request):
+        """Get profile summaries by user IDs"""
+        try:
+            raw_ids = request.query_params.get('ids', '')
+            try:
+                user_ids = {int(part) for part in raw_ids.split(',') if part.strip()}
+            except ValueError:
+                return Response(
+                    {"success": False, "detail": "ids must be comma-separated integers"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            if not user_ids:
+                return Response(
+                    {"success": False, "detail": "ids parameter is required"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            if len(user_ids) > self.MAX_IDS:
+                return Response(
+                    {"success": False, "detail": f"At most {self.MAX_IDS} ids per request"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            summaries = get_profile_summaries(user_ids)
+
+            return Response({
+                "success": True,
+                "profiles": {str(user_id): summary for user_id, summary in summaries.items()}
+            }, status=status.HTTP_200_OK)
 
+        except Exception as e:
+            return Response(
+                {"success": False, "detail": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -2,9 +2,9 @@ from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from post.models import Post, Tahun
 from post.serializers import PostDetailSerializer
-from django.contrib.auth.models import User
+from post.post_service import create_post
+from mediastore.blobs import ingest_file
 import uuid
 import os
 from django.conf import settings
@@ -35,7 +35,7 @@ class ScrapeView(APIView):
         "success": true,
         "post": {
             "id": 24,
-            "url": "/public/scrape/random-uuid.mp4",
+            "url": "/public/scrape/<aa>/<bb>/<sha256>.mp4",
             "media_type": "video",
             "description": "...",
             "tahun": 2025,
@@ -272,33 +272,18 @@ class ScrapeView(APIView):
             print(f"🎬 Media type: {media_type}")
             print(f"📅 Upload year: {upload_year}")
             
-            # Get or create tahun object
-            tahun_obj = None
-            if upload_year:
-                tahun_obj, _ = Tahun.objects.get_or_create(tahun=upload_year)
-                print(f"📌 Tahun object: {tahun_obj.id} ({tahun_obj.tahun})")
-            
-            # Get uploader
-            uploader = None
-            if uploader_id:
-                try:
-                    uploader = User.objects.get(id=uploader_id)
-                    print(f"👤 Uploader: {uploader.username} (ID: {uploader.id})")
-                except User.DoesNotExist:
-                    print(f"⚠️  Uploader not found with ID: {uploader_id}")
-            
-            # Generate public URL
-            file_basename = os.path.basename(downloaded_file)
-            public_url = f"{settings.PUBLIC_URL}scrape/{file_basename}"
-            
-            # Create post
-            post = Post.objects.create(
+            # Store by content hash; re-scraping the same media reuses the file
+            media_blob, _ = ingest_file(downloaded_file, 'scrape')
+            public_url = media_blob.url
+            
+            # Create post (year, uploader, stats, timelines and processing)
+            post = create_post(
                 url=public_url,
                 media_type=media_type,
                 description=description or f"Scrapped from {platform}",
-                thumb_url='',
-                tahun=tahun_obj,
-                uploader=uploader
+                tahun=upload_year,
+                uploader_id=uploader_id,
+                media_blob=media_blob
             )
             
             print(f"✓ Post created: ID {post.id}")
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:02
+
+from django.conf import settings
+from django.db import migrations
+
+
+def backfill_profiles(apps, schema_editor):
+    """Give every existing user a Profile so profile reads never have to insert one"""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Profile = apps.get_model('timecapsule', 'Profile')
+    missing = User.objects.filter(profile__isnull=True).values_list('id', flat=True)
+    Profile.objects.bulk_create(
+        [Profile(user_id=user_id) for user_id in missing.iterator()],
+        batch_size=500,
+        ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timecapsule', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_profiles, migrations.RunPython.noop),
+    ]
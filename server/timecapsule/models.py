@@ -7,7 +7,7 @@ def profile_picture_upload_path(instance, filename):
     return f"profile_pictures/user_{instance.user.id}/{filename}"
 
 def banner_upload_path(instance, filename):
-    return f"banners/user_{instance.user.id}/{filename}"
+    return f"banners/user_{instance.profile.user.id}/{filename}"
 
 
 class Profile(models.Model):